@@ -0,0 +1,135 @@
+"""
+Process-wide runtime shared by the pipeline and the maintenance agent.
+
+Loads the environment once, and lazily builds each piece on first use: the
+brand guidelines and compliance rules, the compliance matcher, Vertex models
+(one per model name and tool setup), the content generator, reviewer,
+researcher, image generator, WordPress publisher with its post mirror, and
+the Yoast integrator. Everything is built at most once per process and
+handed to the agents, so nothing is re-read or re-created per post.
+Construction is thread-safe; maintenance workers share the same instances.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+DEFAULT_MODEL = "gemini-2.0-flash-exp"
+
+
+def load_json_config(path: str) -> Dict:
+    """Reads a JSON config file; missing files give an empty dict."""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+class AgentRuntime:
+    def __init__(self):
+        load_dotenv()
+        self._instances = {}
+        self._lock = threading.RLock()
+
+    def _get(self, key, factory):
+        instance = self._instances.get(key)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(key)
+                if instance is None:
+                    instance = factory()
+                    self._instances[key] = instance
+        return instance
+
+    @property
+    def model_name(self) -> str:
+        return os.getenv("VERTEX_MODEL_NAME", DEFAULT_MODEL)
+
+    def model(self, model_name: Optional[str] = None, use_search_tool: bool = False):
+        """Shared Vertex model for `model_name` (default VERTEX_MODEL_NAME)."""
+        from vertex_utils import create_vertex_model
+        model_name = model_name or self.model_name
+        return self._get(('model', model_name, use_search_tool),
+                         lambda: create_vertex_model(model_name, use_search_tool=use_search_tool))
+
+    @property
+    def brand_guidelines(self) -> Dict:
+        return self._get('brand_guidelines', lambda: load_json_config("brand_guidelines.json"))
+
+    @property
+    def compliance_rules(self) -> Dict:
+        return self._get('compliance_rules', lambda: load_json_config("compliance_rules.json"))
+
+    @property
+    def matcher(self):
+        from compliance_matcher import get_compliance_matcher
+        return self._get('matcher', get_compliance_matcher)
+
+    @property
+    def generator(self):
+        from generator import ContentGenerator
+        return self._get('generator', lambda: ContentGenerator(
+            model=self.model(), brand_guidelines=self.brand_guidelines,
+            compliance_rules=self.compliance_rules, matcher=self.matcher))
+
+    @property
+    def reviewer(self):
+        from reviewer_agent import ReviewerAgent
+        return self._get('reviewer', lambda: ReviewerAgent(
+            model=self.model(), compliance_rules=self.compliance_rules, matcher=self.matcher))
+
+    @property
+    def researcher(self):
+        from researcher_agent import ResearcherAgent
+        return self._get('researcher', lambda: ResearcherAgent(model=self.model(use_search_tool=True)))
+
+    @property
+    def image_gen(self):
+        from image_generator import ImageGenerator
+        return self._get('image_gen', ImageGenerator)
+
+    @property
+    def wp_credentials(self):
+        return os.getenv("WP_URL"), os.getenv("WP_USER"), os.getenv("WP_APP_PASSWORD")
+
+    @property
+    def publisher(self):
+        """WordPress publisher with the local post mirror attached."""
+        return self._get('publisher', self._build_publisher)
+
+    @property
+    def mirror(self):
+        """The publisher's post mirror, or None if it could not be opened."""
+        return self.publisher.mirror
+
+    def _build_publisher(self):
+        from publisher import WordPressPublisher
+        from post_mirror import PostMirror
+        publisher = WordPressPublisher(*self.wp_credentials)
+        try:
+            PostMirror(publisher)
+        except Exception as e:
+            print(f"Runtime: Post mirror disabled ({e})")
+        return publisher
+
+    @property
+    def yoast(self):
+        from yoast_integrator import YoastSEOIntegrator
+        return self._get('yoast', lambda: YoastSEOIntegrator(*self.wp_credentials))
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> AgentRuntime:
+    """Returns the process-wide runtime, creating it on first use."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = AgentRuntime()
+    return _runtime
@@ -0,0 +1,130 @@
+"""
+Async WordPress REST client for site-wide maintenance.
+
+Reads `X-WP-TotalPages` from the first page and fetches the remaining pages
+concurrently (bounded by a semaphore), and applies post updates
+concurrently. The sync helpers (`fetch_all_posts_sync`, `update_posts_sync`)
+let the synchronous agents use it directly. Requires httpx; check
+`HTTPX_AVAILABLE` and fall back to WordPressPublisher when it is missing.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class AsyncWordPressClient:
+    def __init__(self, wp_url: str, wp_user: str, wp_password: str,
+                 max_concurrency: int = 8, timeout: float = 30.0, retries: int = 3,
+                 backoff: float = 1.0, transport=None):
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx is required for AsyncWordPressClient (pip install httpx)")
+        self.api_url = f"{wp_url.rstrip('/')}/wp-json/wp/v2"
+        self.auth = (wp_user, wp_password)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.transport = transport
+        self.client = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.client = httpx.AsyncClient(
+            auth=self.auth,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency),
+            transport=self.transport,
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+        self.client = None
+
+    async def _request(self, method: str, url: str, **kwargs):
+        """Sends a request, retrying 429/5xx with backoff (POST only on 429)."""
+        for attempt in range(self.retries + 1):
+            async with self.semaphore:
+                response = await self.client.request(method, url, **kwargs)
+            retryable = response.status_code == 429 or (method != 'POST' and response.status_code in RETRY_STATUSES)
+            if not retryable or attempt == self.retries:
+                return response
+            delay = self.backoff * (2 ** attempt)
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            await asyncio.sleep(delay)
+
+    async def _get_page(self, page: int, per_page: int, params: Dict):
+        response = await self._request('GET', f"{self.api_url}/posts",
+                                       params={**params, 'per_page': per_page, 'page': page})
+        if response.status_code != 200:
+            # WordPress answers 400 for a page past the end
+            if response.status_code != 400:
+                print(f"AsyncWP: Error fetching page {page}: {response.status_code}")
+            return response, []
+        return response, response.json()
+
+    async def fetch_all_posts(self, per_page: int = 100, params: Optional[Dict] = None,
+                              max_pages: Optional[int] = None) -> List[Dict]:
+        """Fetches every page of posts; pages after the first are fetched concurrently."""
+        params = dict(params or {})
+        first, posts = await self._get_page(1, per_page, params)
+        total_pages = int(first.headers.get('X-WP-TotalPages') or 1)
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+        if total_pages > 1:
+            pages = await asyncio.gather(*(self._get_page(p, per_page, params) for p in range(2, total_pages + 1)))
+            for _, page_posts in pages:
+                posts.extend(page_posts)
+        return posts
+
+    async def update_post(self, post_id: int, data: Dict) -> bool:
+        response = await self._request('POST', f"{self.api_url}/posts/{post_id}", json=data)
+        if response.status_code == 200:
+            return True
+        print(f"AsyncWP: Error updating post {post_id}: {response.status_code} {response.text[:200]}")
+        return False
+
+    async def update_posts(self, updates: Dict[int, Dict]) -> Dict[int, bool]:
+        """Applies {post_id: data} updates concurrently; returns {post_id: success}."""
+        ids = list(updates)
+        results = await asyncio.gather(*(self.update_post(pid, updates[pid]) for pid in ids),
+                                       return_exceptions=True)
+        outcome = {}
+        for pid, result in zip(ids, results):
+            if isinstance(result, Exception):
+                print(f"AsyncWP: Update exception for post {pid}: {result}")
+                result = False
+            outcome[pid] = result
+        return outcome
+
+
+def fetch_all_posts_sync(wp_url: str, wp_user: str, wp_password: str, **kwargs) -> List[Dict]:
+    """Blocking wrapper around AsyncWordPressClient.fetch_all_posts."""
+    client_kwargs = {k: kwargs.pop(k) for k in ('max_concurrency', 'timeout', 'retries', 'backoff', 'transport') if k in kwargs}
+
+    async def run():
+        async with AsyncWordPressClient(wp_url, wp_user, wp_password, **client_kwargs) as client:
+            return await client.fetch_all_posts(**kwargs)
+    return asyncio.run(run())
+
+
+def update_posts_sync(wp_url: str, wp_user: str, wp_password: str, updates: Dict[int, Dict],
+                      **client_kwargs) -> Dict[int, bool]:
+    """Blocking wrapper around AsyncWordPressClient.update_posts."""
+    async def run():
+        async with AsyncWordPressClient(wp_url, wp_user, wp_password, **client_kwargs) as client:
+            return await client.update_posts(updates)
+    return asyncio.run(run())
@@ -0,0 +1,115 @@
+"""
+Speed benchmark for the single-pass post analyzer.
+
+Builds a synthetic archive of maintenance posts (Thai review HTML with AI
+leftover tags, placeholders, hard-sell phrases and ingredient lists mixed
+in) and compares the previous per-pattern cleanup and issue checks against
+post_analyzer, asserting that both produce identical cleaned content and
+issue reports for every post.
+
+Usage: python benchmarks/bench_post_analyzer.py [--posts 10000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compliance_matcher import get_compliance_matcher
+from maintenance_agent import MaintenanceAgent
+from post_analyzer import LEFTOVER_PATTERNS, analyze_content
+
+PARAGRAPHS = [
+    "<p>เซรั่มบำรุงผิว <b>Hya 11 Molecul</b> ช่วยให้ผิวชุ่มชื้น เนื้อบางเบา ซึมไว</p>",
+    "<p>ส่วนผสมหลักคือวิตามินซี วิตามินอี และสารสกัดจากชาเขียว</p>",
+    "<ul><li>ไฮยาลูรอน 11 โมเลกุล</li><li>สารสกัดใบบัวบก</li><li>วิตามินบี 3</li></ul>",
+    "<p>วิธีใช้: ทาเช้าและเย็นหลังล้างหน้า</p>",
+    "<p>สั่งซื้อได้ที่ Shopee วันนี้ โปรโมชั่นพิเศษ ลดราคา!</p>",
+    "<h2>รีวิวจากผู้ใช้จริง</h2><p>ใช้ต่อเนื่อง 2 สัปดาห์ ผิวดูสุขภาพดีขึ้น</p>",
+]
+LEFTOVERS = [
+    "[image: serum bottle on marble]",
+    "[link: /review/hya-serum]",
+    "[Internal Link: วิธีเลือกเซรั่ม]",
+    "[IMAGE_PLACEHOLDER_2]",
+    "[INSERT_INTERNAL_LINK here]",
+    "[(ภาพประกอบ: ผิวชุ่มชื้น) ]",
+    "[IMAGE_PLACEHOLDER",
+]
+# Tags inside tags, where sequential re.sub passes can join text into new matches
+NESTED = ["[link: [image: nested]]", "[li[image: split]nk: joined]"]
+
+
+def make_posts(count, seed=7):
+    rng = random.Random(seed)
+    posts = []
+    for i in range(count):
+        parts = [rng.choice(PARAGRAPHS) for _ in range(rng.randint(4, 12))]
+        for _ in range(rng.choice((0, 0, 1, 2, 3))):
+            leftover = rng.choice(NESTED) if rng.random() < 0.02 else rng.choice(LEFTOVERS)
+            parts.insert(rng.randrange(len(parts) + 1), leftover)
+        posts.append({
+            "id": i,
+            "title": {"rendered": f"รีวิวเซรั่ม {i}"},
+            "content": {"rendered": "\n".join(parts)},
+            "featured_media": rng.choice((0, 5, 5, 5)),
+        })
+    return posts
+
+
+def legacy_cleanup(content):
+    cleaned_content = content
+    for pattern in LEFTOVER_PATTERNS:
+        cleaned_content = re.sub(pattern, '', cleaned_content, flags=re.IGNORECASE)
+    return cleaned_content.strip()
+
+
+def legacy_analysis(content):
+    """The cleanup, placeholder and ingredient checks as they were before post_analyzer."""
+    has_placeholders = any(re.search(pattern, content, re.IGNORECASE)
+                           for pattern in (r'\[image:.*?\]', r'\[link:.*?\]', r'\[IMAGE_PLACEHOLDER'))
+    content_lower = content.lower()
+    overload = content_lower.count('วิตามิน') > 5 or content_lower.count('สารสกัด') > 5
+    return legacy_cleanup(content), has_placeholders, overload
+
+
+def single_pass_analysis(content):
+    analysis = analyze_content(content)
+    return analysis.cleaned, analysis.has_placeholders, analysis.ingredient_overload
+
+
+def measure(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<44} {elapsed:7.2f} s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=10_000)
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts)
+    contents = [p['content']['rendered'] for p in posts]
+    print(f"Synthetic archive: {len(posts):,} posts")
+
+    legacy, t_legacy = measure("legacy (6 re.sub + 3 re.search + 2 count)",
+                               lambda: [legacy_analysis(c) for c in contents])
+    single, t_single = measure("post_analyzer.analyze_content",
+                               lambda: [single_pass_analysis(c) for c in contents])
+    assert single == legacy, "single-pass analysis differs from the legacy checks"
+    print(f"Identical results for {len(posts):,} posts, speedup {t_legacy / t_single:.1f}x")
+
+    # End-to-end issue report, including the compliance matcher pass
+    agent = MaintenanceAgent.__new__(MaintenanceAgent)
+    agent.matcher = get_compliance_matcher()
+    measure("MaintenanceAgent._analyze_post_issues", lambda: [agent._analyze_post_issues(p) for p in posts])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Memory benchmark for the streaming product loader.
+
+Writes a synthetic marketplace export (HTML descriptions, like
+product_data.csv) and compares peak traced memory of:
+  - load_products_from_csv (materializes every row)
+  - iter_products_from_csv + top_products (streaming, top-k)
+
+Usage: python benchmarks/bench_product_loader.py [--rows 1000000]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_loader import ProductLoader
+
+DESCRIPTION = (
+    "<p>เซรั่มบำรุงผิว <b>Hya 11 Molecul</b> ช่วยให้ผิวชุ่มชื้น</p>"
+    "<ul><li>ไฮยาลูรอน 11 โมเลกุล</li><li>เนื้อบางเบา ซึมไว</li></ul>"
+    "<p>วิธีใช้: ทาเช้าและเย็นหลังล้างหน้า</p>" * 4
+)
+
+
+def write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['product_id', 'category', 'brand', 'product_name', 'product_description'])
+        for i in range(rows):
+            writer.writerow([i, 'Skin', 'D PLUS', f"D PLUS SKIN - Serum {i}", DESCRIPTION])
+
+
+def measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<42} peak {peak / 1e6:8.1f} MB  {elapsed:7.1f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-list", action="store_true", help="Skip the materializing loader")
+    args = parser.parse_args()
+
+    loader = ProductLoader()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "products.csv")
+        write_csv(path, args.rows)
+        print(f"Synthetic CSV: {args.rows:,} rows, {os.path.getsize(path) / 1e6:.0f} MB")
+
+        if not args.skip_list:
+            measure("load_products_from_csv (list)", lambda: len(loader.load_products_from_csv(path)))
+        measure("iter_products_from_csv (count)", lambda: sum(1 for _ in loader.iter_products_from_csv(path)))
+        measure("iter_products_from_csv (name only)",
+                lambda: sum(1 for _ in loader.iter_products_from_csv(path, fields=('name',))))
+        top = measure("top_products (k=10, HTML cleaned)",
+                      lambda: loader.top_products(lambda p: len(p['name']), k=10, csv_path=path))
+        print(f"Top product: {top[0]['name']}")
+
+
+if __name__ == "__main__":
+    main()
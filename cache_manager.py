@@ -1,6 +1,7 @@
 import hashlib
 import json
 import os
+import threading
 import time
 
 class CacheManager:
@@ -10,6 +11,8 @@ class CacheManager:
     def __init__(self, cache_file="api_cache.json"):
         self.cache_file = cache_file
         self.cache = {}
+        # Shared by concurrent maintenance workers through call_vertex_with_retry
+        self.lock = threading.Lock()
         self._load_cache()
 
     def _load_cache(self):
@@ -38,8 +41,9 @@ class CacheManager:
 
     def set(self, prompt, model_name, response_text):
         key = self._generate_key(prompt, model_name)
-        self.cache[key] = {
-            "response": response_text,
-            "timestamp": time.time()
-        }
-        self._save_cache()
+        with self.lock:
+            self.cache[key] = {
+                "response": response_text,
+                "timestamp": time.time()
+            }
+            self._save_cache()
@@ -0,0 +1,296 @@
+"""
+Compiled multi-pattern compliance matcher.
+
+Builds an Aho-Corasick automaton over the `forbidden_words` and
+`allowed_words` in compliance_rules.json (plus the built-in hard-sell
+phrases) so an article can be checked against every rule in one linear pass
+instead of one substring scan per term. Text is normalized with
+`text_utils.normalize_text`, so matching is Thai-aware (PUA glyphs, SARA AM,
+case, whitespace) and works on HTML with positions reported in the source.
+
+The compiled automaton is pickled next to the rules and rebuilt only when
+the rules file (or the built-in pattern groups) change.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from text_utils import normalize_text
+
+# Sales-pressure phrases that break the soft-sell guideline. Matched exactly
+# (after normalization) alongside the FDA rule lists.
+HARD_SELL_PATTERNS = [
+    'shopee.co.th',
+    'shopee',
+    'ซื้อ',
+    'สั่ง',
+    'โปรโมชั่น',
+    'ลดราคา',
+    'พิเศษ',
+    'limited',
+    'order now',
+    'buy now',
+]
+
+DEFAULT_RULES_PATH = "compliance_rules.json"
+
+# Bump when the automaton layout or normalization changes.
+_CACHE_VERSION = 2
+
+
+class ComplianceMatch(NamedTuple):
+    """A single rule hit. `start`/`end` are offsets into the scanned source."""
+    start: int
+    end: int
+    term: str
+    rule: str
+    text: str
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and (ch.isalnum() or ch == '_')
+
+
+class ComplianceMatcher:
+    """
+    Aho-Corasick automaton over named groups of terms.
+
+    Groups map a rule name ('forbidden', 'allowed', 'hard_sell', ...) to the
+    terms that belong to it. Terms that start or end with an ASCII letter or
+    digit must sit on a word boundary ("germ" does not hit "germany"); Thai
+    terms match anywhere, since Thai is written without spaces.
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self.terms: List[str] = []
+        self.rules: List[str] = []
+        self.keys: List[str] = []  # normalized form of each term
+        self._lengths: List[int] = []
+        self._bounded: List[int] = []  # bit 1: left boundary, bit 2: right boundary
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[tuple] = [()]
+
+        pending_out: List[List[int]] = [[]]
+        for rule, terms in groups.items():
+            for term in terms:
+                key = normalize_text(term, strip_html=False).text
+                if not key:
+                    continue
+                index = len(self.terms)
+                self.terms.append(term)
+                self.rules.append(rule)
+                self.keys.append(key)
+                self._lengths.append(len(key))
+                self._bounded.append(
+                    (1 if _is_word_char(key[0]) else 0) | (2 if _is_word_char(key[-1]) else 0)
+                )
+                state = 0
+                for ch in key:
+                    nxt = self._goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto[state][ch] = nxt
+                        self._goto.append({})
+                        self._fail.append(0)
+                        pending_out.append([])
+                    state = nxt
+                pending_out[state].append(index)
+
+        # Breadth-first pass to wire failure links and merge outputs.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                pending_out[nxt].extend(pending_out[self._fail[nxt]])
+        self._out = [tuple(o) for o in pending_out]
+
+    def __len__(self):
+        return len(self.terms)
+
+    def scan(self, text: str, rules: Optional[Iterable[str]] = None,
+             strip_html: bool = True) -> List[ComplianceMatch]:
+        """
+        Returns every rule hit in `text`, ordered by position.
+
+        Args:
+            text: Article HTML or plain text.
+            rules: Optional subset of rule names to report.
+            strip_html: Treat `text` as HTML (tags removed, link targets kept).
+        """
+        if not text:
+            return []
+        wanted = set(rules) if rules is not None else None
+        norm = normalize_text(text, strip_html=strip_html)
+        return self._scan_normalized(text, norm, wanted)
+
+    def _scan_normalized(self, text: str, norm, wanted) -> List[ComplianceMatch]:
+        haystack = norm.text
+        n = len(haystack)
+
+        goto, fail, out = self._goto, self._fail, self._out
+        lengths, bounded, rule_names = self._lengths, self._bounded, self.rules
+        hits = []
+        state = 0
+        for i, ch in enumerate(haystack):
+            while True:
+                nxt = goto[state].get(ch)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            if not out[state]:
+                continue
+            for index in out[state]:
+                if wanted is not None and rule_names[index] not in wanted:
+                    continue
+                start = i - lengths[index] + 1
+                flags = bounded[index]
+                if flags & 1 and start > 0 and _is_word_char(haystack[start - 1]):
+                    continue
+                if flags & 2 and i + 1 < n and _is_word_char(haystack[i + 1]):
+                    continue
+                hits.append((start, i + 1, index))
+
+        matches = []
+        for start, end, index in sorted(hits):
+            src_start, src_end = norm.source_span(start, end)
+            matches.append(ComplianceMatch(
+                src_start, src_end, self.terms[index], rule_names[index], text[src_start:src_end]
+            ))
+        return matches
+
+    def relevant_terms(self, text: str, rules: Iterable[str], threshold: float = 0.6,
+                       ngram: int = 4, strip_html: bool = True) -> Dict[str, List[str]]:
+        """
+        Terms of `rules` that occur in `text` exactly or approximately.
+
+        Exact hits come first, in order of appearance. A term is a near-match
+        when at least `threshold` of its character n-grams occur somewhere in
+        the text, which catches reworded or re-spaced Thai phrases; terms
+        shorter than `ngram` characters only count on exact hits.
+        """
+        wanted = set(rules)
+        result: Dict[str, List[str]] = {rule: [] for rule in wanted}
+        if not text:
+            return result
+        norm = normalize_text(text, strip_html=strip_html)
+        for rule, terms in summarize_matches(self._scan_normalized(text, norm, wanted)).items():
+            result[rule].extend(terms)
+
+        haystack = norm.text
+        grams = {haystack[i:i + ngram] for i in range(len(haystack) - ngram + 1)}
+        for index, key in enumerate(self.keys):
+            rule = self.rules[index]
+            if rule not in wanted or len(key) < ngram or self.terms[index] in result[rule]:
+                continue
+            total = len(key) - ngram + 1
+            found = sum(1 for i in range(total) if key[i:i + ngram] in grams)
+            if found / total >= threshold:
+                result[rule].append(self.terms[index])
+        return result
+
+    def find_terms(self, text: str, rule: str, strip_html: bool = True) -> List[str]:
+        """Unique terms of one rule found in `text`, in order of first appearance."""
+        return summarize_matches(self.scan(text, rules=[rule], strip_html=strip_html)).get(rule, [])
+
+
+def summarize_matches(matches: Iterable[ComplianceMatch]) -> Dict[str, List[str]]:
+    """Groups matches into {rule: [unique terms in order of appearance]}."""
+    summary: Dict[str, List[str]] = {}
+    for m in matches:
+        terms = summary.setdefault(m.rule, [])
+        if m.term not in terms:
+            terms.append(m.term)
+    return summary
+
+
+def _builtin_groups() -> Dict[str, List[str]]:
+    return {'hard_sell': HARD_SELL_PATTERNS}
+
+
+def default_cache_path(rules_path: str) -> str:
+    """compliance_rules.json -> compliance_rules_matcher.pkl"""
+    return f"{os.path.splitext(rules_path)[0]}_matcher.pkl"
+
+
+def load_compliance_matcher(rules_path: str = DEFAULT_RULES_PATH,
+                            cache_path: Optional[str] = None) -> ComplianceMatcher:
+    """
+    Loads the compiled matcher from `cache_path` (derived from `rules_path`
+    by default), rebuilding it when the rules file or the built-in pattern
+    groups have changed since it was cached.
+    """
+    if cache_path is None:
+        cache_path = default_cache_path(rules_path)
+    rules = {}
+    raw = b''
+    if os.path.exists(rules_path):
+        with open(rules_path, 'rb') as f:
+            raw = f.read()
+        try:
+            rules = json.loads(raw.decode('utf-8'))
+        except Exception as e:
+            print(f"ComplianceMatcher: Could not parse {rules_path}: {e}")
+            rules = {}
+
+    groups = {
+        'forbidden': rules.get('forbidden_words', []),
+        'allowed': rules.get('allowed_words', []),
+    }
+    groups.update(_builtin_groups())
+
+    digest = hashlib.sha256()
+    digest.update(str(_CACHE_VERSION).encode())
+    digest.update(raw)
+    digest.update(json.dumps(_builtin_groups(), ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    key = digest.hexdigest()
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('key') == key:
+                return cached['matcher']
+        except Exception as e:
+            print(f"ComplianceMatcher: Ignoring unreadable cache {cache_path}: {e}")
+
+    matcher = ComplianceMatcher(groups)
+    if cache_path:
+        try:
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'key': key, 'matcher': matcher}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"ComplianceMatcher: Could not save cache: {e}")
+    return matcher
+
+
+# Global matcher instances keyed by rules path
+_matchers: Dict[str, ComplianceMatcher] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_compliance_matcher(rules_path: str = DEFAULT_RULES_PATH) -> ComplianceMatcher:
+    """Get or create the shared matcher for `rules_path`."""
+    with _matchers_lock:
+        matcher = _matchers.get(rules_path)
+        if matcher is None:
+            matcher = load_compliance_matcher(rules_path)
+            _matchers[rules_path] = matcher
+        return matcher
@@ -0,0 +1,136 @@
+"""
+Local deterministic pre-review for generated articles.
+
+Runs the mechanical parts of the reviewer checklist (placeholders, hard-sell
+phrases, forbidden words, ingredient overload, section order) without an LLM
+call and reports them in the same JSON shape as `ReviewerAgent.review_article`.
+Errors mean the draft must be fixed; warnings mean it is mechanically clean
+but still needs the LLM's semantic judgement.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+from compliance_matcher import get_compliance_matcher, summarize_matches
+from post_analyzer import INGREDIENT_LIMIT, INGREDIENT_TERMS, LEFTOVER_PATTERNS
+
+# AI leftovers that must never be published; shared with the maintenance cleanup
+PLACEHOLDER_PATTERNS = LEFTOVER_PATTERNS
+_PLACEHOLDER_RE = re.compile('|'.join(f'(?:{p})' for p in PLACEHOLDER_PATTERNS), re.IGNORECASE)
+
+# Hard-sell phrases that are never acceptable, even once. The remaining
+# hard-sell indicators (shopee, ซื้อ, สั่ง, พิเศษ) are allowed once for the
+# single subtle CTA at the end of the article.
+AGGRESSIVE_CTA = {'order now', 'buy now', 'limited', 'ลดราคา', 'โปรโมชั่น'}
+
+INGREDIENT_MARKERS = INGREDIENT_TERMS
+MAX_INGREDIENT_MENTIONS = INGREDIENT_LIMIT
+
+# Expected order of the closing sections (Quick Review -> Intro -> Body ->
+# Conclusion -> Related Articles -> FAQ)
+SECTION_MARKERS = [
+    ('conclusion', ('สรุป', 'conclusion')),
+    ('related', ('บทความที่เกี่ยวข้อง', 'related articles')),
+    ('faq', ('faq', 'คำถามที่พบบ่อย', 'คำถามที่พบ')),
+]
+_HEADING_RE = re.compile(r'<h([1-4])[^>]*>(.*?)</h\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+class ContentLinter:
+    def __init__(self, matcher=None):
+        self.matcher = matcher or get_compliance_matcher()
+
+    def lint(self, article: Dict) -> Dict:
+        """
+        Checks an article locally and returns a reviewer-shaped result with
+        extra `lint_errors`, `lint_warnings` and `needs_semantic_review` keys.
+        """
+        title = article.get('title') or ''
+        content = article.get('content_html') or ''
+        errors: List[str] = []
+        warnings: List[str] = []
+        improvements: List[str] = []
+
+        if not title.strip() or not content.strip():
+            errors.append("Article is missing a title or content_html.")
+
+        # 1. Placeholders
+        placeholders = [m.group() for m in _PLACEHOLDER_RE.finditer(content)]
+        if placeholders:
+            errors.append(f"Placeholders found: {placeholders[:5]}")
+            improvements.append("Remove all bracketed placeholders.")
+
+        # 2 & 4. Hard sell and forbidden words (one pass over title + content)
+        hits = summarize_matches(self.matcher.scan(f"<h1>{title}</h1>{content}", rules=['hard_sell', 'forbidden']))
+        hard_sell = hits.get('hard_sell', [])
+        forbidden = hits.get('forbidden', [])
+        aggressive = [p for p in hard_sell if p in AGGRESSIVE_CTA]
+        is_hard_sell = bool(aggressive) or len(hard_sell) > 3
+        if is_hard_sell:
+            errors.append(f"Hard sell language detected: {aggressive or hard_sell}")
+            improvements.append("Keep the article educational with at most one subtle CTA at the end.")
+        elif len(hard_sell) > 1:
+            warnings.append(f"Several sales phrases present: {hard_sell}")
+        if forbidden:
+            errors.append(f"Forbidden words from compliance list: {forbidden}")
+            improvements.append("Rephrase claims using the allowed wording from the FDA manual.")
+
+        # 3. Ingredient overload
+        content_lower = content.lower()
+        counts = {m: content_lower.count(m) for m in INGREDIENT_MARKERS}
+        ingredient_overload = any(c > MAX_INGREDIENT_MENTIONS for c in counts.values())
+        if ingredient_overload:
+            errors.append(f"Ingredient overload: {counts}")
+            improvements.append("Focus on 2-3 key ingredients related to the main topic.")
+
+        # 5. Content flow
+        warnings.extend(self._check_structure(content))
+
+        result = {
+            "status": "needs_fix" if errors else "approved",
+            "compliance_warnings": errors + warnings,
+            "editor_feedback": " ".join(errors) if errors else "Local checks passed.",
+            "suggested_title": "",
+            "suggested_improvements": improvements,
+            "has_placeholders": bool(placeholders),
+            "is_hard_sell": is_hard_sell,
+            "ingredient_overload": ingredient_overload,
+            "lint_errors": errors,
+            "lint_warnings": warnings,
+            "needs_semantic_review": not errors and bool(warnings),
+            "review_source": "lint",
+        }
+        return result
+
+    def _check_structure(self, content: str) -> List[str]:
+        """Checks that the closing sections appear in the expected order."""
+        positions = {}
+        for index, match in enumerate(_HEADING_RE.finditer(content)):
+            heading = _TAG_RE.sub('', match.group(2)).strip().lower()
+            for name, markers in SECTION_MARKERS:
+                if name not in positions and any(m in heading for m in markers):
+                    positions[name] = index
+
+        warnings = []
+        if 'faq' not in positions:
+            warnings.append("No FAQ section heading found.")
+        present = [name for name, _ in SECTION_MARKERS if name in positions]
+        order = [positions[name] for name in present]
+        if order != sorted(order):
+            warnings.append(f"Sections out of order: expected {' -> '.join(present)}.")
+        return warnings
+
+    def auto_fix(self, article: Dict) -> Tuple[Dict, bool]:
+        """
+        Applies the mechanical fixes that are safe without an LLM (currently
+        placeholder removal). Returns (article, changed).
+        """
+        content = article.get('content_html') or ''
+        cleaned = _PLACEHOLDER_RE.sub('', content).strip()
+        if cleaned == content.strip():
+            return article, False
+        fixed = dict(article)
+        fixed['content_html'] = cleaned
+        fixed.pop('compliance_hits', None)
+        return fixed, True
@@ -3,31 +3,28 @@ import json
 from dotenv import load_dotenv
 from vertex_utils import create_vertex_model, get_model_name_from_env, call_vertex_with_retry
 from vertexai.generative_models import GenerationConfig
+from compliance_matcher import get_compliance_matcher, summarize_matches
+from agent_runtime import load_json_config
 
 class ContentGenerator:
-    def __init__(self):
+    def __init__(self, model=None, brand_guidelines=None, compliance_rules=None, matcher=None):
+        """Anything not injected (see agent_runtime) is created or loaded here."""
         load_dotenv()
         self.model_name = get_model_name_from_env("gemini-2.0-flash-exp")
 
-        # Validate Vertex AI configuration
-        project = os.getenv("GOOGLE_CLOUD_PROJECT")
-        if not project:
-            raise ValueError("GOOGLE_CLOUD_PROJECT not found in .env. "
-                           "Please set your Google Cloud Project ID.")
+        if model is None:
+            # Validate Vertex AI configuration
+            project = os.getenv("GOOGLE_CLOUD_PROJECT")
+            if not project:
+                raise ValueError("GOOGLE_CLOUD_PROJECT not found in .env. "
+                               "Please set your Google Cloud Project ID.")
+            model = create_vertex_model(self.model_name)
+        self.model = model
 
-        self.model = create_vertex_model(self.model_name)
-
-        # Load brand guidelines
-        self.brand_guidelines = {}
-        if os.path.exists("brand_guidelines.json"):
-            with open("brand_guidelines.json", "r", encoding="utf-8") as f:
-                self.brand_guidelines = json.load(f)
-
-        # Load compliance rules
-        self.compliance_rules = {}
-        if os.path.exists("compliance_rules.json"):
-            with open("compliance_rules.json", "r", encoding="utf-8") as f:
-                self.compliance_rules = json.load(f)
+        # Brand guidelines and compliance rules
+        self.brand_guidelines = brand_guidelines if brand_guidelines is not None else load_json_config("brand_guidelines.json")
+        self.compliance_rules = compliance_rules if compliance_rules is not None else load_json_config("compliance_rules.json")
+        self.matcher = matcher or get_compliance_matcher()
 
     def update_model(self, model_name):
         """Updates the underlying Vertex AI model."""
@@ -184,7 +181,7 @@ class ContentGenerator:
 
         Remember: You are writing as a TRUSTED EDUCATIONAL SOURCE.
         """
-        return self._call_gemini(prompt)
+        return self._annotate_compliance(self._call_gemini(prompt))
 
     def rewrite_competitor_content(self, competitor_data, product_name, product_description="", related_articles=None):
         """
@@ -250,7 +247,22 @@ class ContentGenerator:
         Output Format: Raw JSON (same keys as generate_article).
         Do not use markdown formatting.
         """
-        return self._call_gemini(prompt)
+        return self._annotate_compliance(self._call_gemini(prompt))
+
+    def _annotate_compliance(self, article):
+        """
+        Scans the generated HTML once against the compiled compliance matcher and
+        stores the hits on the article, so the reviewer can reuse them.
+        """
+        if not isinstance(article, dict):
+            return article
+        hits = summarize_matches(
+            self.matcher.scan(article.get('content_html') or '', rules=['forbidden', 'hard_sell'])
+        )
+        article['compliance_hits'] = hits
+        if hits.get('forbidden'):
+            print(f"Generator: Forbidden words detected: {hits['forbidden']}")
+        return article
 
     def _call_gemini(self, prompt):
         """Call Vertex AI with the prompt."""
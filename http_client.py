@@ -0,0 +1,89 @@
+"""
+Shared, pooled HTTP sessions for the WordPress REST API.
+
+`WordPressPublisher` and `YoastSEOIntegrator` talk to the same site with the
+same credentials; `get_session` hands both one `requests.Session` per
+(site, user) so connections are kept alive and reused. Sessions apply a
+default timeout, pre-computed Basic auth, and retry with exponential backoff
+on 429/5xx. POST is only retried on 429 (the server rejected the request
+before processing it) so a slow create/update is never sent twice.
+"""
+
+import base64
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (10, 60)  # (connect, read) seconds
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _WordPressRetry(Retry):
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method and method.upper() == 'POST':
+            return status_code == 429 and bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class PooledSession(requests.Session):
+    """A Session that applies a default timeout to every request."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+
+def basic_auth_header(user: str, password: str) -> str:
+    token = base64.b64encode(f"{user}:{password}".encode('utf-8')).decode('ascii')
+    return f"Basic {token}"
+
+
+def create_session(user: Optional[str] = None, password: Optional[str] = None,
+                   retries: int = 3, backoff_factor: float = 1.0, pool_size: int = 10,
+                   timeout=DEFAULT_TIMEOUT) -> PooledSession:
+    """Creates a pooled session with retries, default timeout and cached auth."""
+    session = PooledSession(timeout=timeout)
+    retry = _WordPressRetry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if user:
+        session.headers['Authorization'] = basic_auth_header(user, password or '')
+    return session
+
+
+_sessions: Dict[Tuple[str, str], PooledSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(base_url: str, user: Optional[str] = None, password: Optional[str] = None) -> PooledSession:
+    """Returns the shared session for a site and user, creating it on first use."""
+    parts = urlsplit(base_url)
+    key = (f"{parts.scheme}://{parts.netloc}".lower(), user or '')
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = create_session(user, password)
+        return session
+
+
+def close_sessions():
+    """Closes all shared sessions (e.g. at the end of a run or in tests)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
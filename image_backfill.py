@@ -0,0 +1,177 @@
+"""
+Concurrent featured-image backfill for posts without one.
+
+Three stages connected by bounded queues, so generation latency overlaps
+upload I/O while memory and in-flight work stay capped:
+
+  scanner  -> posts with featured_media == 0 (honours the limit)
+  generate -> Imagen calls, paced by the Imagen rate limiter, and admitted
+              only while the maintenance time budget allows another image
+  upload   -> media uploads; the uploaded media id is queued on a BatchWriter
+
+Images are handed from stage to stage as bytes, so nothing touches the disk.
+
+The calling thread attaches the uploaded images, flushing the BatchWriter
+every full batch (25 posts) and once more at the end. A full queue blocks
+the stage feeding it, so the scanner never runs far ahead of Imagen.
+"""
+
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Iterable, Optional
+
+_DONE = object()
+
+
+def image_prompt(title: str) -> str:
+    return f"Professional skincare product photography for {title}, high end, clean background, 4k"
+
+
+class ImageBackfill:
+    def __init__(self, image_gen, publisher, writer, limiter=None, timings=None, scheduler=None,
+                 gen_workers: Optional[int] = None, upload_workers: Optional[int] = None,
+                 queue_size: Optional[int] = None):
+        """
+        `writer` is a BatchWriter for the featured_media writes, `limiter` the
+        Imagen rate limiter (acquire() -> bool), `timings` a LatencyStats and
+        `scheduler` an optional MaintenanceScheduler for the time budget.
+        """
+        self.image_gen = image_gen
+        self.publisher = publisher
+        self.writer = writer
+        self.limiter = limiter
+        self.timings = timings
+        self.scheduler = scheduler
+        self.gen_workers = max(1, gen_workers or int(os.getenv("BACKFILL_IMAGE_WORKERS", "2")))
+        self.upload_workers = max(1, upload_workers or int(os.getenv("BACKFILL_UPLOAD_WORKERS", "2")))
+        size = queue_size or int(os.getenv("BACKFILL_QUEUE_SIZE", "0")) or 2 * self.gen_workers
+        self.scan_queue = queue.Queue(maxsize=size)
+        self.upload_queue = queue.Queue(maxsize=size)
+        self.done_queue = queue.Queue()
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.fixed = 0
+
+    def _timer(self, op):
+        return self.timings.timer(op) if self.timings is not None else nullcontext()
+
+    def _scan(self, posts: Iterable[Dict], limit: Optional[int]):
+        scanned = 0
+        try:
+            for post in posts:
+                if self.stop.is_set():
+                    break
+                if post.get('featured_media', 0) != 0:
+                    continue  # Already has an image
+                if limit and scanned >= limit:
+                    print(f"Limit of {limit} images reached. Stopping scan.")
+                    break
+                scanned += 1
+                self.scan_queue.put(post)
+        finally:
+            for _ in range(self.gen_workers):
+                self.scan_queue.put(_DONE)
+
+    def _generate(self):
+        while True:
+            post = self.scan_queue.get()
+            if post is _DONE:
+                break
+            if self.stop.is_set():
+                continue  # Drain so the scanner is never blocked on a full queue
+            post_id = post.get('id')
+            title = post.get('title', {}).get('rendered', '')
+            if self.scheduler and not self.scheduler.admit(None, True):
+                print("Time budget reached. Stopping image generation.")
+                self.stop.set()
+                continue
+            if self.limiter is not None and not self.limiter.acquire():
+                print("Imagen quota exhausted. Stopping image generation.")
+                self.stop.set()
+                continue
+            with self.lock:
+                self.processed += 1
+            print(f"  [FIX] Post {post_id} ('{title[:40]}...') is missing an image.")
+            try:
+                with self._timer('image'):
+                    data = self.image_gen.generate_image_bytes(image_prompt(title))
+            except Exception as e:
+                print(f"  [ERROR] Image generation failed for Post {post_id}: {e}")
+                continue
+            if data:
+                self.upload_queue.put((post_id, title, data))
+            else:
+                print(f"  [ERROR] No image generated for Post {post_id}")
+
+    def _upload(self):
+        while True:
+            item = self.upload_queue.get()
+            if item is _DONE:
+                break
+            post_id, title, data = item
+            media_id = None
+            try:
+                with self._timer('upload'):
+                    media_id = self.publisher.upload_media_bytes(data, title=title,
+                                                                 filename=f"post-{post_id}.png")
+            except Exception as e:
+                print(f"  [ERROR] Image upload failed for Post {post_id}: {e}")
+            if media_id:
+                self.writer.queue(post_id, {"featured_media": media_id})
+                self.done_queue.put(post_id)
+            else:
+                print(f"  [FAIL] Could not upload image for Post {post_id}")
+
+    def _flush(self):
+        started = time.monotonic()
+        results = self.writer.flush()
+        if results and self.timings is not None:
+            self.timings.observe('write', (time.monotonic() - started) / len(results))
+        for post_id, ok in results.items():
+            if ok:
+                print(f"  [OK] Featured image set for Post {post_id}")
+                self.fixed += 1
+            else:
+                print(f"  [FAIL] Could not set featured image for Post {post_id}")
+
+    def _close_uploads(self):
+        for _ in range(self.upload_workers):
+            self.upload_queue.put(_DONE)
+
+    def _stage(self, target, count, on_exit):
+        """`count` threads running `target`; the last one to finish calls `on_exit`."""
+        remaining = [count]
+
+        def worker():
+            try:
+                target()
+            finally:
+                with self.lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    on_exit()
+        return [threading.Thread(target=worker, daemon=True) for _ in range(count)]
+
+    def run(self, posts: Iterable[Dict], limit: Optional[int] = None) -> Dict[str, int]:
+        """Backfills images for `posts`; returns {'processed', 'fixed'}."""
+        threads = [threading.Thread(target=self._scan, args=(posts, limit), daemon=True)]
+        threads += self._stage(self._generate, self.gen_workers, self._close_uploads)
+        threads += self._stage(self._upload, self.upload_workers, lambda: self.done_queue.put(_DONE))
+        print(f"Backfill: {self.gen_workers} image worker(s), {self.upload_workers} upload worker(s), "
+              f"queues of {self.scan_queue.maxsize}")
+        for thread in threads:
+            thread.start()
+
+        # Attach stage: flush every full batch while the pipeline keeps running
+        while self.done_queue.get() is not _DONE:
+            if len(self.writer) >= self.writer.chunk_size:
+                self._flush()
+        for thread in threads:
+            thread.join()
+        self._flush()
+        return {'processed': self.processed, 'fixed': self.fixed}
@@ -1,5 +1,6 @@
 import os
 import json
+import tempfile
 from datetime import datetime
 from dotenv import load_dotenv
 import vertexai
@@ -20,9 +21,10 @@ class ImageGenerator:
         self.model = ImageGenerationModel.from_pretrained(self.model_name)
         print(f"ImageGenerator initialized with {self.model_name}")
 
-    def generate_image(self, prompt, output_filename="generated_post_image.png"):
+    def generate_image_bytes(self, prompt):
         """
-        Generates an image based on the prompt and saves it locally.
+        Generates an image based on the prompt and returns its bytes (PNG),
+        or None. Each call uses its own temp file, so concurrent calls are safe.
         """
         print(f"Generating image with prompt: {prompt}")
         try:
@@ -37,10 +39,9 @@ class ImageGenerator:
             )
 
             if images:
-                image_path = os.path.join(os.getcwd(), output_filename)
-                images[0].save(location=image_path, include_generation_parameters=False)
-                print(f"Image saved to {image_path}")
-                return image_path
+                data = self._image_bytes(images[0])
+                print(f"Image generated ({len(data) // 1024} KB)")
+                return data
             else:
                 print("No images were generated.")
                 return None
@@ -48,6 +49,40 @@ class ImageGenerator:
             print(f"Error during image generation: {e}")
             return None
 
+    @staticmethod
+    def _image_bytes(image):
+        """Bytes of a generated image, through the SDK's public API only."""
+        data = getattr(image, 'image_bytes', None)
+        if isinstance(data, bytes):
+            return data
+        # vertexai's GeneratedImage only exposes save(); use a private temp file
+        fd, tmp_path = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        try:
+            image.save(location=tmp_path, include_generation_parameters=False)
+            with open(tmp_path, 'rb') as f:
+                return f.read()
+        finally:
+            os.remove(tmp_path)
+
+    def generate_image(self, prompt, output_filename=None):
+        """
+        Generates an image based on the prompt and saves it locally. Without
+        `output_filename` it goes to a unique temp file (the caller removes it).
+        """
+        data = self.generate_image_bytes(prompt)
+        if not data:
+            return None
+        if output_filename:
+            image_path = os.path.join(os.getcwd(), output_filename)
+        else:
+            fd, image_path = tempfile.mkstemp(prefix="generated_post_image_", suffix=".png")
+            os.close(fd)
+        with open(image_path, 'wb') as f:
+            f.write(data)
+        print(f"Image saved to {image_path}")
+        return image_path
+
     def create_prompt_from_article(self, article_title, article_topic):
         """
         Creates a high-quality Imagen prompt based on the article's title and topic.
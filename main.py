@@ -14,9 +14,67 @@ if sys.platform == "win32":
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
 from product_loader import ProductLoader
-from generator import ContentGenerator
-from publisher import WordPressPublisher
-from image_generator import ImageGenerator
+from product_scheduler import ProductScheduler
+from agent_runtime import get_runtime
+
+# Listing calls only need these keys (no rendered content)
+RELATED_POST_FIELDS = ('id', 'title', 'link', 'excerpt')
+
+def list_own_posts(publisher, count=50):
+    """Recent posts for gap analysis and internal links, read from the local post mirror when it is attached."""
+    mirror = getattr(publisher, 'mirror', None)
+    if mirror is not None:
+        try:
+            mirror.sync()
+            posts = mirror.get_posts(limit=count, include_content=False)
+            if posts:
+                return posts
+        except Exception as e:
+            print(f"Post mirror unavailable ({e}), fetching from WordPress.")
+    return publisher.get_posts(per_page=count, fields=RELATED_POST_FIELDS)
+
+
+def select_related_articles(own_posts, query, count=3):
+    """
+    Picks the published posts most related to `query` from the post
+    VectorIndex (only new or edited posts are re-embedded), falling back to a
+    random sample when nothing is similar.
+    """
+    if not own_posts:
+        return []
+    try:
+        from vector_index import VectorIndex
+        from text_utils import html_to_text
+        index = VectorIndex("posts")
+        index.update({
+            f"post:{p['id']}": (
+                f"{html_to_text(p['title']['rendered'])}\n{html_to_text((p.get('excerpt') or {}).get('rendered', ''))}",
+                {"title": p['title']['rendered'], "url": p['link']}
+            )
+            for p in own_posts
+        })
+        related = index.search(query, k=count)
+        if related:
+            return [item['meta'] for item, _ in related]
+    except Exception as e:
+        print(f"Related article search failed: {e}")
+    sampled_posts = random.sample(own_posts, min(count, len(own_posts)))
+    return [{"title": p['title']['rendered'], "url": p['link']} for p in sampled_posts]
+
+def schedule_product(loader, history, products, query_terms=None, source='csv'):
+    """
+    Picks the next product in fair rotation from post history, preferring the
+    trend-matched products whose turn it is. Returns (product, trend_matched),
+    or (None, False) when there is no product to schedule.
+    """
+    scheduler = ProductScheduler(history, [p['key'] for p in products],
+                                 weights={p['key']: p.get('weight') for p in products})
+    ranked = loader.match_products(query_terms, k=5, source=source) if query_terms else []
+    key = scheduler.next_product([p['key'] for p, _ in ranked])
+    product = next((p for p in products if p['key'] == key), None)
+    if product is None:
+        return None, False
+    return product, any(p['key'] == key for p, _ in ranked)
 
 def main():
     parser = argparse.ArgumentParser(description="Auto-Blogging for Thai Cosmetic Products")
@@ -33,25 +91,24 @@ def main():
     print(f"Starting Auto-Blogging v2.2.0 in {args.mode} mode...")
     
     from maintenance_agent import MaintenanceAgent
-    from researcher_agent import ResearcherAgent
-    from reviewer_agent import ReviewerAgent
     
     loader = ProductLoader()
     try:
-        generator = ContentGenerator()
-        researcher = ResearcherAgent()
-        reviewer = ReviewerAgent()
-        maintenance = MaintenanceAgent()
+        catalog = loader.load_catalog()
+        
+        # One set of agents, models and configs for the whole run, shared with maintenance
+        runtime = get_runtime()
+        generator = runtime.generator
+        researcher = runtime.researcher
+        reviewer = runtime.reviewer
+        maintenance = MaintenanceAgent(runtime)
         
-        wp_url = os.getenv("WP_URL")
-        wp_user = os.getenv("WP_USER")
-        wp_pwd = os.getenv("WP_APP_PASSWORD")
-        publisher = WordPressPublisher(wp_url, wp_user, wp_pwd)
+        publisher = runtime.publisher
         
         image_gen_enabled = os.getenv("IMAGE_GENERATION_ENABLED", "false").lower() == "true"
         image_gen = None
         if image_gen_enabled:
-            image_gen = ImageGenerator()
+            image_gen = runtime.image_gen
     except Exception as e:
         print(f"Setup Error: {e}")
         return
@@ -106,16 +163,9 @@ def main():
 
     if args.mode == "weekly":
         # 1. Fetch own topics from WP for gap analysis and internal linking
-        own_posts = publisher.get_posts(per_page=50)
+        own_posts = list_own_posts(publisher, 50)
         own_titles = [p['title']['rendered'] for p in own_posts] if own_posts else []
         
-        # Prepare related articles for internal linking
-        related_articles = []
-        if own_posts:
-            # Pick 3-5 random recent posts for linking
-            sampled_posts = random.sample(own_posts, min(5, len(own_posts)))
-            related_articles = [{"title": p['title']['rendered'], "url": p['link']} for p in sampled_posts]
-        
         # 2. Fetch competitor RSS
         rss_urls = [
             "https://www.pantip.com/forum/topic", # More reliable Thai source
@@ -132,23 +182,19 @@ def main():
             print(f"Identified Content Gap: {best_gap['proposed_title']}")
             
             # --- PRODUCT SELECTION FOR WEEKLY ---
-            products_from_csv = loader.load_products_from_csv("product_data.csv")
+            products_from_csv = catalog.csv_products()
             target_product_data = None
             if products_from_csv:
-                best_product = None
-                best_score = -1
-                for p in products_from_csv:
-                    # Match score against gap keywords/topics
-                    score = sum(1 for kw in best_gap.get('keywords', []) if kw.lower() in (p['name'] + p['content']).lower())
-                    if score > best_score:
-                        best_score = score
-                        best_product = p
-                target_product_data = best_product if best_score > 0 else random.choice(products_from_csv)
+                # Rank against the gap's titles (the gap JSON carries no keywords)
+                gap_query = [best_gap.get('proposed_title', ''), best_gap.get('competitor_topic', '')] + best_gap.get('keywords', [])
+                target_product_data, _ = schedule_product(loader, history, products_from_csv, gap_query)
             
             product_name = target_product_data['name'] if target_product_data else "Unknown Skincare"
             product_content = target_product_data['content'] if target_product_data else ""
             
             print(f"Linking Weekly Deep Research to Product: {product_name}")
+            # Internal links: the published posts closest to the gap topic
+            related_articles = select_related_articles(own_posts, f"{best_gap['proposed_title']} {product_name}", count=5)
             article = execute_with_fallback(generator, "rewrite_competitor_content", best_gap, product_name, product_description=product_content, related_articles=related_articles)
         else:
             print("Gap analysis failed. Falling back to hot topic.")
@@ -162,42 +208,22 @@ def main():
         print("Step 2: Researching Hot Topics in Thailand...")
         hot_topic_data = execute_with_fallback(researcher, "research_hot_topics")
         
-        # Prepare related articles for internal linking
-        print("Fetching related articles for internal links...")
-        own_posts = publisher.get_posts(per_page=10)
-        related_articles = []
-        if own_posts:
-            sampled_posts = random.sample(own_posts, min(3, len(own_posts)))
-            related_articles = [{"title": p['title']['rendered'], "url": p['link']} for p in sampled_posts]
-        
         # --- PRODUCT SELECTION LOGIC (CSV Priority) ---
-        products_from_csv = loader.load_products_from_csv("product_data.csv")
+        products_from_csv = catalog.csv_products()
         
         if products_from_csv and not args.product_file:
             print(f"Loaded {len(products_from_csv)} products from CSV.")
-            # Random selection or Smart Match from CSV
+            # Fair rotation from post history, preferring trend matches
+            query_terms = None
             if hot_topic_data and hot_topic_data.get('hot_topics'):
                 top_topic = hot_topic_data['hot_topics'][0]
                 print(f"Top Hot Topic: {top_topic['headline_th']}")
-                # Simple keyword matching
-                best_product = None
-                best_score = -1
-                for p in products_from_csv:
-                    score = sum(1 for kw in top_topic.get('keywords', []) if kw.lower() in p['name'].lower())
-                    if score > best_score:
-                        best_score = score
-                        best_product = p
-                
-                if best_score > 0:
-                     target_product_data = best_product
-                     print(f"matched product to trend: {target_product_data['name']}")
-                else:
-                     # Random rotation
-                     target_product_data = random.choice(products_from_csv)
-                     print(f"No direct match, rotating random product: {target_product_data['name']}")
+                query_terms = top_topic.get('keywords', []) + [top_topic['headline_th']]
+            target_product_data, matched = schedule_product(loader, history, products_from_csv, query_terms)
+            if matched:
+                print(f"matched product to trend: {target_product_data['name']}")
             else:
-                 target_product_data = random.choice(products_from_csv)
-                 print(f"Randomly selected product: {target_product_data['name']}")
+                print(f"No direct match, rotating to least used product: {target_product_data['name']}")
             
             product_name = target_product_data['name']
             product_content = target_product_data['content']
@@ -218,42 +244,38 @@ def main():
                     print(f"Product file '{args.product_file}' not found.")
                     return
             else:
-                # Smart Selection based on Hot Topic if available
+                # Fair rotation over the product files, preferring trend matches
+                query_terms = None
                 if hot_topic_data and hot_topic_data.get('hot_topics'):
                     top_topic = hot_topic_data['hot_topics'][0]
                     print(f"Top Hot Topic: {top_topic['headline_th']}")
-                    # Simple keyword matching for selection
-                    best_file = None
-                    best_score = -1
-                    for f in files:
-                        fname = os.path.basename(f).lower()
-                        score = sum(1 for kw in top_topic.get('keywords', []) if kw.lower() in fname)
-                        if score > best_score:
-                            best_score = score
-                            best_file = f
-                    
-                    # If we found a good match, use it.
-                    # If match score is 0, we might want to just rotate to keep variety
-                    # but STILL use the hot topic for the "Connection" in the article
-                    if best_score > 0:
-                         target_file = best_file
-                         print(f"matched product to trend: {target_file}")
-                    else:
-                         # Fallback to Smart Randomization (least recently used)
-                         sorted_files = sorted(files, key=lambda x: history.get(os.path.basename(x), "2000-01-01"))
-                         target_file = sorted_files[0]
-                         print(f"No direct match, rotating to: {target_file} (Will connect to trend)")
-    
+                    query_terms = top_topic.get('keywords', []) + [top_topic['headline_th']]
+                # The hot topic is still used for the "Connection" in the article
+                product_file, matched = schedule_product(loader, history, catalog.file_products(), query_terms, source='file')
+                if product_file is None:
+                    # The catalog holds no readable file products; take the first file as-is
+                    target_file = files[0]
+                    print(f"No catalog entry for the product files, using: {target_file}")
                 else:
-                    # Fallback to Smart Randomization (least recently used)
-                    sorted_files = sorted(files, key=lambda x: history.get(os.path.basename(x), "2000-01-01"))
-                    target_file = sorted_files[0]
+                    target_file = product_file['source']
+                    if matched:
+                        print(f"matched product to trend: {target_file}")
+                    else:
+                        print(f"No direct match, rotating to: {target_file} (Will connect to trend)")
 
             if target_file:
                 print(f"Selected Product File: {os.path.basename(target_file)}")
                 product_content = loader.read_product(target_file)
                 product_name = loader.extract_product_name(product_content)
 
+        # Prepare related articles for internal linking
+        print("Fetching related articles for internal links...")
+        own_posts = list_own_posts(publisher, 50)
+        related_query = product_name or ""
+        if hot_topic_data and hot_topic_data.get('hot_topics'):
+            related_query = f"{hot_topic_data['hot_topics'][0]['headline_th']} {related_query}"
+        related_articles = select_related_articles(own_posts, related_query, count=3)
+
         # 3. Research & Data
         print(f"Step 3: Deep Researching {product_name}...")
         research_results = execute_with_fallback(researcher, "research_product_topics", product_name, product_content)
@@ -274,6 +296,8 @@ def main():
     # 5. Review & Schema Check
     print("Step 5: Reviewing content for compliance and structured data...")
     review_results = execute_with_fallback(reviewer, "review_article", article)
+    if review_results and review_results.get('fixed_article'):
+        article = review_results['fixed_article']
     
     if review_results and review_results.get('status') != 'approved':
         print(f"Review Feedback: {review_results.get('editor_feedback')}")
@@ -298,28 +322,22 @@ def main():
             img_topic = f"{product_name} related to {hot_topic_keywords[0] if hot_topic_keywords else 'skincare trend'}"
         
         img_prompt = image_gen.create_prompt_from_article(article.get('title'), img_topic)
-        local_img_path = image_gen.generate_image(img_prompt)
+        img_data = image_gen.generate_image_bytes(img_prompt)
         
-        if local_img_path:
-            featured_media_id = publisher.upload_media(local_img_path, title=article.get('title'))
-            # Cleanup local image
+        if img_data:
             try:
-                os.remove(local_img_path)
-            except:
-                pass
+                featured_media_id = publisher.upload_media_bytes(img_data, title=article.get('title'),
+                                                                 filename="featured-image.png")
+            except Exception as e:
+                print(f"Error uploading media: {e}")
 
     # 6. Publish
-    wp_url = os.getenv("WP_URL")
-    wp_user = os.getenv("WP_USER")
-    wp_pwd = os.getenv("WP_APP_PASSWORD")
-    
     if args.dry_run:
         print("Dry Run: Saving to dry_run_output_v2.json")
         with open("dry_run_output_v2.json", "w", encoding="utf-8") as f:
             json.dump(article, f, ensure_ascii=False, indent=4)
     else:
         print("Step 5: Publishing to WordPress...")
-        publisher = WordPressPublisher(wp_url, wp_user, wp_pwd)
         
         # Enhanced Metadata for WP
         seo_data = {
@@ -357,7 +375,7 @@ def main():
             history["__last_post_date__"] = datetime.now().strftime("%Y-%m-%d")
             # Log usage for non-file products too (using name as key)
             key = os.path.basename(target_file) if target_file else f"CSV:{product_name}"
-            history[key] = datetime.now().isoformat()
+            ProductScheduler(history, [key]).record_post(key)
             
             with open(history_file, 'w', encoding='utf-8') as f:
                 json.dump(history, f, indent=4)
@@ -367,10 +385,19 @@ def main():
     # Maintenance
     if not args.skip_maintenance:
         print("\nStep 6: Maintenance - Reviewing and optimizing old posts...")
-        # Run optimization mode first (fix placeholders, hard sell, ingredient overload)
-        maintenance.optimize_old_posts(dry_run=args.dry_run, limit=3)
-        # Then run SEO optimization
-        maintenance.seo_optimize_posts(dry_run=args.dry_run, limit=2)
+        budget = float(os.getenv("MAINTENANCE_TIME_BUDGET", "0"))
+        if budget:
+            # Time-boxed: fix mode gets 60% of the budget, SEO whatever is left
+            started = time.monotonic()
+            maintenance.optimize_old_posts(dry_run=args.dry_run, limit=None, time_budget=budget * 0.6)
+            remaining = budget - (time.monotonic() - started)
+            if remaining > 0:
+                maintenance.seo_optimize_posts(dry_run=args.dry_run, limit=None, time_budget=remaining)
+        else:
+            # Run optimization mode first (fix placeholders, hard sell, ingredient overload)
+            maintenance.optimize_old_posts(dry_run=args.dry_run, limit=3)
+            # Then run SEO optimization
+            maintenance.seo_optimize_posts(dry_run=args.dry_run, limit=2)
 
 if __name__ == "__main__":
     main()
@@ -1,15 +1,23 @@
-import re
 import os
 import sys
 import json
-import requests
 import time
+import requests
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from dotenv import load_dotenv
-from publisher import WordPressPublisher
-from vertex_utils import create_vertex_model, get_model_name_from_env, call_vertex_with_retry, get_rate_limiter
-from image_generator import ImageGenerator
-from yoast_integrator import YoastSEOIntegrator
+from vertex_utils import get_model_name_from_env, call_vertex_with_retry, get_rate_limiter, get_image_rate_limiter
+from compliance_matcher import summarize_matches, HARD_SELL_PATTERNS
+from agent_runtime import get_runtime
+from async_wp_client import HTTPX_AVAILABLE, fetch_all_posts_sync, update_posts_sync
+from wp_batch import BatchWriter
+from image_backfill import ImageBackfill
+from maintenance_ledger import MaintenanceLedger, content_fingerprint, post_fingerprint
+from maintenance_planner import MaintenancePlanner
+from maintenance_scheduler import LatencyStats, MaintenanceScheduler
+from post_analyzer import analyze_content, strip_ai_leftovers
+from seo_rewriter import SEORewriter
 
 # Fix Windows console encoding for Thai characters
 if sys.platform == "win32":
@@ -19,8 +27,13 @@ if sys.platform == "win32":
 
 
 class MaintenanceAgent:
-    def __init__(self):
+    def __init__(self, runtime=None):
+        """
+        `runtime` is the shared AgentRuntime (default: the process-wide one);
+        the publisher, post mirror, models, configs and agents come from it.
+        """
         load_dotenv()
+        self.runtime = runtime or get_runtime()
         self.model_name = get_model_name_from_env("gemini-2.0-flash-exp")
 
         # Validate Vertex AI configuration
@@ -36,31 +49,36 @@ class MaintenanceAgent:
         if not wp_url or not wp_user or not wp_pwd:
              raise ValueError("WP Credentials missing in .env")
 
-        self.publisher = WordPressPublisher(wp_url, wp_user, wp_pwd)
-        self.model = create_vertex_model(self.model_name)
-        self.image_gen = ImageGenerator()
-        self.yoast = YoastSEOIntegrator(wp_url, wp_user, wp_pwd)
-
-        # Load compliance rules
-        self.compliance_rules = {}
-        if os.path.exists("compliance_rules.json"):
-            with open("compliance_rules.json", "r", encoding="utf-8") as f:
-                self.compliance_rules = json.load(f)
+        self.wp_credentials = (wp_url, wp_user, wp_pwd)
+        self.publisher = self.runtime.publisher
+        self.mirror = self.runtime.mirror
+        self.model = self.runtime.model(self.model_name)
+        self.yoast = self.runtime.yoast
+
+        # Compliance rules
+        self.compliance_rules = self.runtime.compliance_rules
+        self.matcher = self.runtime.matcher
+        self.max_workers = int(os.getenv("MAINTENANCE_WORKERS", "4"))
+        self.ledger = MaintenanceLedger()
+        self.timings = LatencyStats()
+
+    @property
+    def image_gen(self):
+        """Imagen generator, loaded on first use (most runs never generate an image)."""
+        if getattr(self, '_image_gen', None) is None:
+            self._image_gen = self._runtime().image_gen
+        return self._image_gen
+
+    @image_gen.setter
+    def image_gen(self, image_gen):
+        self._image_gen = image_gen
+
+    def _runtime(self):
+        return getattr(self, 'runtime', None) or get_runtime()
 
     def _cleanup_ai_leftovers(self, content):
-        """Removes common AI tags like [image: ...], [link: ...], etc. using regex."""
-        patterns = [
-            r'\[image:.*?\]',
-            r'\[link:.*?\]',
-            r'\[internal link:.*?\]',
-            r'\[IMAGE_PLACEHOLDER.*?\]',
-            r'\[INSERT_INTERNAL_LINK.*?\]',
-            r'\[\(.*?ภาพ.*?\).*?\]', # Catch Thai placeholders like [(ภาพ...)]
-        ]
-        cleaned_content = content
-        for pattern in patterns:
-            cleaned_content = re.sub(pattern, '', cleaned_content, flags=re.IGNORECASE)
-        return cleaned_content.strip()
+        """Removes common AI tags like [image: ...], [link: ...], etc. in one compiled pass."""
+        return strip_ai_leftovers(content)
 
     def _analyze_post_issues(self, post):
         """Analyze a post for common issues that need fixing."""
@@ -75,42 +93,36 @@ class MaintenanceAgent:
             'has_placeholders': False,
             'placeholder_details': [],
             'hard_sell_indicators': [],
+            'forbidden_words': [],
             'ingredient_overload': False,
             'missing_image': featured_media == 0,
             'needs_cleanup': False,
+            'has_leftovers': False,
+            'cleaned_content': None,
             'needs_optimization': False,
             'priority': 'low'
         }
 
-        # Check for placeholders using regex patterns
-        ai_leftover_patterns = [r'\[image:.*?\]', r'\[link:.*?\]', r'\[IMAGE_PLACEHOLDER']
-        for pattern in ai_leftover_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                issues['has_placeholders'] = True
-                issues['needs_cleanup'] = True
-                issues['priority'] = 'medium'
-
-        # Check for hard sell indicators
-        hard_sell_patterns = [
-            'shopee.co.th',
-            'shopee',
-            'ซื้อ',
-            'สั่ง',
-            'โปรโมชั่น',
-            'ลดราคา',
-            'พิเศษ',
-            'limited',
-            'order now',
-            'buy now',
-        ]
-
-        for pattern in hard_sell_patterns:
-            if pattern.lower() in content.lower():
-                issues['hard_sell_indicators'].append(pattern)
+        # Placeholders and ingredient mentions in one compiled pass over the HTML
+        analysis = analyze_content(content)
+        if analysis.leftovers:
+            # Kept for the planning stage so the post is not scanned twice;
+            # only set when tags were removed, to keep queued issues small
+            issues['has_leftovers'] = True
+            issues['cleaned_content'] = analysis.cleaned
+        if analysis.has_placeholders:
+            issues['has_placeholders'] = True
+            issues['needs_cleanup'] = True
+            issues['priority'] = 'medium'
+
+        # Hard sell indicators and FDA forbidden words in one pass over the post
+        hits = summarize_matches(self.matcher.scan(content, rules=['hard_sell', 'forbidden']))
+        found_hard_sell = set(hits.get('hard_sell', []))
+        issues['hard_sell_indicators'] = [p for p in HARD_SELL_PATTERNS if p in found_hard_sell]
+        issues['forbidden_words'] = hits.get('forbidden', [])
 
         # Check for ingredient overload (too many ingredients mentioned)
-        if content.lower().count('วิตามิน') > 5 or content.lower().count('สารสกัด') > 5:
-            issues['ingredient_overload'] = True
+        issues['ingredient_overload'] = analysis.ingredient_overload
 
         # Determine priority and if post needs optimization
         if issues['has_placeholders'] or issues['missing_image']:
@@ -122,7 +134,7 @@ class MaintenanceAgent:
         elif len(issues['hard_sell_indicators']) > 1:
             issues['priority'] = 'medium'
             issues['needs_optimization'] = True
-        elif issues['ingredient_overload']:
+        elif issues['ingredient_overload'] or issues['forbidden_words']:
             issues['priority'] = 'medium'
             issues['needs_optimization'] = True
 
@@ -130,9 +142,6 @@ class MaintenanceAgent:
 
     def _regenerate_post_content(self, post, hot_topic_keywords=None):
         """Regenerate post content with new soft-sell approach."""
-        from generator import ContentGenerator
-        from reviewer_agent import ReviewerAgent
-
         title = post.get('title', {}).get('rendered', '')
         content = post.get('content', {}).get('rendered', '')
         post_id = post.get('id')
@@ -143,13 +152,13 @@ class MaintenanceAgent:
         product_name = title.split('!')[0].split('?')[0].strip()
         product_description = f'Existing post about {product_name}'
 
-        # Initialize agents
-        generator = ContentGenerator()
-        reviewer = ReviewerAgent()
+        # Agents are built once per process and shared by the workers
+        runtime = self._runtime()
+        generator = runtime.generator
+        reviewer = runtime.reviewer
 
         # Get research data
-        from researcher_agent import ResearcherAgent
-        researcher = ResearcherAgent()
+        researcher = runtime.researcher
         research_results = researcher.research_product_topics(product_name, product_description)
 
         # Generate new article
@@ -166,6 +175,8 @@ class MaintenanceAgent:
 
         # Review the new article
         review_results = reviewer.review_article(article)
+        if review_results and review_results.get('fixed_article'):
+            article = review_results['fixed_article']
 
         if review_results and review_results.get('status') != 'approved':
             # Try once more with feedback
@@ -178,8 +189,47 @@ class MaintenanceAgent:
 
         return article
 
-    def _update_post(self, post_id, new_article):
-        """Update a post with new content."""
+    def _fetch_all_posts(self, per_page=100, fields=None):
+        """
+        Fetches every post (only `fields` when given). Served from the local
+        post mirror after an incremental sync when available; otherwise with
+        httpx the pages after the first are fetched concurrently, or pages are
+        walked one at a time.
+        """
+        if self.mirror is not None:
+            try:
+                self.mirror.sync()
+                posts = self.mirror.get_posts(include_content=not fields or 'content' in fields)
+                if posts:
+                    return posts
+            except Exception as e:
+                print(f"Maintenance: Post mirror sync failed ({e}), fetching from WordPress.")
+        if HTTPX_AVAILABLE:
+            params = {'_fields': ','.join(fields)} if fields else None
+            try:
+                return fetch_all_posts_sync(*self.wp_credentials, per_page=per_page, params=params)
+            except Exception as e:
+                print(f"Maintenance: Concurrent fetch failed ({e}), fetching page by page.")
+        return list(self.publisher.iter_posts(per_page=per_page, fields=fields))
+
+    def _update_posts_concurrently(self, updates):
+        """Applies {post_id: data} updates, concurrently when httpx is available."""
+        if not updates:
+            return {}
+        if HTTPX_AVAILABLE:
+            try:
+                results = update_posts_sync(*self.wp_credentials, updates)
+                if self.mirror is not None:
+                    for pid, ok in results.items():
+                        if ok:
+                            self.mirror.apply_update(pid, updates[pid])
+                return results
+            except Exception as e:
+                print(f"Maintenance: Concurrent update failed ({e}), updating one by one.")
+        return {pid: self.publisher.update_post(pid, data) for pid, data in updates.items()}
+
+    def _article_update_data(self, new_article):
+        """Builds the update payload (title, content, Yoast keyphrase/description) for a regenerated article."""
         update_data = {
             "title": new_article.get('title'),
             "content": new_article.get('content_html', ''),
@@ -193,9 +243,9 @@ class MaintenanceAgent:
         if new_article.get('faq_schema_html'):
             update_data['content'] += f"\n\n{new_article['faq_schema_html']}"
 
-        return self.publisher.update_post(post_id, update_data)
+        return update_data
 
-    def audit_and_fix_posts(self, dry_run=False, limit=None, mode='seo'):
+    def audit_and_fix_posts(self, dry_run=False, limit=None, mode='seo', workers=None, time_budget=None):
         """
         Fetches and checks/updates posts.
 
@@ -203,6 +253,9 @@ class MaintenanceAgent:
             dry_run: If True, don't actually update posts
             limit: Maximum number of posts to process (None for all)
             mode: 'seo' for SEO optimization, 'fix' for placeholder/hard sell fixing, 'both' for both
+            workers: Posts processed concurrently (default MAINTENANCE_WORKERS, 4)
+            time_budget: Wall-clock seconds for the run (default MAINTENANCE_TIME_BUDGET);
+                work is planned from measured latencies and the remaining quota to fit it
         """
         # Smart Skip: Check quota before starting
         rate_limiter = get_rate_limiter()
@@ -213,10 +266,12 @@ class MaintenanceAgent:
             print(f"Maintenance: Skipping to save quota (Usage: {usage}/{limit_val}).")
             return
 
+        workers = max(1, workers or self.max_workers)
+        scheduler = self._make_scheduler(time_budget, workers, quota=int(limit_val * 0.95) - usage)
+
         mode_str = mode.upper()
         print(f"Maintenance: Starting audit (mode={mode_str}, limit={limit}, dry_run={dry_run})...")
 
-        page = 1
         processed_count = 0
         fixed_count = 0
         skipped_count = 0
@@ -224,229 +279,412 @@ class MaintenanceAgent:
         # Hot topic keywords for content generation
         hot_topic_keywords = ['คอลลาเจน', 'ผิวใส', 'ไร้สิว', 'วิตามินซี', 'แอสตาแซนทิน']
 
-        while True:
-            print(f"Maintenance: Fetching page {page}...")
-            posts = self.publisher.get_posts(per_page=10, page=page)
-
-            if not posts:
-                print("Maintenance: No more posts found. Audit complete.")
+        print("Maintenance: Fetching posts...")
+        posts = self._fetch_all_posts()
+        if not posts:
+            print("Maintenance: No posts found. Audit complete.")
+        ledger = self.ledger
+        # Continue after the post the previous run stopped at
+        posts = ledger.resume_order(posts or [], mode)
+
+        # Posts unchanged since their last successful audit in this mode are skipped
+        candidates = [post for post in posts if not ledger.is_current(post, mode)]
+        unchanged_count = len(posts) - len(candidates)
+
+        # Cheap local stage (analysis + cleanup), worst posts first, so `limit`
+        # spends the run on the most severe issues; the slow stages then run in
+        # the worker pool.
+        planner = MaintenancePlanner(self._analyze_post_issues, seo_score=self._local_seo_score)
+        jobs = []
+        last_examined = None
+        for severity, post, issues in planner.ranked(candidates):
+            if limit and processed_count >= limit:
+                print(f"Maintenance: Limit of {limit} reached. Stopping.")
+                break
+            job = self._plan_post(post, mode, dry_run, issues)
+            if scheduler and (job['counts'] or job['image']) and not scheduler.reserve(job['fix_type'], job['image']):
+                print("Maintenance: Time or quota budget reached. Stopping.")
                 break
+            last_examined = post.get('id')
+            if job['counts']:
+                processed_count += 1
+                print(f"  [PLAN] Post {post.get('id')} severity {severity:.0f} (priority: {issues['priority']})")
+            else:
+                skipped_count += 1
+                if not dry_run and not job['image']:
+                    ledger.record(post.get('id'), post_fingerprint(post), mode, 'clean')
+            if job['counts'] or job['image']:
+                jobs.append(job)
+        if unchanged_count:
+            print(f"Maintenance: {unchanged_count} unchanged post(s) skipped (already audited).")
+        skipped_count += unchanged_count
+        if scheduler:
+            print(f"Maintenance: Scheduler {scheduler.summary()}")
+
+        # All writes for a post (content, featured image, Yoast meta) are coalesced
+        # and sent in batches; fix_messages holds the report for each counted fix.
+        writer = BatchWriter(self.publisher, fallback=self._update_posts_concurrently)
+        fix_messages = {}
+        # A worker queues its write before its future completes, so a flush can
+        # send it before the job is collected; each post is settled once both its
+        # job and its write result are in
+        queued_jobs = {}
+        write_results = {}
+        skipped_writes_before = self.publisher.skipped_writes
+
+        def record_audit(job, result):
+            post = job['post']
+            update = job.get('update') or {}
+            if 'title' in update or 'content' in update:
+                # Fingerprint what was written so the post is not re-audited tomorrow
+                fingerprint = content_fingerprint(update.get('title', post.get('title', {}).get('rendered', '')),
+                                                  update.get('content', post.get('content', {}).get('rendered', '')))
+            else:
+                fingerprint = post_fingerprint(post)
+            ledger.record(post.get('id'), fingerprint, mode, result, *job.get('scores', ()))
+
+        def settle(pid):
+            nonlocal fixed_count
+            if pid not in queued_jobs or pid not in write_results:
+                return
+            job, ok = queued_jobs.pop(pid), write_results.pop(pid)
+            record_audit(job, 'fixed' if ok else 'failed')
+            message = fix_messages.pop(pid, None)
+            if message is None:
+                return
+            if pid in writer.skipped:
+                print(f"  [SKIP] Post {pid} already up to date, no write sent")
+            elif ok:
+                print(f"  [OK] {message}")
+                fixed_count += 1
+            else:
+                print(f"  [FAIL] Post {pid} update failed")
+
+        def flush_writes():
+            started = time.monotonic()
+            results = writer.flush()
+            if results:
+                self.timings.observe('write', (time.monotonic() - started) / len(results))
+            for pid, ok in results.items():
+                write_results[pid] = ok
+                settle(pid)
+
+        # Pacing comes from the shared Vertex rate limiter inside the LLM calls;
+        # jobs are handed out as workers free up, while they still fit the deadline
+        print(f"Maintenance: Processing {len(jobs)} post(s) with {workers} worker(s)...")
+        waiting = deque(jobs)
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            def fill():
+                nonlocal processed_count
+                while waiting and len(running) < workers:
+                    job = waiting.popleft()
+                    if scheduler and not scheduler.admit(job['fix_type'], job['image']):
+                        print(f"  [DEFER] Post {job['post'].get('id')} would not finish before the deadline")
+                        processed_count -= job['counts']
+                        continue
+                    running[pool.submit(self._process_post, job, writer, fix_messages, dry_run,
+                                        hot_topic_keywords)] = job
+
+            fill()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    try:
+                        fixed_count += future.result()
+                    except Exception as e:
+                        print(f"  [ERROR] Maintenance Error on Post {job['post'].get('id')}: {e}")
+                        job['result'] = 'failed'
+                    if not dry_run and job['counts']:
+                        if job.get('result') == 'queued':
+                            queued_jobs[job['post'].get('id')] = job
+                            settle(job['post'].get('id'))
+                        else:
+                            record_audit(job, job.get('result', 'failed'))
+                if len(writer) >= writer.chunk_size:
+                    flush_writes()
+                fill()
+
+        flush_writes()
+        if not dry_run:
+            ledger.set_cursor(mode, last_examined)
+            ledger.save()
+            self.timings.save()
+        return self._print_summary(processed_count, fixed_count, skipped_count,
+                                   skipped_writes=self.publisher.skipped_writes - skipped_writes_before)
+
+    def _make_scheduler(self, time_budget, workers, quota=None):
+        """Scheduler for a time-boxed run, or None when no budget is given or configured."""
+        if time_budget is None and os.getenv("MAINTENANCE_TIME_BUDGET"):
+            time_budget = float(os.getenv("MAINTENANCE_TIME_BUDGET"))
+        if not time_budget:
+            return None
+        return MaintenanceScheduler(self.timings, time_budget, workers, quota=quota)
+
+    def _call_model(self, prompt):
+        """Sends `prompt` to the maintenance model; returns the response text or None."""
+        response = call_vertex_with_retry(self.model, prompt)
+        return response.text if response else None
+
+    @property
+    def seo_rewriter(self):
+        """Section-chunked SEO rewriter for long posts (created on first use)."""
+        if getattr(self, '_seo_rewriter', None) is None:
+            self._seo_rewriter = SEORewriter(self._call_model, self.yoast, self.matcher)
+        return self._seo_rewriter
+
+    def _local_seo_score(self, post):
+        """Yoast-style SEO score of a post as it stands (used for planning)."""
+        meta = post.get('meta') if isinstance(post.get('meta'), dict) else {}
+        return self.yoast.calculate_seo_score(
+            post.get('content', {}).get('rendered', ''),
+            meta.get('_yoast_wpseo_focuskw', ''),
+            post.get('title', {}).get('rendered', ''),
+            meta.get('_yoast_wpseo_metadesc', '')
+        )
 
-            for post in posts:
-                if limit and processed_count >= limit:
-                    print(f"Maintenance: Limit of {limit} reached. Stopping.")
-                    return self._print_summary(processed_count, fixed_count, skipped_count)
+    def _plan_post(self, post, mode, dry_run, issues=None):
+        """
+        Analyze and cleanup stage (local, no API calls). Returns the job for
+        the worker stages: cleaned content, the fix to apply and whether the
+        post needs an image; `counts` marks posts that count toward the limit.
+        """
+        post_id = post.get('id')
+        content = post.get('content', {}).get('rendered', '')
 
-                post_id = post.get('id')
-                title = post.get('title', {}).get('rendered', '')
-                content = post.get('content', {}).get('rendered', '')
-
-                # Analyze post for issues
-                issues = self._analyze_post_issues(post)
-                
-                # --- NEW: CLEANUP & IMAGE FIX ---
-                current_content = content
-                cleaned_content = self._cleanup_ai_leftovers(current_content)
-                content_updated = False
-                
-                if cleaned_content != current_content:
-                    print(f"  [FIX] Cleaned AI leftovers from Post {post_id}")
-                    current_content = cleaned_content
-                    content_updated = True
-                
-                if issues['missing_image'] and not dry_run:
-                    print(f"  [FIX] Generating missing image for Post {post_id}")
+        # Analyze post for issues
+        issues = issues or self._analyze_post_issues(post)
+
+        # Reuse the cleanup from the analysis pass instead of scanning again
+        if issues.get('cleaned_content') is not None:
+            current_content = issues['cleaned_content']
+        else:
+            current_content = content.strip()
+        content_updated = current_content != content
+        if issues.get('has_leftovers'):
+            print(f"  [FIX] Cleaned AI leftovers from Post {post_id}")
+
+        # Determine what needs to be done based on mode
+        fix_type = None
+        if mode in ['fix', 'both'] and issues['needs_optimization']:
+            fix_type = 'regenerate'
+            print(f"  [TODO] Post {post_id} needs regeneration (Priority: {issues['priority']})")
+        if mode in ['seo', 'both'] and not fix_type:
+            fix_type = 'seo'
+        if not fix_type and content_updated and not dry_run:
+            # Just needed cleanup (and maybe an image), no regeneration/seo
+            fix_type = 'cleanup'
+
+        return {
+            'post': post,
+            'content': current_content,
+            'fix_type': fix_type,
+            'image': issues['missing_image'] and not dry_run,
+            'counts': fix_type is not None,
+        }
+
+    def _process_post(self, job, writer, fix_messages, dry_run, hot_topic_keywords):
+        """
+        Worker stages for one post: image → LLM fix → queued write. Writes go
+        to the shared BatchWriter and the outcome is left in job['result']
+        ('queued', 'clean' or 'failed'); returns the number of dry-run fixes.
+        """
+        post = job['post']
+        post_id = post.get('id')
+        title = post.get('title', {}).get('rendered', '')
+        current_content = job['content']
+        fix_type = job['fix_type']
+        dry_run_fixes = 0
+        job['result'] = 'failed'
+
+        if job['image']:
+            print(f"  [FIX] Generating missing image for Post {post_id}")
+            try:
+                # Extract a simple prompt from the title
+                img_prompt = f"Professional skincare product photography for {title}, high end, clean background, 4k"
+                # Bytes stay in memory, so concurrent workers never share a file
+                with self.timings.timer('image'):
+                    img_data = self.image_gen.generate_image_bytes(img_prompt)
+                if img_data:
+                    with self.timings.timer('upload'):
+                        media_id = self.publisher.upload_media_bytes(img_data, title=title,
+                                                                     filename=f"post-{post_id}.png")
+                    if media_id:
+                        writer.queue(post_id, {"featured_media": media_id})
+                        print(f"  [OK] Featured image queued for Post {post_id}")
+            except Exception as e:
+                print(f"  [ERROR] Image generation failed for Post {post_id}: {e}")
+
+        if fix_type == 'cleanup':
+            writer.queue(post_id, {"content": current_content})
+            job.update(result='queued', update={"content": current_content})
+            fix_messages[post_id] = f"Cleaned content updated for Post {post_id}"
+            return dry_run_fixes
+
+        started = time.monotonic()
+        try:
+            if fix_type == 'regenerate':
+                # Regenerate content with soft-sell approach
+                new_article = self._regenerate_post_content(post, hot_topic_keywords)
+
+                if new_article:
+                    if not dry_run:
+                        update_data = self._article_update_data(new_article)
+                        # Yoast scores ride along in the same write
+                        try:
+                            seo_score = self.yoast.calculate_seo_score(
+                                new_article.get('content_html', ''),
+                                new_article.get('seo_keyphrase', ''),
+                                new_article.get('title', ''),
+                                new_article.get('seo_meta_description', '')
+                            )
+                            read_score = self.yoast.calculate_readability_score(new_article.get('content_html', ''))
+                            job['scores'] = (seo_score, read_score)
+                            update_data['meta'].update(self.yoast.build_meta_payload({
+                                'focus_keyword': new_article.get('seo_keyphrase'),
+                                'seo_title': new_article.get('title'),
+                                'meta_description': new_article.get('seo_meta_description'),
+                                'seo_score': seo_score,
+                                'readability_score': read_score
+                            }))
+                            fix_messages[post_id] = f"Post {post_id} fixed and SEO scores updated"
+                        except Exception as seo_e:
+                            print(f"  [WARN] SEO update failed for Post {post_id}: {seo_e}")
+                            fix_messages[post_id] = f"Post {post_id} content fixed (SEO update skipped)"
+                        writer.queue(post_id, update_data)
+                        job.update(result='queued', update=update_data)
+                    else:
+                        print(f"  [OK] Post {post_id} would be fixed (dry run)")
+                        dry_run_fixes += 1
+                else:
+                    print(f"  [FAIL] Post {post_id} regeneration failed")
+
+            elif fix_type == 'seo' and self.seo_rewriter.should_chunk(current_content):
+                # Long or sectioned posts: rewrite flagged H2 sections, keep the rest verbatim
+                res = self.seo_rewriter.rewrite(post, current_content)
+                if res:
+                    print(f"  [SEO] Post {post_id}: {res['sections_rewritten']}/{res['sections_total']} sections rewritten")
+                    dry_run_fixes += self._apply_seo_result(job, res, writer, fix_messages, dry_run)
+                else:
+                    print(f"  [FAIL] Post {post_id} section rewrite failed")
+
+            elif fix_type == 'seo':
+                # Enhanced Audit Logic
+                prompt = f"""
+                You are a senior SEO editor. Audit and Optimize this post for 2026.
+                TITLE: {title}
+                CONTENT: {current_content}
+
+                Return optimized JSON with these exact fields:
+                {{
+                    "needs_update": true/false,
+                    "corrected_title": "optimized title",
+                    "corrected_content_html": "optimized content",
+                    "seo_keyphrase": "main keyword",
+                    "seo_meta_description": "meta description 150-160 chars"
+                }}
+                Do not use markdown formatting.
+                """
+                response = call_vertex_with_retry(self.model, prompt)
+                if response:
                     try:
-                        # Extract a simple prompt from the title
-                        img_prompt = f"Professional skincare product photography for {title}, high end, clean background, 4k"
-                        img_path = self.image_gen.generate_image(img_prompt)
-                        if img_path:
-                            media_id = self.publisher.upload_media(img_path, title=title)
-                            if media_id:
-                                self.publisher.update_post(post_id, {"featured_media": media_id})
-                                print(f"  [OK] Featured image set for Post {post_id}")
-                    except Exception as e:
-                        print(f"  [ERROR] Image generation failed for Post {post_id}: {e}")
-
-                # Determine what needs to be done based on mode
-                needs_fix = False
-                fix_type = None
-
-                if mode in ['fix', 'both']:
-                    if issues['needs_optimization']:
-                        needs_fix = True
-                        fix_type = 'regenerate'
-                        print(f"  [TODO] Post {post_id} needs regeneration (Priority: {issues['priority']})")
-                
-                if mode in ['seo', 'both'] and not needs_fix:
-                    needs_fix = True
-                    fix_type = 'seo'
-
-                # If we just needed cleanup or image fix and not full regeneration/seo
-                if not needs_fix and content_updated and not dry_run:
-                     update_success = self.publisher.update_post(post_id, {"content": current_content})
-                     if update_success:
-                         print(f"  [OK] Cleaned content updated for Post {post_id}")
-                         fixed_count += 1
-                     else:
-                         print(f"  [FAIL] Could not update content for Post {post_id}")
-                     processed_count += 1
-                     continue
-
-                if not needs_fix:
-                    skipped_count += 1
-                    continue
-
-                try:
-                    if fix_type == 'regenerate':
-                        # Regenerate content with soft-sell approach
-                        new_article = self._regenerate_post_content(post, hot_topic_keywords)
-
-                        if new_article:
-                            if not dry_run:
-                                success = self._update_post(post_id, new_article)
-                                if success:
-                                    # Post-fix SEO update
+                        # Clean and parse JSON with better error handling
+                        content = response.text
+                        # Remove markdown code blocks if present
+                        content = content.replace("```json", "").replace("```", "")
+                        # Remove any leading/trailing whitespace
+                        content = content.strip()
+
+                        res = json.loads(content)
+
+                        dry_run_fixes += self._apply_seo_result(job, res, writer, fix_messages, dry_run)
+                    except json.JSONDecodeError as je:
+                        print(f"  [ERROR] JSON parsing failed for Post {post_id}: {je}")
+                        print(f"  Content preview (first 200 chars): {content[:200]}...")
+                        # Try to extract partial JSON if response was truncated
+                        if '{' in content:
+                            # Find first { and try to find matching }
+                            start = content.find('{')
+                            # Try different strategies to find valid JSON
+                            for end in range(len(content) - 1, start, -1):
+                                if content[end] == '}':
                                     try:
-                                        seo_score = self.yoast.calculate_seo_score(
-                                            new_article.get('content_html', ''),
-                                            new_article.get('seo_keyphrase', ''),
-                                            new_article.get('title', ''),
-                                            new_article.get('seo_meta_description', '')
-                                        )
-                                        read_score = self.yoast.calculate_readability_score(new_article.get('content_html', ''))
-                                        self.yoast.update_yoast_meta_fields(post_id, {
-                                            'focus_keyword': new_article.get('seo_keyphrase'),
-                                            'seo_title': new_article.get('title'),
-                                            'meta_description': new_article.get('seo_meta_description'),
-                                            'seo_score': seo_score,
-                                            'readability_score': read_score
-                                        })
-                                        print(f"  [OK] Post {post_id} fixed and SEO scores updated")
-                                        fixed_count += 1
-                                    except Exception as seo_e:
-                                        print(f"  [WARN] SEO update failed for Post {post_id}: {seo_e}")
-                                        print(f"  [OK] Post {post_id} content fixed (SEO update skipped)")
-                                        fixed_count += 1
-                                else:
-                                    print(f"  [FAIL] Post {post_id} update failed")
-                            else:
-                                print(f"  [OK] Post {post_id} would be fixed (dry run)")
-                                fixed_count += 1
-                        else:
-                            print(f"  [FAIL] Post {post_id} regeneration failed")
-
-                    elif fix_type == 'seo':
-                        # Enhanced Audit Logic
-                        prompt = f"""
-                        You are a senior SEO editor. Audit and Optimize this post for 2026.
-                        TITLE: {title}
-                        CONTENT: {current_content[:5000]}
-
-                        Return optimized JSON with these exact fields:
-                        {{
-                            "needs_update": true/false,
-                            "corrected_title": "optimized title",
-                            "corrected_content_html": "optimized content",
-                            "seo_keyphrase": "main keyword",
-                            "seo_meta_description": "meta description 150-160 chars"
-                        }}
-                        Do not use markdown formatting.
-                        """
-                        response = call_vertex_with_retry(self.model, prompt)
-                        if response:
-                            try:
-                                # Clean and parse JSON with better error handling
-                                content = response.text
-                                # Remove markdown code blocks if present
-                                content = content.replace("```json", "").replace("```", "")
-                                # Remove any leading/trailing whitespace
-                                content = content.strip()
-
-                                res = json.loads(content)
-
-                                if res.get('needs_update'):
-                                    update_data = {
-                                        "title": res.get('corrected_title', title),
-                                        "content": self._cleanup_ai_leftovers(res.get('corrected_content_html', "")),
-                                        "meta": {
-                                            '_yoast_wpseo_focuskw': res.get('seo_keyphrase', ''),
-                                            '_yoast_wpseo_metadesc': res.get('seo_meta_description', '')
-                                        }
-                                    }
-
-                                    if not dry_run:
-                                        success = self.publisher.update_post(post_id, update_data)
-                                        if success:
-                                            # Update Yoast scores
-                                            seo_score = self.yoast.calculate_seo_score(
-                                                update_data['content'],
-                                                res.get('seo_keyphrase', ''),
-                                                update_data['title'],
-                                                res.get('seo_meta_description', '')
-                                            )
-                                            read_score = self.yoast.calculate_readability_score(update_data['content'])
-                                            self.yoast.update_yoast_meta_fields(post_id, {
-                                                'focus_keyword': res.get('seo_keyphrase'),
-                                                'seo_title': update_data['title'],
-                                                'meta_description': res.get('seo_meta_description'),
-                                                'seo_score': seo_score,
-                                                'readability_score': read_score
-                                            })
-                                            print(f"  [OK] Post {post_id} optimized and SEO scores updated")
-                                            fixed_count += 1
-                                    else:
-                                        print(f"  [OK] Post {post_id} would be optimized (dry run)")
-                                        fixed_count += 1
-                            except json.JSONDecodeError as je:
-                                print(f"  [ERROR] JSON parsing failed for Post {post_id}: {je}")
-                                print(f"  Content preview (first 200 chars): {content[:200]}...")
-                                # Try to extract partial JSON if response was truncated
-                                if '{' in content:
-                                    # Find first { and try to find matching }
-                                    start = content.find('{')
-                                    # Try different strategies to find valid JSON
-                                    for end in range(len(content) - 1, start, -1):
-                                        if content[end] == '}':
-                                            try:
-                                                partial_json = json.loads(content[start:end + 1])
-                                                print(f"  [RECOVER] Partial JSON recovered for Post {post_id}")
-                                                res = partial_json
-                                                # Continue with processing if we have needs_update
-                                                if res.get('needs_update'):
-                                                    # Same update logic as above
-                                                    update_data = {
-                                                        "title": res.get('corrected_title', title),
-                                                        "content": self._cleanup_ai_leftovers(res.get('corrected_content_html', "")),
-                                                        "meta": {
-                                                            '_yoast_wpseo_focuskw': res.get('seo_keyphrase', ''),
-                                                            '_yoast_wpseo_metadesc': res.get('seo_meta_description', '')
-                                                        }
-                                                    }
-                                                    if not dry_run:
-                                                        success = self.publisher.update_post(post_id, update_data)
-                                                        if success:
-                                                            print(f"  [OK] Post {post_id} optimized (from recovered JSON)")
-                                                            fixed_count += 1
-                                                    break
-                                            except:
-                                                continue
-                                # If we couldn't recover, skip this post
-                                print(f"  [SKIP] Could not recover JSON for Post {post_id}, skipping")
-                            except Exception as e:
-                                print(f"  [ERROR] Audit processing failed for Post {post_id}: {e}")
-
-                    processed_count += 1
-                    time.sleep(5) 
-
-                except Exception as e:
-                    print(f"  [ERROR] Maintenance Error on Post {post_id}: {e}")
-
-            page += 1
-
-        return self._print_summary(processed_count, fixed_count, skipped_count)
-
-    def _print_summary(self, processed, fixed, skipped):
+                                        partial_json = json.loads(content[start:end + 1])
+                                        print(f"  [RECOVER] Partial JSON recovered for Post {post_id}")
+                                        res = partial_json
+                                        # Continue with processing if we have needs_update
+                                        if res.get('needs_update'):
+                                            # Same update logic as above
+                                            update_data = {
+                                                "title": res.get('corrected_title', title),
+                                                "content": self._cleanup_ai_leftovers(res.get('corrected_content_html', "")),
+                                                "meta": {
+                                                    '_yoast_wpseo_focuskw': res.get('seo_keyphrase', ''),
+                                                    '_yoast_wpseo_metadesc': res.get('seo_meta_description', '')
+                                                }
+                                            }
+                                            if not dry_run:
+                                                writer.queue(post_id, update_data)
+                                                job.update(result='queued', update=update_data)
+                                                fix_messages[post_id] = f"Post {post_id} optimized (from recovered JSON)"
+                                            break
+                                    except:
+                                        continue
+                        # If we couldn't recover, skip this post
+                        print(f"  [SKIP] Could not recover JSON for Post {post_id}, skipping")
+                    except Exception as e:
+                        print(f"  [ERROR] Audit processing failed for Post {post_id}: {e}")
+
+        except Exception as e:
+            print(f"  [ERROR] Maintenance Error on Post {post_id}: {e}")
+        if fix_type:
+            self.timings.observe(fix_type, time.monotonic() - started)
+        return dry_run_fixes
+
+    def _apply_seo_result(self, job, res, writer, fix_messages, dry_run):
+        """Queues the write for an SEO audit result; returns 1 for a dry-run fix, else 0."""
+        post = job['post']
+        post_id = post.get('id')
+        if not res.get('needs_update'):
+            # The editor found nothing to change
+            job['result'] = 'clean'
+            return 0
+
+        update_data = {
+            "title": res.get('corrected_title', post.get('title', {}).get('rendered', '')),
+            "content": self._cleanup_ai_leftovers(res.get('corrected_content_html', "")),
+            "meta": {
+                '_yoast_wpseo_focuskw': res.get('seo_keyphrase', ''),
+                '_yoast_wpseo_metadesc': res.get('seo_meta_description', '')
+            }
+        }
+        if dry_run:
+            print(f"  [OK] Post {post_id} would be optimized (dry run)")
+            return 1
+
+        # Yoast scores ride along in the same write
+        seo_score = self.yoast.calculate_seo_score(
+            update_data['content'],
+            res.get('seo_keyphrase', ''),
+            update_data['title'],
+            res.get('seo_meta_description', '')
+        )
+        read_score = self.yoast.calculate_readability_score(update_data['content'])
+        job['scores'] = (seo_score, read_score)
+        update_data['meta'].update(self.yoast.build_meta_payload({
+            'focus_keyword': res.get('seo_keyphrase'),
+            'seo_title': update_data['title'],
+            'meta_description': res.get('seo_meta_description'),
+            'seo_score': seo_score,
+            'readability_score': read_score
+        }))
+        writer.queue(post_id, update_data)
+        job.update(result='queued', update=update_data)
+        fix_messages[post_id] = f"Post {post_id} optimized and SEO scores updated"
+        return 0
+
+    def _print_summary(self, processed, fixed, skipped, skipped_writes=0):
         """Print maintenance summary."""
         print(f"\n{'='*50}")
         print(f"Maintenance Summary")
@@ -454,89 +692,63 @@ class MaintenanceAgent:
         print(f"Processed: {processed}")
         print(f"Fixed: {fixed}")
         print(f"Skipped: {skipped}")
+        print(f"Unchanged writes skipped: {skipped_writes}")
         print(f"Timestamp: {datetime.now().isoformat()}")
-        return {'processed': processed, 'fixed': fixed, 'skipped': skipped}
+        return {'processed': processed, 'fixed': fixed, 'skipped': skipped, 'skipped_writes': skipped_writes}
 
-    def optimize_old_posts(self, dry_run=False, limit=5):
+    def optimize_old_posts(self, dry_run=False, limit=5, time_budget=None):
         """
         Optimizes old posts by fixing placeholders, hard sell, and ingredient overload.
         This is called automatically in the maintenance cycle.
         """
-        return self.audit_and_fix_posts(dry_run=dry_run, limit=limit, mode='fix')
+        return self.audit_and_fix_posts(dry_run=dry_run, limit=limit, mode='fix', time_budget=time_budget)
 
-    def seo_optimize_posts(self, dry_run=False, limit=5):
+    def seo_optimize_posts(self, dry_run=False, limit=5, time_budget=None):
         """
         SEO optimization for posts.
         """
-        return self.audit_and_fix_posts(dry_run=dry_run, limit=limit, mode='seo')
+        return self.audit_and_fix_posts(dry_run=dry_run, limit=limit, mode='seo', time_budget=time_budget)
 
-    def fix_missing_images(self, dry_run=False, limit=10):
+    def fix_missing_images(self, dry_run=False, limit=10, time_budget=None):
         """
         Dedicated maintenance function to fix posts with missing featured images.
         This is a faster, focused alternative to the full audit cycle.
-        Runs daily at 3 PM Thailand Time via GitHub Actions.
+        Runs daily at 3 PM Thailand Time via GitHub Actions; with a time budget
+        (default MAINTENANCE_TIME_BUDGET) images are made until the deadline.
+        Image generation and uploads run as a concurrent pipeline (see image_backfill).
         """
         print(f"Maintenance: Fixing missing images (limit={limit}, dry_run={dry_run})...")
-        
-        page = 1
-        fixed_count = 0
-        processed_count = 0
-        
-        while True:
-            posts = self.publisher.get_posts(per_page=20, page=page)
-            
-            if not posts:
-                print("No more posts to process.")
-                break
-            
-            for post in posts:
-                if limit and fixed_count >= limit:
-                    print(f"Limit of {limit} images fixed. Stopping.")
-                    break
-                
-                post_id = post.get('id')
+
+        # Only the keys needed to spot missing images (no rendered content)
+        posts = self._fetch_all_posts(fields=('id', 'title', 'featured_media'))
+        if not posts:
+            print("No more posts to process.")
+
+        if dry_run:
+            missing = [post for post in posts if post.get('featured_media', 0) == 0]
+            if limit:
+                missing = missing[:limit]
+            for post in missing:
                 title = post.get('title', {}).get('rendered', '')
-                featured_media = post.get('featured_media', 0)
-                
-                if featured_media != 0:
-                    continue  # Already has an image
-                
-                processed_count += 1
-                print(f"  [FIX] Post {post_id} ('{title[:40]}...') is missing an image.")
-                
-                if dry_run:
-                    print(f"  [DRY RUN] Would generate image for Post {post_id}")
-                    fixed_count += 1
-                    continue
-                
-                try:
-                    img_prompt = f"Professional skincare product photography for {title}, high end, clean background, 4k"
-                    img_path = self.image_gen.generate_image(img_prompt)
-                    if img_path:
-                        media_id = self.publisher.upload_media(img_path, title=title)
-                        if media_id:
-                            self.publisher.update_post(post_id, {"featured_media": media_id})
-                            print(f"  [OK] Featured image set for Post {post_id}")
-                            fixed_count += 1
-                            # Cleanup local image
-                            try:
-                                os.remove(img_path)
-                            except:
-                                pass
-                except Exception as e:
-                    print(f"  [ERROR] Image generation failed for Post {post_id}: {e}")
-            
-            if limit and fixed_count >= limit:
-                break
-            page += 1
-        
+                print(f"  [FIX] Post {post.get('id')} ('{title[:40]}...') is missing an image.")
+                print(f"  [DRY RUN] Would generate image for Post {post.get('id')}")
+            summary = {'processed': len(missing), 'fixed': len(missing)}
+        else:
+            backfill = ImageBackfill(
+                self.image_gen, self.publisher,
+                BatchWriter(self.publisher, fallback=self._update_posts_concurrently),
+                limiter=get_image_rate_limiter(), timings=self.timings,
+                scheduler=self._make_scheduler(time_budget, workers=1),
+            )
+            summary = backfill.run(posts, limit=limit)
+            self.timings.save()
+
         print(f"\n{'='*50}")
         print(f"Image Fix Summary")
         print(f"{'='*50}")
-        print(f"Posts Checked: {processed_count}")
-        print(f"Images Fixed: {fixed_count}")
-        return {'processed': processed_count, 'fixed': fixed_count}
-
+        print(f"Posts Checked: {summary['processed']}")
+        print(f"Images Fixed: {summary['fixed']}")
+        return summary
 
 if __name__ == "__main__":
     # Test requires real WP connection
@@ -0,0 +1,105 @@
+"""
+Persistent ledger of maintenance audits (maintenance_ledger.json).
+
+For every audited post it keeps a fingerprint of the title and text, and per
+mode the last audit time, result and Yoast scores. Posts whose fingerprint
+is unchanged since a successful audit in that mode are skipped, and a
+per-mode cursor lets the next run resume after the last post examined, so a
+small daily `limit` works through the whole archive instead of re-auditing
+the newest posts.
+
+Fingerprints are taken over the normalized text (tags, entities, case,
+whitespace and typographic punctuation folded away) so the rendered HTML
+WordPress returns matches the raw HTML the agent wrote.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from text_utils import html_to_text
+
+LEDGER_FILE = "maintenance_ledger.json"
+# Results after which an unchanged post does not need another audit
+DONE_RESULTS = ("fixed", "clean")
+
+# Characters wptexturize rewrites (quotes, dashes, ellipses)
+_TEXTURIZE_RE = re.compile(r"[\'\"‘’‚“”„′″–—…\-]|\.\.\.")
+
+
+def content_fingerprint(title: str, content: str) -> str:
+    text = "\n".join(_TEXTURIZE_RE.sub("", html_to_text(part or "")) for part in (title, content))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def post_fingerprint(post: Dict) -> str:
+    return content_fingerprint(post.get('title', {}).get('rendered', ''),
+                               post.get('content', {}).get('rendered', ''))
+
+
+class MaintenanceLedger:
+    def __init__(self, path: str = LEDGER_FILE):
+        self.path = path
+        self.posts: Dict[str, Dict] = {}
+        self.cursors: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.posts = data.get("posts", {})
+                self.cursors = data.get("cursors", {})
+        except Exception as e:
+            print(f"MaintenanceLedger: Could not load {path}: {e}")
+
+    def entry(self, post_id: int) -> Optional[Dict]:
+        return self.posts.get(str(post_id))
+
+    def is_current(self, post: Dict, mode: str) -> bool:
+        """True if the post is unchanged since a successful audit in `mode` ('both' covers 'fix' and 'seo')."""
+        entry = self.posts.get(str(post.get('id')))
+        if not entry or entry.get("hash") != post_fingerprint(post):
+            return False
+        audits = entry.get("modes", {})
+        modes = ('fix', 'seo') if mode == 'both' else (mode,)
+        return all(audits.get(m, {}).get("result") in DONE_RESULTS or
+                   audits.get('both', {}).get("result") in DONE_RESULTS for m in modes)
+
+    def record(self, post_id: int, fingerprint: str, mode: str, result: str,
+               seo_score: Optional[int] = None, readability_score: Optional[int] = None):
+        """Stores an audit result; a changed fingerprint drops the audits of the old content."""
+        with self.lock:
+            entry = self.posts.setdefault(str(post_id), {"hash": fingerprint, "modes": {}})
+            if entry.get("hash") != fingerprint:
+                entry["hash"] = fingerprint
+                entry["modes"] = {}
+            audit = {"audited_at": datetime.now().isoformat(timespec='seconds'), "result": result}
+            if seo_score is not None:
+                audit["seo_score"] = seo_score
+            if readability_score is not None:
+                audit["readability_score"] = readability_score
+            entry["modes"][mode] = audit
+
+    def resume_order(self, posts: List[Dict], mode: str) -> List[Dict]:
+        """Rotates `posts` to start right after the post the previous run stopped at."""
+        cursor = self.cursors.get(mode)
+        for index, post in enumerate(posts):
+            if post.get('id') == cursor:
+                return posts[index + 1:] + posts[:index + 1]
+        return posts
+
+    def set_cursor(self, mode: str, post_id: Optional[int]):
+        if post_id is not None:
+            self.cursors[mode] = post_id
+
+    def save(self):
+        with self.lock:
+            try:
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump({"cursors": self.cursors, "posts": self.posts}, f, ensure_ascii=False, indent=1)
+            except Exception as e:
+                print(f"MaintenanceLedger: Could not save {self.path}: {e}")
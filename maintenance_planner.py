@@ -0,0 +1,94 @@
+"""
+Severity-ranked planning pass for site-wide maintenance.
+
+Every candidate post is scored from its analyzed issues (AI placeholders,
+missing featured image, hard-sell and forbidden-word hits, ingredient
+overload), its local Yoast SEO score, its age, and its traffic when a
+post_traffic.json export ({"<post id>": views}) is present. Posts are then
+taken from a heap worst-first, so a run's limited Vertex budget goes to the
+posts that need it most. Ties keep the incoming (resume) order.
+"""
+
+import heapq
+import json
+import math
+import os
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+TRAFFIC_FILE = "post_traffic.json"
+
+WEIGHTS = {
+    'placeholders': 40,
+    'missing_image': 30,
+    'hard_sell': 8,        # per hit, capped at 40
+    'forbidden': 10,       # per hit, capped at 30
+    'ingredient_overload': 15,
+    'seo_gap': 0.3,        # per point below 100
+    'age': 1,              # per month since last modified, capped at 12
+    'traffic': 1,          # per doubling of views, capped at 10
+}
+
+
+def load_traffic(path: str = TRAFFIC_FILE) -> Dict[int, int]:
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return {int(k): int(v) for k, v in json.load(f).items()}
+    except Exception as e:
+        print(f"MaintenancePlanner: Could not load {path}: {e}")
+    return {}
+
+
+def _age_months(post: Dict, now: datetime) -> float:
+    stamp = post.get('modified') or post.get('date')
+    if not stamp:
+        return 0.0
+    try:
+        return max(0.0, (now - datetime.fromisoformat(stamp)).days / 30.0)
+    except ValueError:
+        return 0.0
+
+
+class MaintenancePlanner:
+    def __init__(self, analyze: Callable[[Dict], Dict], seo_score: Optional[Callable[[Dict], int]] = None,
+                 traffic: Optional[Dict[int, int]] = None, now: Optional[datetime] = None):
+        """
+        `analyze` is MaintenanceAgent._analyze_post_issues; `seo_score`
+        returns the local Yoast score (0-100) of a post.
+        """
+        self.analyze = analyze
+        self.seo_score = seo_score
+        self.traffic = traffic if traffic is not None else load_traffic()
+        self.now = now or datetime.now()
+
+    def score(self, post: Dict, issues: Optional[Dict] = None) -> Tuple[float, Dict]:
+        """Returns (severity, issues) for one post; higher is worse."""
+        issues = issues or self.analyze(post)
+        severity = 0.0
+        if issues['has_placeholders']:
+            severity += WEIGHTS['placeholders']
+        if issues['missing_image']:
+            severity += WEIGHTS['missing_image']
+        severity += min(40, WEIGHTS['hard_sell'] * len(issues['hard_sell_indicators']))
+        severity += min(30, WEIGHTS['forbidden'] * len(issues['forbidden_words']))
+        if issues['ingredient_overload']:
+            severity += WEIGHTS['ingredient_overload']
+        if self.seo_score:
+            severity += WEIGHTS['seo_gap'] * (100 - self.seo_score(post))
+        severity += WEIGHTS['age'] * min(12.0, _age_months(post, self.now))
+        views = self.traffic.get(post.get('id'), 0)
+        if views:
+            severity += WEIGHTS['traffic'] * min(10.0, math.log2(1 + views))
+        return severity, issues
+
+    def ranked(self, posts: List[Dict]) -> Iterator[Tuple[float, Dict, Dict]]:
+        """Yields (severity, post, issues) worst first; only popped posts pay the O(log n) cost."""
+        heap = []
+        for order, post in enumerate(posts):
+            severity, issues = self.score(post)
+            heap.append((-severity, order, post, issues))
+        heapq.heapify(heap)
+        while heap:
+            neg_severity, _, post, issues = heapq.heappop(heap)
+            yield -neg_severity, post, issues
@@ -0,0 +1,157 @@
+"""
+Time-boxed scheduling for maintenance runs.
+
+Per-operation latencies (LLM regenerate/SEO fix, image generation, media
+upload, batched write) are measured on every run and kept as exponentially
+weighted averages in maintenance_timings.json, so each run starts from what
+the previous ones observed. Given a wall-clock budget (the Actions job time
+left for maintenance) and the remaining Vertex quota, the scheduler
+
+  - plans how many jobs of each work type fit (`reserve`, during the cheap
+    local planning pass), spreading the estimated work over the workers;
+  - admits a job to a worker only while it is expected to finish a safety
+    margin before the deadline (`admit`, while the pool pulls work).
+
+Without a budget it only records timings.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+TIMINGS_FILE = "maintenance_timings.json"
+EWMA_ALPHA = 0.3
+# Seconds kept free before the deadline (writes flush, ledger saves, git commit)
+SAFETY_MARGIN = 120
+
+# First-run estimates in seconds, replaced by measurements
+DEFAULT_LATENCY = {
+    'regenerate': 150.0,
+    'seo': 40.0,
+    'cleanup': 0.5,
+    'image': 25.0,
+    'upload': 5.0,
+    'write': 1.0,
+}
+
+# Vertex requests a job of each kind spends (research, generation, review
+# and a retry for regenerate; the head call plus flagged sections for seo)
+QUOTA_COST = {
+    'regenerate': 6,
+    'seo': 3,
+    'cleanup': 0,
+}
+
+
+class LatencyStats:
+    def __init__(self, path: str = TIMINGS_FILE):
+        self.path = path
+        self.stats: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.stats = json.load(f)
+        except Exception as e:
+            print(f"LatencyStats: Could not load {path}: {e}")
+
+    def estimate(self, op: str) -> float:
+        entry = self.stats.get(op)
+        return entry['ewma'] if entry else DEFAULT_LATENCY.get(op, 0.0)
+
+    def observe(self, op: str, seconds: float):
+        with self.lock:
+            entry = self.stats.get(op)
+            if entry:
+                entry['ewma'] = round(EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * entry['ewma'], 3)
+                entry['samples'] += 1
+            else:
+                self.stats[op] = {'ewma': round(seconds, 3), 'samples': 1}
+
+    def timer(self, op: str):
+        """Context manager that observes the duration of its block under `op`."""
+        return _Timer(self, op)
+
+    def save(self):
+        with self.lock:
+            try:
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump(self.stats, f, indent=1, sort_keys=True)
+            except Exception as e:
+                print(f"LatencyStats: Could not save {self.path}: {e}")
+
+
+class _Timer:
+    def __init__(self, stats: LatencyStats, op: str):
+        self.stats = stats
+        self.op = op
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.stats.observe(self.op, time.monotonic() - self.start)
+        return False
+
+
+def job_ops(fix_type: Optional[str], image: bool) -> Iterable[str]:
+    """Operations a maintenance job runs, in order."""
+    ops = []
+    if image:
+        ops += ['image', 'upload']
+    if fix_type:
+        ops.append(fix_type)
+    if ops:
+        ops.append('write')
+    return ops
+
+
+class MaintenanceScheduler:
+    def __init__(self, stats: LatencyStats, time_budget: float, workers: int = 1,
+                 quota: Optional[int] = None, margin: float = SAFETY_MARGIN, clock=time.monotonic):
+        """
+        `time_budget` is in seconds from now; `quota` is the number of Vertex
+        requests this run may spend (None for no quota limit).
+        """
+        self.stats = stats
+        self.clock = clock
+        self.deadline = clock() + time_budget
+        self.workers = max(1, workers)
+        self.quota = quota
+        self.margin = margin
+        self.planned_seconds = 0.0
+        self.planned_calls = 0
+        self.planned: Dict[str, int] = {}
+
+    def estimate(self, ops: Iterable[str]) -> float:
+        return sum(self.stats.estimate(op) for op in ops)
+
+    def remaining(self) -> float:
+        return self.deadline - self.clock() - self.margin
+
+    def reserve(self, fix_type: Optional[str], image: bool) -> bool:
+        """Books a planned job if its estimated work and quota still fit the budget."""
+        seconds = self.estimate(job_ops(fix_type, image))
+        calls = QUOTA_COST.get(fix_type, 0)
+        if (self.planned_seconds + seconds) / self.workers > self.remaining():
+            return False
+        if self.quota is not None and self.planned_calls + calls > self.quota:
+            return False
+        self.planned_seconds += seconds
+        self.planned_calls += calls
+        kind = fix_type or 'image'
+        self.planned[kind] = self.planned.get(kind, 0) + 1
+        return True
+
+    def admit(self, fix_type: Optional[str], image: bool) -> bool:
+        """True if a job started now is expected to finish before the safety margin."""
+        return self.estimate(job_ops(fix_type, image)) <= self.remaining()
+
+    def summary(self) -> str:
+        kinds = ', '.join(f"{count} {kind}" for kind, count in sorted(self.planned.items())) or 'nothing'
+        return (f"planned {kinds} (~{self.planned_seconds / self.workers / 60:.1f} min on {self.workers} "
+                f"worker(s), {self.planned_calls} Vertex calls) in {max(0.0, self.remaining()) / 60:.1f} min")
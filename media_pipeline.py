@@ -0,0 +1,178 @@
+"""
+Media upload pipeline for featured images.
+
+Images are typed from their magic bytes (Imagen writes PNG), optionally
+transcoded to WebP/JPEG at a target quality and maximum size (requires
+Pillow; check `PIL_AVAILABLE`), and identified by the SHA-256 of the source
+bytes. The hash is looked up in a local index (media_index.json) and then in
+the WordPress media library, where uploads are tagged with it in their
+description, so identical images reuse the existing attachment and only new
+bytes are uploaded.
+"""
+
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    PIL_AVAILABLE = False
+
+DEFAULT_INDEX_PATH = "media_index.json"
+HASH_PREFIX = "sha256:"
+
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png", "png"),
+    (b"\xff\xd8\xff", "image/jpeg", "jpg"),
+    (b"GIF87a", "image/gif", "gif"),
+    (b"GIF89a", "image/gif", "gif"),
+)
+_PIL_FORMATS = {"webp": ("WEBP", "image/webp", "webp"), "jpeg": ("JPEG", "image/jpeg", "jpg")}
+
+
+def detect_image_type(data: bytes) -> Optional[Tuple[str, str]]:
+    """Returns (mime type, extension) from the file signature, or None if unknown."""
+    for signature, mime, ext in _SIGNATURES:
+        if data.startswith(signature):
+            return mime, ext
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return None
+
+
+def transcode_image(data: bytes, fmt: str = "webp", quality: int = 82,
+                    max_size: int = 1200) -> Optional[Tuple[bytes, str, str]]:
+    """
+    Re-encodes an image as `fmt` ('webp' or 'jpeg'), scaled down to fit
+    `max_size` pixels. Returns (bytes, mime, ext), or None without Pillow or
+    for an unsupported format.
+    """
+    if not PIL_AVAILABLE or fmt not in _PIL_FORMATS:
+        return None
+    pil_format, mime, ext = _PIL_FORMATS[fmt]
+    with Image.open(io.BytesIO(data)) as img:
+        img.thumbnail((max_size, max_size))
+        if pil_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        out = io.BytesIO()
+        img.save(out, format=pil_format, quality=quality, optimize=True)
+    return out.getvalue(), mime, ext
+
+
+class MediaIndex:
+    """Persistent {sha256: {"id": ..., "source_url": ...}} map of uploaded images."""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        # Backfill upload workers share one index
+        self.lock = threading.Lock()
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+        except Exception as e:
+            print(f"MediaIndex: Could not load {path}: {e}")
+
+    def get(self, digest: str) -> Optional[Dict]:
+        with self.lock:
+            return self.entries.get(digest)
+
+    def put(self, digest: str, media: Dict):
+        with self.lock:
+            self.entries[digest] = {"id": media["id"], "source_url": media.get("source_url", "")}
+            self._save()
+
+    def discard(self, digest: str):
+        with self.lock:
+            if self.entries.pop(digest, None) is not None:
+                self._save()
+
+    def save(self):
+        with self.lock:
+            self._save()
+
+    def _save(self):
+        # Write a temp file and swap it in, so a failed save never truncates the index
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=1)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"MediaIndex: Could not save {self.path}: {e}")
+
+
+class MediaPipeline:
+    def __init__(self, publisher, index: Optional[MediaIndex] = None, fmt: Optional[str] = None,
+                 quality: Optional[int] = None, max_size: Optional[int] = None):
+        """
+        `fmt`/`quality`/`max_size` default to MEDIA_FORMAT (webp; 'original'
+        disables transcoding), MEDIA_QUALITY (82) and MEDIA_MAX_SIZE (1200).
+        """
+        self.publisher = publisher
+        self.index = index if index is not None else MediaIndex()
+        self.fmt = (fmt or os.getenv("MEDIA_FORMAT", "webp")).lower()
+        self.quality = quality or int(os.getenv("MEDIA_QUALITY", "82"))
+        self.max_size = max_size or int(os.getenv("MEDIA_MAX_SIZE", "1200"))
+
+    def _prepare(self, data: bytes, kind: Optional[Tuple[str, str]], filename: Optional[str]) -> Tuple[bytes, str, str]:
+        if kind is None:
+            # Unrecognised bytes go up as they are, typed from the file name
+            ext = os.path.splitext(filename or "")[1].lstrip(".") or "jpg"
+            return data, mimetypes.guess_type(f"file.{ext}")[0] or "image/jpeg", ext
+        mime, ext = kind
+        if self.fmt == "original":
+            return data, mime, ext
+        try:
+            transcoded = transcode_image(data, self.fmt, self.quality, self.max_size)
+        except Exception as e:
+            print(f"MediaPipeline: Transcode failed ({e}), uploading original.")
+            transcoded = None
+        # Keep the original when re-encoding does not make it smaller
+        if transcoded and len(transcoded[0]) < len(data):
+            return transcoded
+        return data, mime, ext
+
+    def _find_existing(self, digest: str, kind) -> Optional[int]:
+        entry = self.index.get(digest)
+        if entry:
+            # Trust the index unless WordPress says the attachment is gone
+            if self.publisher.media_exists(entry["id"]) is not False:
+                return entry["id"]
+            self.index.discard(digest)
+        if kind is None:
+            # Only recognised images are uploaded with a hash tag
+            return None
+        for media in self.publisher.find_media(f"{HASH_PREFIX}{digest}"):
+            self.index.put(digest, media)
+            return media["id"]
+        return None
+
+    def upload(self, data: bytes, title: Optional[str] = None, filename: Optional[str] = None) -> Optional[int]:
+        """Uploads image bytes unless an identical image exists; returns the attachment id."""
+        digest = hashlib.sha256(data).hexdigest()
+        kind = detect_image_type(data)
+        media_id = self._find_existing(digest, kind)
+        if media_id:
+            print(f"Image already in media library (id {media_id}), reusing it.")
+            return media_id
+
+        body, mime, ext = self._prepare(data, kind, filename)
+        stem = os.path.splitext(filename)[0] if filename else "image"
+        name = f"{stem}-{digest[:12]}.{ext}"
+        media = self.publisher.send_media(body, name, mime, title=title,
+                                          description=f"{HASH_PREFIX}{digest}" if kind else None)
+        if not media:
+            return None
+        if len(body) != len(data):
+            print(f"Image transcoded to {mime}: {len(data) // 1024} KB -> {len(body) // 1024} KB")
+        self.index.put(digest, media)
+        return media["id"]
@@ -0,0 +1,109 @@
+"""
+Single-pass analysis of post HTML for the maintenance agent.
+
+One compiled regex covers every AI-leftover tag the cleanup removes
+([image: ...], [link: ...], [IMAGE_PLACEHOLDER ...], Thai [(ภาพ...)] and
+friends) and the placeholder markers the issue check looks for, so a post is
+scanned once instead of once per pattern and the cleaned text is rebuilt from
+the matched spans. All tags share the literal `[` prefix (factored out so the
+scan can jump between brackets) and then start with distinct words, so at
+any position at most one of them can match and a single left-to-right scan
+removes the same spans the old sequence of `re.sub` passes did. The rare
+nested case (a tag inside another tag, where sequential passes could join
+text into a new match) falls back to the sequential passes.
+
+Ingredient mentions are counted with `str.count`, which runs in C and beats
+any per-match Python work on ingredient-heavy posts.
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Tuple
+
+# Also the pre-publish linter's placeholder list (content_linter). Order matters
+# only for the sequential fallback, which must match the old cleanup
+LEFTOVER_PATTERNS = [
+    r'\[image:.*?\]',
+    r'\[link:.*?\]',
+    r'\[internal link:.*?\]',
+    r'\[IMAGE_PLACEHOLDER.*?\]',
+    r'\[INSERT_INTERNAL_LINK.*?\]',
+    r'\[\(.*?ภาพ.*?\).*?\]',  # Thai placeholders like [(ภาพ...)]
+]
+
+# Leftovers that flag a post as having placeholders (an unterminated
+# [IMAGE_PLACEHOLDER counts too, although cleanup leaves it alone)
+PLACEHOLDER_PREFIXES = ('[image:', '[link:', '[image_placeholder')
+
+INGREDIENT_TERMS = ('วิตามิน', 'สารสกัด')
+INGREDIENT_LIMIT = 5
+
+_LEFTOVER_BODY = "|".join(p[2:] for p in LEFTOVER_PATTERNS)
+_SCAN_RE = re.compile(
+    r"\[(?:(?P<leftover>" + _LEFTOVER_BODY + ")|(?P<placeholder>IMAGE_PLACEHOLDER))",
+    re.IGNORECASE,
+)
+_LEFTOVER_RE = re.compile(r"\[(?:" + _LEFTOVER_BODY + ")", re.IGNORECASE)
+_PLACEHOLDER_RE = re.compile(r'\[(?:image:.*?\]|link:.*?\]|IMAGE_PLACEHOLDER)', re.IGNORECASE)
+_SEQUENTIAL_RES = [re.compile(p, re.IGNORECASE) for p in LEFTOVER_PATTERNS]
+
+
+class PostAnalysis(NamedTuple):
+    """Result of one scan; `leftovers` are (start, end) spans into the source."""
+    cleaned: str
+    leftovers: List[Tuple[int, int]]
+    placeholders: List[str]
+    ingredients: Dict[str, int]
+
+    @property
+    def has_placeholders(self) -> bool:
+        return bool(self.placeholders)
+
+    @property
+    def ingredient_overload(self) -> bool:
+        return any(count > INGREDIENT_LIMIT for count in self.ingredients.values())
+
+
+def _sequential_cleanup(content: str) -> str:
+    for pattern in _SEQUENTIAL_RES:
+        content = pattern.sub('', content)
+    return content.strip()
+
+
+def analyze_content(content: str) -> PostAnalysis:
+    """Scans `content` once for leftover tags and placeholders and counts ingredient mentions."""
+    content = content or ''
+    ingredients = {term: content.count(term) for term in INGREDIENT_TERMS}
+    if '[' not in content:
+        return PostAnalysis(content.strip(), [], [], ingredients)
+
+    leftovers = []
+    placeholders = []
+    nested = False
+    for match in _SCAN_RE.finditer(content):
+        text = match.group()
+        if text.lower().startswith(PLACEHOLDER_PREFIXES):
+            placeholders.append(text)
+        if match.lastgroup == 'leftover':
+            leftovers.append(match.span())
+            nested = nested or '[' in text[1:]
+    if not leftovers:
+        return PostAnalysis(content.strip(), leftovers, placeholders, ingredients)
+
+    pieces = []
+    last = 0
+    for start, end in leftovers:
+        pieces.append(content[last:start])
+        last = end
+    pieces.append(content[last:])
+    cleaned = ''.join(pieces).strip()
+
+    if nested or _LEFTOVER_RE.search(cleaned):
+        cleaned = _sequential_cleanup(content)
+        if nested:
+            placeholders = _PLACEHOLDER_RE.findall(content)
+    return PostAnalysis(cleaned, leftovers, placeholders, ingredients)
+
+
+def strip_ai_leftovers(content: str) -> str:
+    """Removes AI leftover tags like [image: ...] and [link: ...] from `content`."""
+    return analyze_content(content).cleaned
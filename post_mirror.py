@@ -0,0 +1,357 @@
+"""
+Local SQLite mirror of the site's WordPress posts.
+
+`sync()` only asks WordPress for posts modified since the last sync
+(`modified_after` + `orderby=modified`), sends the stored ETag/Last-Modified
+validators so an unchanged listing costs a 304, and periodically reconciles
+the id list to drop deleted posts. Reads (`get_posts`, `get_post`) are served
+from the mirror in the same shape as the REST API. Once attached, the
+publisher writes successful creates/updates through to the mirror and uses
+`changed_fields` to send only the fields that differ from the last-known
+server state (hashes of the raw title/content, the stored meta values).
+
+Titles, excerpts and content are stored as raw (as written) HTML, fetched
+with `context=edit`, which is also what write-through updates store. Only
+when the credentials may not use the edit context are rendered values
+mirrored instead.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_MIRROR_PATH = "post_mirror.db"
+RECONCILE_INTERVAL = timedelta(days=7)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    link TEXT NOT NULL DEFAULT '',
+    slug TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL DEFAULT '',
+    modified TEXT NOT NULL DEFAULT '',
+    excerpt TEXT NOT NULL DEFAULT '',
+    content TEXT NOT NULL DEFAULT '',
+    featured_media INTEGER NOT NULL DEFAULT 0,
+    focus_keyword TEXT NOT NULL DEFAULT '',
+    meta_description TEXT NOT NULL DEFAULT '',
+    content_hash TEXT NOT NULL DEFAULT '',
+    title_hash TEXT NOT NULL DEFAULT '',
+    body_hash TEXT NOT NULL DEFAULT '',
+    meta TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS posts_modified ON posts(modified);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_COLUMNS = ('id', 'title', 'link', 'slug', 'status', 'date', 'modified', 'excerpt', 'content',
+            'featured_media', 'focus_keyword', 'meta_description', 'content_hash',
+            'title_hash', 'body_hash', 'meta')
+# Columns added after the first schema; older mirror files are migrated in place
+_ADDED_COLUMNS = {
+    'title_hash': "TEXT NOT NULL DEFAULT ''",
+    'body_hash': "TEXT NOT NULL DEFAULT ''",
+    'meta': "TEXT NOT NULL DEFAULT '{}'",
+}
+
+
+def _raw(value) -> str:
+    """The raw (as written) value when the API sent one, else the rendered value."""
+    if isinstance(value, dict):
+        return value.get('raw') if value.get('raw') is not None else (value.get('rendered') or '')
+    return value or ''
+
+
+def _field_hash(value) -> str:
+    return hashlib.sha256(_raw(value).encode('utf-8')).hexdigest()
+
+
+def content_hash(title: str, content: str, focus_keyword: str, meta_description: str) -> str:
+    payload = '\0'.join((title, content, focus_keyword, meta_description))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PostMirror:
+    def __init__(self, publisher, db_path: str = DEFAULT_MIRROR_PATH, attach: bool = True):
+        self.publisher = publisher
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(posts)")}
+        for column, definition in _ADDED_COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE posts ADD COLUMN {column} {definition}")
+        # Raw title/content (edit context) make the change detection exact
+        self.context = 'edit'
+        if attach:
+            publisher.mirror = self
+
+    def close(self):
+        if getattr(self.publisher, 'mirror', None) is self:
+            self.publisher.mirror = None
+        self.conn.close()
+
+    def _get_state(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: Optional[str]):
+        self.conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    # --- Writes ---
+
+    def _row(self, post: Dict) -> Dict:
+        meta = post.get('meta') if isinstance(post.get('meta'), dict) else {}
+        yoast = post.get('yoast_head_json') or {}
+        row = {
+            'id': post['id'],
+            'title': _raw(post.get('title')),
+            'link': post.get('link') or '',
+            'slug': post.get('slug') or '',
+            'status': post.get('status') or '',
+            'date': post.get('date') or '',
+            'modified': post.get('modified') or '',
+            'excerpt': _raw(post.get('excerpt')),
+            'content': _raw(post.get('content')),
+            'featured_media': post.get('featured_media') or 0,
+            'focus_keyword': meta.get('_yoast_wpseo_focuskw') or '',
+            'meta_description': meta.get('_yoast_wpseo_metadesc') or yoast.get('description') or '',
+        }
+        row['content_hash'] = content_hash(row['title'], row['content'], row['focus_keyword'], row['meta_description'])
+        row['title_hash'] = _field_hash(post.get('title'))
+        row['body_hash'] = _field_hash(post.get('content'))
+        row['meta'] = json.dumps(meta, ensure_ascii=False)
+        return row
+
+    def upsert_posts(self, posts: Iterable[Dict]) -> int:
+        rows = [self._row(p) for p in posts if p.get('id')]
+        if not rows:
+            return 0
+        placeholders = ', '.join('?' for _ in _COLUMNS)
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO posts ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                [tuple(row[c] for c in _COLUMNS) for row in rows]
+            )
+        return len(rows)
+
+    def apply_update(self, post_id: int, data: Dict):
+        """Writes a successful REST update (title/content/meta/featured_media) through to the mirror."""
+        with self.lock, self.conn:
+            current = self.conn.execute("SELECT * FROM posts WHERE id = ?", (post_id,)).fetchone()
+            if current is None:
+                return
+            row = dict(current)
+            if 'title' in data:
+                row['title'] = _raw(data['title'])
+            if 'content' in data:
+                row['content'] = _raw(data['content'])
+            if 'featured_media' in data:
+                row['featured_media'] = data['featured_media'] or 0
+            if 'title' in data:
+                row['title_hash'] = _field_hash(data['title'])
+            if 'content' in data:
+                row['body_hash'] = _field_hash(data['content'])
+            meta = data.get('meta') or {}
+            if meta:
+                row['meta'] = json.dumps({**json.loads(row['meta'] or '{}'), **meta}, ensure_ascii=False)
+            if '_yoast_wpseo_focuskw' in meta:
+                row['focus_keyword'] = meta['_yoast_wpseo_focuskw'] or ''
+            if '_yoast_wpseo_metadesc' in meta:
+                row['meta_description'] = meta['_yoast_wpseo_metadesc'] or ''
+            row['content_hash'] = content_hash(row['title'], row['content'], row['focus_keyword'], row['meta_description'])
+            self.conn.execute(
+                "UPDATE posts SET title = ?, content = ?, featured_media = ?, focus_keyword = ?, "
+                "meta_description = ?, content_hash = ?, title_hash = ?, body_hash = ?, meta = ? WHERE id = ?",
+                (row['title'], row['content'], row['featured_media'], row['focus_keyword'],
+                 row['meta_description'], row['content_hash'], row['title_hash'], row['body_hash'],
+                 row['meta'], post_id)
+            )
+
+    def changed_fields(self, post_id: int, data: Dict) -> Dict:
+        """
+        Returns the part of an update that differs from the mirrored state:
+        title/content by hash, featured_media by value, meta key by key.
+        Unknown posts and fields are kept as is.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT title_hash, body_hash, featured_media, meta FROM posts WHERE id = ?",
+                                    (post_id,)).fetchone()
+        if row is None:
+            return dict(data)
+        changed = {}
+        for key, value in data.items():
+            if key == 'title' and _field_hash(value) == row['title_hash']:
+                continue
+            if key == 'content' and _field_hash(value) == row['body_hash']:
+                continue
+            if key == 'featured_media' and (value or 0) == row['featured_media']:
+                continue
+            if key == 'meta' and isinstance(value, dict):
+                known = json.loads(row['meta'] or '{}')
+                meta = {k: v for k, v in value.items() if k not in known or str(known[k]) != str(v)}
+                if meta:
+                    changed['meta'] = meta
+                continue
+            changed[key] = value
+        return changed
+
+    # --- Sync ---
+
+    def sync(self, full: bool = False, per_page: int = 100) -> int:
+        """
+        Pulls posts modified since the last sync. With `full` (or once per
+        RECONCILE_INTERVAL) the id list is also reconciled to drop posts that
+        were deleted or unpublished. Returns the number of posts updated.
+        """
+        last_modified = None if full else self._get_state('last_modified')
+        filters = {'orderby': 'modified', 'order': 'asc', 'context': self.context}
+        if last_modified:
+            # modified_after is exclusive; step back a second and upsert idempotently
+            since = datetime.fromisoformat(last_modified) - timedelta(seconds=1)
+            filters['modified_after'] = since.isoformat()
+
+        query_key = filters.get('modified_after', '')
+        headers = {}
+        if self._get_state('validator_query') == query_key:
+            if self._get_state('etag'):
+                headers['If-None-Match'] = self._get_state('etag')
+            if self._get_state('last_modified_header'):
+                headers['If-Modified-Since'] = self._get_state('last_modified_header')
+
+        updated = 0
+        newest = last_modified
+        validators = None
+        page = 1
+        total_pages = 1
+        while page <= total_pages:
+            response = self.publisher.fetch_posts_page(page, per_page, headers=headers if page == 1 else None, **filters)
+            if response.status_code in (401, 403) and filters.get('context') == 'edit':
+                print("PostMirror: Edit context not permitted, mirroring rendered values.")
+                self.context = filters['context'] = None
+                continue
+            if response.status_code == 304:
+                print("PostMirror: No changes since last sync.")
+                break
+            if response.status_code != 200:
+                if response.status_code != 400:
+                    print(f"PostMirror: Sync failed on page {page}: {response.status_code}")
+                    return updated
+                break
+            posts = response.json()
+            if page == 1:
+                validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                total_pages = int(response.headers.get('X-WP-TotalPages') or 1)
+            updated += self.upsert_posts(posts)
+            for post in posts:
+                if post.get('modified') and (newest is None or post['modified'] > newest):
+                    newest = post['modified']
+            page += 1
+
+        with self.lock, self.conn:
+            if newest:
+                self._set_state('last_modified', newest)
+            if validators is not None:
+                # Every page arrived. A 304 only vouches for page 1, so a
+                # sync spanning several pages must not send validators next time.
+                if total_pages > 1:
+                    validators = (None, None)
+                self._set_state('validator_query', query_key)
+                self._set_state('etag', validators[0])
+                self._set_state('last_modified_header', validators[1])
+
+        last_reconcile = self._get_state('last_reconcile')
+        if full or not last_reconcile or datetime.now() - datetime.fromisoformat(last_reconcile) > RECONCILE_INTERVAL:
+            self.reconcile()
+        print(f"PostMirror: Synced {updated} changed post(s); {len(self)} post(s) mirrored.")
+        return updated
+
+    def reconcile(self, per_page: int = 100) -> int:
+        """
+        Drops mirrored posts that no longer exist on the site (ids only).
+        Nothing is dropped unless every page of the id listing arrived and
+        the ids add up to X-WP-Total; only then is `last_reconcile` stamped.
+        """
+        live_ids = set()
+        expected = None
+        page = 1
+        total_pages = 1
+        while page <= total_pages:
+            try:
+                response = self.publisher.fetch_posts_page(page, per_page, fields=('id',))
+            except Exception as e:
+                print(f"PostMirror: Reconcile aborted on page {page}: {e}")
+                return 0
+            if response.status_code != 200:
+                print(f"PostMirror: Reconcile aborted on page {page}: {response.status_code}")
+                return 0
+            if page == 1:
+                total_pages = int(response.headers.get('X-WP-TotalPages') or 1)
+                if response.headers.get('X-WP-Total') is not None:
+                    expected = int(response.headers['X-WP-Total'])
+            live_ids.update(p['id'] for p in response.json())
+            page += 1
+
+        if not live_ids or (expected is not None and len(live_ids) < expected):
+            print(f"PostMirror: Reconcile aborted, listed {len(live_ids)} of {expected} post id(s).")
+            return 0
+        with self.lock, self.conn:
+            mirrored = {row[0] for row in self.conn.execute("SELECT id FROM posts")}
+            stale = mirrored - live_ids
+            self.conn.executemany("DELETE FROM posts WHERE id = ?", [(i,) for i in stale])
+            self._set_state('last_reconcile', datetime.now().isoformat())
+        return len(stale)
+
+    # --- Reads ---
+
+    def _to_post(self, row: sqlite3.Row) -> Dict:
+        keys = row.keys()
+        post = {
+            'id': row['id'],
+            'title': {'rendered': row['title']},
+            'link': row['link'],
+            'slug': row['slug'],
+            'status': row['status'],
+            'date': row['date'],
+            'modified': row['modified'],
+            'excerpt': {'rendered': row['excerpt']},
+            'featured_media': row['featured_media'],
+            'meta': {
+                '_yoast_wpseo_focuskw': row['focus_keyword'],
+                '_yoast_wpseo_metadesc': row['meta_description'],
+            },
+            'content_hash': row['content_hash'],
+        }
+        if 'content' in keys:
+            # Raw HTML, also under 'rendered' for callers written against the view context
+            post['content'] = {'raw': row['content'], 'rendered': row['content']}
+        return post
+
+    def get_posts(self, limit: Optional[int] = None, include_content: bool = True) -> List[Dict]:
+        """Mirrored posts, newest first, shaped like REST API post objects."""
+        columns = _COLUMNS if include_content else tuple(c for c in _COLUMNS if c != 'content')
+        sql = f"SELECT {', '.join(columns)} FROM posts ORDER BY date DESC, id DESC"
+        params = ()
+        if limit:
+            sql += " LIMIT ?"
+            params = (limit,)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._to_post(row) for row in rows]
+
+    def get_post(self, post_id: int) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM posts WHERE id = ?", (post_id,)).fetchone()
+        return self._to_post(row) if row else None
@@ -1,85 +1,304 @@
-import google.generativeai as genai
 import os
+import re
 import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+from text_utils import normalize_text
+
 load_dotenv()
 
-# Configure Gemini
-api_key = os.getenv("GEMINI_API_KEY") 
-if not api_key:
-    print("Error: GEMINI_API_KEY not found in environment variables.")
-    exit(1)
+TEXT_FILE = "compliance_text.txt"
+RULES_FILE = "compliance_rules.json"
+CHUNK_CACHE_FILE = "compliance_chunks_cache.json"
 
-print(f"Debug: Using API Key: {api_key[:5]}...{api_key[-5:]}")
-genai.configure(api_key=api_key)
+# Bump when the extraction prompt changes so cached chunk results are redone
+PROMPT_VERSION = 2
+MAX_CHUNK_CHARS = 12000
+MIN_CHUNK_CHARS = 3000
+MAX_WORKERS = int(os.getenv("COMPLIANCE_WORKERS", "4"))
 
-def process_compliance():
-    if not os.path.exists("compliance_text.txt"):
-        print("Error: compliance_text.txt not found. Run extract_pdf.py first.")
-        return
+MODEL_CANDIDATES = [
+    os.getenv("GEMINI_MODEL_NAME"), # Try env var first
+    'gemini-2.5-flash',
+    'gemini-1.5-flash',
+    'models/gemini-1.5-flash',
+    'gemini-1.5-pro',
+    'models/gemini-1.5-pro',
+    'gemini-pro',
+]
 
-    with open("compliance_text.txt", "r", encoding="utf-8") as f:
-        text = f.read()
+# A page number on its own line marks the end of a page in the extracted text
+_PAGE_NUMBER_RE = re.compile(r'^\s*(\d{1,3})\s*$')
+# Numbered headings ("4. สรรพคุณ", "4.1 กรณี...") and product group headings
+_SECTION_RE = re.compile(r'^\s*(\d{1,2}(?:\.\d{1,2})*\.?\s+\S.{0,80}|กลุ\S*เครื่องส\S*\s?\S.{0,80})$')
+
+
+def split_into_pages(text):
+    """
+    Splits the extracted manual into pages.
+
+    Returns a list of dicts: {"page": int or None, "section": str, "text": str}.
+    A page ends at a standalone page-number line that continues the sequence;
+    runs of number-only lines (table of contents, tables) are ignored. The
+    section is the most recent heading seen at the start of the page.
+    """
+    lines = text.split('\n')
+    numbers = []
+    for line in lines:
+        m = _PAGE_NUMBER_RE.match(line)
+        numbers.append(int(m.group(1)) if m else None)
+
+    def isolated(i):
+        for j in (i - 1, i + 1):
+            if 0 <= j < len(lines) and numbers[j] is not None:
+                return False
+        return True
+
+    pages = []
+    current_lines = []
+    last_page = 0
+    section = ""
+    page_section = ""
+
+    for i, line in enumerate(lines):
+        n = numbers[i]
+        if n is not None and last_page < n <= last_page + 2 and isolated(i):
+            last_page = n
+            if current_lines:
+                pages.append({"page": n, "section": page_section, "text": '\n'.join(current_lines)})
+            current_lines = []
+            page_section = section
+            continue
+        heading = _SECTION_RE.match(line)
+        if heading:
+            section = heading.group(1).strip()
+            if not current_lines:
+                page_section = section
+        current_lines.append(line)
+
+    if current_lines:
+        pages.append({"page": last_page + 1 if last_page else None, "section": page_section, "text": '\n'.join(current_lines)})
+    return pages
+
+
+def build_chunks(pages, max_chars=MAX_CHUNK_CHARS, min_chars=MIN_CHUNK_CHARS):
+    """
+    Packs pages into chunks, starting a new chunk when a page opens a new
+    section (once the chunk has at least `min_chars`) or the chunk would
+    exceed `max_chars`. Each page in a chunk is prefixed with a [Page N]
+    marker so the model can report provenance.
+    """
+    chunks = []
+    current = []
+    size = 0
+    for page in pages:
+        new_section = size >= min_chars and page["section"] and page["section"] != current[-1]["section"]
+        if current and (size + len(page["text"]) > max_chars or new_section):
+            chunks.append(_make_chunk(current))
+            current, size = [], 0
+        current.append(page)
+        size += len(page["text"])
+    if current:
+        chunks.append(_make_chunk(current))
+    return chunks
+
+
+def _make_chunk(pages):
+    text = '\n'.join(f"[Page {p['page']}]\n{p['text']}" for p in pages)
+    return {
+        "pages": [p["page"] for p in pages],
+        "sections": [p["section"] for p in pages],
+        "section": pages[0]["section"],
+        "text": text,
+        "hash": hashlib.sha256(f"{PROMPT_VERSION}:{text}".encode('utf-8')).hexdigest(),
+    }
 
-    # The text is long, but 1.5 Flash has a large context window.
-    prompt = f"""
+
+def build_prompt(chunk):
+    return f"""
     You are an expert in Thai FDA Cosmetic Regulations.
-    I have extracted the text from the "Cosmetic Advertising Manual 2024" (คู่มือการโฆษณาเครื่องสำอางค์ 2567).
-    
+    Below is one section of the "Cosmetic Advertising Manual 2024" (คู่มือการโฆษณาเครื่องสำอาง 2567).
+    Section: {chunk['section'] or 'Unknown'}
+    Each page starts with a [Page N] marker.
+
     Your task is to analyze this text and extract two lists:
     1. "allowed_words": Words or phrases that are explicitly mentioned as Acceptable Claims (Do).
     2. "forbidden_words": Words or phrases that are explicitly mentioned as Unacceptable Claims (Don't) or prohibited/over-claiming.
-    
-    Return the result as a raw JSON object with keys "allowed_words" and "forbidden_words".
+
+    Return the result as a raw JSON object:
+    {{
+        "allowed_words": [{{"term": "phrase", "page": N}}],
+        "forbidden_words": [{{"term": "phrase", "page": N}}]
+    }}
+    Return empty lists if the section has no such examples.
     Do not wrap in markdown.
-    
+
     Text content:
-    {text}
+    {chunk['text']}
     """
 
-    print("Sending request to Gemini...")
-    
-    candidates = [
-        os.getenv("GEMINI_MODEL_NAME"), # Try env var first
-        'gemini-2.5-flash',
-        'gemini-1.5-flash',
-        'models/gemini-1.5-flash',
-        'gemini-1.5-pro',
-        'models/gemini-1.5-pro', 
-        'gemini-pro',
-    ]
-    
-    response = None
-    for model_name in candidates:
-        print(f"Trying model: {model_name}...")
+
+class GeminiExtractor:
+    """Calls Gemini for one chunk, remembering the first model that works."""
+
+    def __init__(self):
+        import google.generativeai as genai
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables.")
+        genai.configure(api_key=api_key)
+        self.genai = genai
+        self.candidates = [m for m in MODEL_CANDIDATES if m]
+        self.model_index = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self.lock:
+            start = self.model_index
+        for index in range(start, len(self.candidates)):
+            model_name = self.candidates[index]
+            try:
+                response = self.genai.GenerativeModel(model_name).generate_content(prompt)
+                with self.lock:
+                    # Later chunks skip models that already failed
+                    self.model_index = max(self.model_index, index)
+                return response.text
+            except Exception as e:
+                print(f"Failed with {model_name}: {e}")
+        raise RuntimeError("All models failed.")
+
+
+def parse_extraction(raw_text):
+    """Parses a chunk response into {"allowed_words": [...], "forbidden_words": [...]}."""
+    content = raw_text.replace("```json", "").replace("```", "").strip()
+    data = json.loads(content)
+    result = {"allowed_words": [], "forbidden_words": []}
+    for key in result:
+        for item in data.get(key, []):
+            if isinstance(item, str):
+                item = {"term": item}
+            term = str(item.get("term", "")).strip()
+            if term:
+                result[key].append({"term": term, "page": item.get("page")})
+    return result
+
+
+def load_chunk_cache(path=CHUNK_CACHE_FILE):
+    if os.path.exists(path):
         try:
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(prompt)
-            print(f"Success with {model_name}!")
-            break
-        except Exception as e:
-            print(f"Failed with {model_name}: {e}")
-    
-    if not response:
-        print("All models failed.")
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+
+def save_chunk_cache(cache, path=CHUNK_CACHE_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+
+
+def extract_chunks(chunks, extractor, cache, max_workers=MAX_WORKERS):
+    """
+    Runs the extractor over every chunk whose hash is not cached, concurrently.
+    Returns {chunk hash: extraction} for all chunks that succeeded.
+    """
+    results = {c["hash"]: cache[c["hash"]] for c in chunks if c["hash"] in cache}
+    pending = [c for c in chunks if c["hash"] not in cache]
+    print(f"Chunks: {len(chunks)} total, {len(results)} cached, {len(pending)} to process.")
+
+    def work(chunk):
+        return parse_extraction(extractor(build_prompt(chunk)))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(work, c): c for c in pending}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                results[chunk["hash"]] = future.result()
+                cache[chunk["hash"]] = results[chunk["hash"]]
+                print(f"  Processed pages {chunk['pages'][0]}-{chunk['pages'][-1]} ({chunk['section'][:40]})")
+            except Exception as e:
+                print(f"  Failed pages {chunk['pages'][0]}-{chunk['pages'][-1]}: {e}")
+    return results
+
+
+def build_rules(chunks, results):
+    """
+    Builds the rules from the chunk extractions of the current manual,
+    deduplicating terms by their normalized form, so terms no longer in the
+    manual drop out. A term reported as both allowed and forbidden is treated
+    as forbidden. Provenance records the page and section each term was
+    extracted from.
+    """
+    rules = {"allowed_words": [], "forbidden_words": []}
+    provenance = {}
+    keys = {"allowed_words": {}, "forbidden_words": {}}
+
+    for chunk in chunks:
+        extraction = results.get(chunk["hash"])
+        if not extraction:
+            continue
+        for kind in ("forbidden_words", "allowed_words"):
+            for item in extraction.get(kind, []):
+                key = normalize_text(item["term"], strip_html=False).text
+                if not key:
+                    continue
+                if kind == "allowed_words" and key in keys["forbidden_words"]:
+                    continue
+                term = keys[kind].get(key)
+                if term is None:
+                    term = item["term"]
+                    keys[kind][key] = term
+                    rules[kind].append(term)
+                page = item.get("page") if item.get("page") in chunk["pages"] else chunk["pages"][0]
+                source = {"page": page, "section": chunk["sections"][chunk["pages"].index(page)]}
+                sources = provenance.setdefault(kind, {}).setdefault(term, [])
+                if source not in sources:
+                    sources.append(source)
+
+    # Forbidden wins over allowed for terms that appear in both lists
+    rules["allowed_words"] = [
+        t for t in rules["allowed_words"]
+        if normalize_text(t, strip_html=False).text not in keys["forbidden_words"]
+    ]
+    rules["provenance"] = provenance
+    return rules
+
+
+def process_compliance(extractor=None, text_file=TEXT_FILE, rules_file=RULES_FILE,
+                       cache_file=CHUNK_CACHE_FILE):
+    if not os.path.exists(text_file):
+        print(f"Error: {text_file} not found. Run extract_pdf.py first.")
         return
-    
-    try:
-        # Clean up if markdown is present
-        content = response.text.replace("```json", "").replace("```", "").strip()
-        data = json.loads(content)
-        
-        with open("compliance_rules.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        print("Successfully saved compliance_rules.json")
-        
-    except Exception as e:
-        print(f"Error parsing response: {e}")
-        try:
-            print("Raw response:", response.text)
-        except:
-            pass
+
+    with open(text_file, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    chunks = build_chunks(split_into_pages(text))
+    cache = load_chunk_cache(cache_file)
+    if extractor is None and any(c["hash"] not in cache for c in chunks):
+        extractor = GeminiExtractor()
+
+    results = extract_chunks(chunks, extractor, cache)
+    save_chunk_cache(cache, cache_file)
+
+    failed = len(chunks) - sum(1 for c in chunks if c["hash"] in results)
+    if failed:
+        # A partial rebuild would drop every term of the failed chunks
+        print(f"Error: {failed} chunk(s) failed; keeping {rules_file} unchanged. Re-run to retry them.")
+        return None
+
+    rules = build_rules(chunks, results)
+    with open(rules_file, "w", encoding="utf-8") as f:
+        json.dump(rules, f, ensure_ascii=False, indent=4)
+    print(f"Successfully saved {rules_file} "
+          f"({len(rules['allowed_words'])} allowed, {len(rules['forbidden_words'])} forbidden)")
+    return rules
+
 
 if __name__ == "__main__":
     process_compliance()
@@ -0,0 +1,264 @@
+"""
+Compiled product catalog.
+
+Parses product_data.csv (marketplace exports with raw HTML descriptions) and
+the `Products Data/*.txt` files once into a compact artifact: HTML-stripped
+text, normalized Thai, extracted keywords and token ids. The artifact is
+pickled and reused until a source file changes; a changed mtime alone only
+triggers a content-hash check, not a rebuild.
+"""
+
+import csv
+import hashlib
+import os
+import pickle
+import sys
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from text_utils import normalize_text, html_to_text, tokenize, extract_keywords
+
+DEFAULT_CATALOG_PATH = "product_catalog.pkl"
+
+# Bump when the compiled layout or tokenization changes.
+_CATALOG_VERSION = 3
+
+# Marketplace exports can carry very large HTML descriptions
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+
+def row_to_product(row: Dict[str, str]) -> Optional[Dict]:
+    """Maps a CSV row with flexible column names to a product dict (raw content)."""
+    name = row.get('Product Name') or row.get('name') or row.get('title') or row.get('product_name')
+    if not name:
+        return None
+    content = row.get('Description') or row.get('description') or row.get('content') or row.get('product_description') or ""
+    keywords = row.get('Keywords') or row.get('keywords') or ""
+    product = {
+        'id': row.get('product_id') or row.get('id') or "",
+        'name': name.strip(),
+        'content': content.strip(),
+        'keywords': [k.strip() for k in keywords.split(',')] if keywords else []
+    }
+    # Optional rotation weight (a weight of 2 is posted twice as often)
+    weight = row.get('Weight') or row.get('weight')
+    if weight:
+        try:
+            product['weight'] = float(weight)
+        except ValueError:
+            pass
+    return product
+
+
+class ProductCatalog:
+    """
+    In-memory view of the compiled catalog.
+
+    Each product is a dict with `name`, `content` (plain text), `keywords`,
+    `source` ('csv' or the .txt path), `key` (the post_history.json key) and
+    `text` (normalized name + content for matching). Token ids index into
+    `vocab` and are kept in one flat array with per-product offsets, with the
+    term frequency of each token in `token_counts`.
+    """
+
+    def __init__(self, products: List[Dict], vocab: List[str], token_ids: array,
+                 token_counts: array, offsets: array):
+        self.products = products
+        self.vocab = vocab
+        self.token_ids = token_ids
+        self.token_counts = token_counts
+        self.offsets = offsets
+        self._vocab_index = None
+        self._ranker = None
+
+    def __getstate__(self):
+        # Derived lookups are rebuilt on demand rather than pickled
+        state = dict(self.__dict__)
+        state['_vocab_index'] = None
+        state['_ranker'] = None
+        return state
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    @property
+    def vocab_index(self) -> Dict[str, int]:
+        if self._vocab_index is None:
+            self._vocab_index = {t: i for i, t in enumerate(self.vocab)}
+        return self._vocab_index
+
+    @property
+    def ranker(self):
+        """BM25 ranker over the catalog, built on first use."""
+        if self._ranker is None:
+            from product_ranker import BM25Ranker
+            self._ranker = BM25Ranker(self)
+        return self._ranker
+
+    def rank(self, query_terms: Iterable[str], k: int = 5, source: Optional[str] = None):
+        """Returns up to `k` (product, score) pairs for the query, best first."""
+        return self.ranker.rank(query_terms, k=k, source=source)
+
+    def csv_products(self) -> List[Dict]:
+        return [p for p in self.products if p['source'] == 'csv']
+
+    def file_products(self) -> List[Dict]:
+        return [p for p in self.products if p['source'] != 'csv']
+
+    def token_set(self, index: int) -> frozenset:
+        """Token ids of the product at `index`."""
+        return frozenset(self.token_ids[self.offsets[index]:self.offsets[index + 1]])
+
+    def best_match(self, keywords: Iterable[str], products: Optional[List[Dict]] = None):
+        """Returns (product, score) with the highest keyword score, or (None, 0)."""
+        keywords = [normalize_text(kw, strip_html=False).text for kw in keywords or [] if kw]
+        best, best_score = None, 0
+        for p in (products if products is not None else self.products):
+            score = sum(1 for kw in keywords if kw and kw in p['text'])
+            if score > best_score:
+                best, best_score = p, score
+        return best, best_score
+
+
+def _source_files(csv_path: str, data_dir: str) -> List[str]:
+    files = [csv_path] if os.path.exists(csv_path) else []
+    if os.path.isdir(data_dir):
+        files.extend(sorted(os.path.join(data_dir, f) for f in os.listdir(data_dir) if f.endswith(".txt")))
+    return files
+
+
+def _signature(files: List[str]) -> List[tuple]:
+    sig = []
+    for path in files:
+        st = os.stat(path)
+        sig.append((path, st.st_size, st.st_mtime_ns))
+    return sig
+
+
+def _content_hash(files: List[str]) -> str:
+    digest = hashlib.sha256(str(_CATALOG_VERSION).encode())
+    for path in files:
+        digest.update(path.encode('utf-8'))
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _iter_source_products(csv_path: str, data_dir: str):
+    if os.path.exists(csv_path):
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                product = row_to_product(row)
+                if product:
+                    product['source'] = 'csv'
+                    product['key'] = f"CSV:{product['name']}"
+                    yield product
+    if os.path.isdir(data_dir):
+        for fname in sorted(os.listdir(data_dir)):
+            if not fname.endswith(".txt"):
+                continue
+            path = os.path.join(data_dir, fname)
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            lines = content.strip().split("\n")
+            yield {
+                'id': fname,
+                'name': lines[0].strip() if lines else fname,
+                'content': content,
+                'keywords': [],
+                'source': path,
+                'key': fname,
+            }
+
+
+def compile_catalog(csv_path: str = "product_data.csv", data_dir: str = "Products Data") -> ProductCatalog:
+    """Parses all product sources into a ProductCatalog."""
+    products = []
+    vocab: List[str] = []
+    vocab_index: Dict[str, int] = {}
+    token_ids = array('I')
+    token_counts = array('I')
+    offsets = array('I', [0])
+
+    for raw in _iter_source_products(csv_path, data_dir):
+        # CSV descriptions are marketplace HTML; .txt files are plain text
+        content = html_to_text(raw['content']) if raw['source'] == 'csv' else raw['content']
+        keywords = raw['keywords'] or extract_keywords(raw['name'])
+        text = normalize_text(f"{raw['name']} {content}", strip_html=False).text
+        products.append({
+            'id': raw['id'],
+            'name': raw['name'],
+            'content': content,
+            'keywords': keywords,
+            'source': raw['source'],
+            'key': raw['key'],
+            'text': text,
+        })
+        if 'weight' in raw:
+            products[-1]['weight'] = raw['weight']
+        counts = Counter()
+        for token in tokenize(text):
+            tid = vocab_index.get(token)
+            if tid is None:
+                tid = vocab_index[token] = len(vocab)
+                vocab.append(token)
+            counts[tid] += 1
+        for tid in sorted(counts):
+            token_ids.append(tid)
+            token_counts.append(counts[tid])
+        offsets.append(len(token_ids))
+
+    return ProductCatalog(products, vocab, token_ids, token_counts, offsets)
+
+
+def load_catalog(csv_path: str = "product_data.csv", data_dir: str = "Products Data",
+                 catalog_path: Optional[str] = DEFAULT_CATALOG_PATH) -> ProductCatalog:
+    """
+    Loads the compiled catalog, rebuilding it only when the sources changed.
+
+    The stored (path, size, mtime) signature is checked first; if it differs,
+    the sources are hashed and the catalog is rebuilt only when the content
+    hash differs too.
+    """
+    files = _source_files(csv_path, data_dir)
+    signature = _signature(files)
+    cached = None
+    if catalog_path and os.path.exists(catalog_path):
+        try:
+            with open(catalog_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('version') != _CATALOG_VERSION:
+                cached = None
+        except Exception as e:
+            print(f"ProductCatalog: Ignoring unreadable catalog {catalog_path}: {e}")
+            cached = None
+
+    if cached and cached['signature'] == signature:
+        return cached['catalog']
+
+    source_hash = _content_hash(files)
+    if cached and cached['source_hash'] == source_hash:
+        catalog = cached['catalog']
+    else:
+        print(f"ProductCatalog: Compiling catalog from {len(files)} source file(s)...")
+        catalog = compile_catalog(csv_path, data_dir)
+
+    if catalog_path:
+        try:
+            tmp_path = f"{catalog_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({
+                    'version': _CATALOG_VERSION,
+                    'signature': signature,
+                    'source_hash': source_hash,
+                    'catalog': catalog,
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, catalog_path)
+        except Exception as e:
+            print(f"ProductCatalog: Could not save catalog: {e}")
+    return catalog
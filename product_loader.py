@@ -1,9 +1,16 @@
 import os
 import re
+import csv
+import heapq
+
+from product_catalog import load_catalog, row_to_product, DEFAULT_CATALOG_PATH
+from text_utils import html_to_text
 
 class ProductLoader:
     def __init__(self, data_dir="Products Data"):
         self.data_dir = data_dir
+        self._catalog = None
+        self._vectors = None
 
     def get_product_files(self):
         """Returns a list of .txt files in the data directory."""
@@ -34,31 +41,101 @@ class ProductLoader:
 
     def load_products_from_csv(self, csv_path="product_data.csv"):
         """Loads products from a CSV file."""
-        import csv
-        products = []
         if not os.path.exists(csv_path):
             print(f"CSV file not found: {csv_path}")
-            return products
-        
+            return []
+        return list(self.iter_products_from_csv(csv_path, clean_html=False))
+
+    def iter_products_from_csv(self, csv_path="product_data.csv", fields=None, predicate=None, clean_html=True):
+        """
+        Streams products from a CSV file one row at a time, so memory stays
+        flat regardless of the export size.
+
+        `clean_html` converts each row's HTML description to text as it is
+        read, `predicate(product)` filters rows, and `fields` projects each
+        product down to the given keys (the HTML cleanup is skipped when
+        'content' is not requested).
+        """
+        if not os.path.exists(csv_path):
+            return
+        clean = clean_html and (fields is None or 'content' in fields)
         try:
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Flexible column names
-                    name = row.get('Product Name') or row.get('name') or row.get('title') or row.get('product_name')
-                    content = row.get('Description') or row.get('description') or row.get('content') or row.get('product_description') or ""
-                    keywords = row.get('Keywords') or row.get('keywords') or ""
-                    
-                    if name:
-                        products.append({
-                            'name': name.strip(),
-                            'content': content.strip(),
-                            'keywords': [k.strip() for k in keywords.split(',')] if keywords else []
-                        })
+            with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    product = row_to_product(row)
+                    if not product:
+                        continue
+                    if clean:
+                        product['content'] = html_to_text(product['content'])
+                    if predicate and not predicate(product):
+                        continue
+                    if fields:
+                        product = {k: product[k] for k in fields if k in product}
+                    yield product
         except Exception as e:
             print(f"Error reading CSV {csv_path}: {e}")
-        
-        return products
+
+    def top_products(self, key, k=10, csv_path="product_data.csv", **kwargs):
+        """
+        Returns the `k` products with the largest `key(product)` while
+        streaming the CSV; only `k` products are held at any time. Extra
+        arguments are passed to `iter_products_from_csv`.
+        """
+        return heapq.nlargest(k, self.iter_products_from_csv(csv_path, **kwargs), key=key)
+
+    def load_catalog(self, csv_path="product_data.csv", catalog_path=DEFAULT_CATALOG_PATH):
+        """
+        Returns the compiled ProductCatalog for the CSV and the data directory,
+        rebuilding the cached artifact only when a source file changed.
+        """
+        self._catalog = load_catalog(csv_path, self.data_dir, catalog_path=catalog_path)
+        return self._catalog
+
+    def rank_products(self, query_terms, k=5, source=None):
+        """
+        Ranks catalog products against the query terms with BM25.
+        Returns up to `k` (product, score) pairs, best first; `source`
+        restricts results to 'csv' or 'file' products.
+        """
+        if self._catalog is None:
+            self.load_catalog()
+        return self._catalog.rank(query_terms, k=k, source=source)
+
+    def product_vectors(self):
+        """The product VectorIndex, synced with the catalog (only changed products are re-embedded)."""
+        if self._vectors is None:
+            from vector_index import VectorIndex
+            if self._catalog is None:
+                self.load_catalog()
+            self._vectors = VectorIndex("products")
+            self._vectors.update({
+                p['key']: (f"{p['name']}\n{p['content'][:4000]}", {'name': p['name']})
+                for p in self._catalog.products
+            }, prune=True)
+        return self._vectors
+
+    def match_products(self, query_terms, k=5, source=None, rrf_k=60):
+        """
+        Combines BM25 and embedding similarity with reciprocal rank fusion, so
+        a product is found by either shared keywords or related meaning.
+        Returns up to `k` (product, fused score) pairs, best first.
+        """
+        query_terms = [q for q in query_terms if q]
+        lexical = self.rank_products(query_terms, k=k * 4, source=source)
+        by_key = {p['key']: p for p in self._catalog.products
+                  if not source or (p['source'] == 'csv') == (source == 'csv')}
+        semantic = []
+        try:
+            semantic = self.product_vectors().search(' '.join(query_terms), k=k * 4, ids=by_key)
+        except Exception as e:
+            print(f"ProductLoader: Semantic matching unavailable: {e}")
+
+        fused = {}
+        for ranked in (lexical, [(by_key[item['id']], score) for item, score in semantic if item['id'] in by_key]):
+            for rank, (product, _) in enumerate(ranked):
+                fused[product['key']] = fused.get(product['key'], 0.0) + 1.0 / (rrf_k + rank + 1)
+        best = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:k]
+        return [(by_key[key], score) for key, score in best]
 
 if __name__ == "__main__":
     loader = ProductLoader()
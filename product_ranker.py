@@ -0,0 +1,77 @@
+"""
+BM25 ranking over the compiled product catalog.
+
+Postings are laid out term-major in NumPy arrays with the BM25 weight of each
+(term, product) pair precomputed, so scoring a query is a gather over the
+query's postings plus one `bincount` — no per-product Python loop.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from text_utils import tokenize
+
+
+class BM25Ranker:
+    def __init__(self, catalog, k1: float = 1.2, b: float = 0.75):
+        self.catalog = catalog
+        n_docs = len(catalog.products)
+        offsets = np.frombuffer(catalog.offsets, dtype=np.uint32).astype(np.int64)
+        term_ids = np.frombuffer(catalog.token_ids, dtype=np.uint32).astype(np.int64)
+        tf = np.frombuffer(catalog.token_counts, dtype=np.uint32).astype(np.float64)
+        doc_ids = np.repeat(np.arange(n_docs), np.diff(offsets))
+
+        doc_len = np.bincount(doc_ids, weights=tf, minlength=n_docs)
+        avg_len = doc_len.mean() if n_docs else 0.0
+        df = np.bincount(term_ids, minlength=len(catalog.vocab))
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        norm = k1 * (1 - b + b * doc_len[doc_ids] / avg_len) if avg_len else k1
+        weights = idf[term_ids] * tf * (k1 + 1) / (tf + norm)
+
+        order = np.argsort(term_ids, kind='stable')
+        self.post_docs = doc_ids[order]
+        self.post_weights = weights[order]
+        self.term_ptr = np.concatenate(([0], np.cumsum(df)))
+        self.n_docs = n_docs
+        self._source_masks: Dict[str, np.ndarray] = {}
+
+    def _source_mask(self, source: str) -> np.ndarray:
+        mask = self._source_masks.get(source)
+        if mask is None:
+            if source == 'file':
+                mask = np.array([p['source'] != 'csv' for p in self.catalog.products], dtype=bool)
+            else:
+                mask = np.array([p['source'] == source for p in self.catalog.products], dtype=bool)
+            self._source_masks[source] = mask
+        return mask
+
+    def scores(self, query_terms: Iterable[str]) -> np.ndarray:
+        """BM25 score of every product for the query terms."""
+        vocab_index = self.catalog.vocab_index
+        tids = [vocab_index[t] for t in tokenize(' '.join(q for q in query_terms if q)) if t in vocab_index]
+        if not tids:
+            return np.zeros(self.n_docs)
+        # Repeated query tokens count once per occurrence
+        tids = np.asarray(tids)
+        starts, ends = self.term_ptr[tids], self.term_ptr[tids + 1]
+        lengths = ends - starts
+        idx = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.bincount(self.post_docs[idx], weights=self.post_weights[idx], minlength=self.n_docs)
+
+    def rank(self, query_terms: Iterable[str], k: int = 5,
+             source: Optional[str] = None) -> List[Tuple[Dict, float]]:
+        """
+        Returns up to `k` (product, score) pairs with a positive score, best
+        first. `source` restricts results to 'csv' or 'file' products.
+        """
+        scores = self.scores(query_terms)
+        if source:
+            scores = np.where(self._source_mask(source), scores, 0.0)
+        k = min(k, self.n_docs)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.catalog.products[i], float(scores[i])) for i in top if scores[i] > 0]
@@ -0,0 +1,83 @@
+"""
+History-aware fair rotation over the product catalog.
+
+Per-product stats (post count, last posted time, optional weight) are kept in
+post_history.json under `__product_stats__` and seeded from the existing
+per-product timestamps. Products sit in a heap ordered by
+(posts / weight, last posted), so every product is posted once before any
+is posted twice (weight 2 allows twice as many posts), and trend matches are
+preferred only among the products whose turn it is.
+"""
+
+import heapq
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+STATS_KEY = "__product_stats__"
+NEVER = "0000-00-00T00:00:00"
+
+
+class ProductScheduler:
+    def __init__(self, history: Dict, keys: Iterable[str], weights: Optional[Dict[str, float]] = None):
+        """
+        `history` is the post_history.json dict (its stats entry is updated
+        in place), `keys` the history keys of the products to rotate.
+        """
+        self.history = history
+        self.stats = history.setdefault(STATS_KEY, {})
+        self.keys = list(dict.fromkeys(keys))
+        self._members = set(self.keys)
+        for key in self.keys:
+            entry = self.stats.get(key)
+            if entry is None:
+                last = history.get(key)
+                entry = self.stats[key] = {"count": 1 if last else 0, "last_posted": last or NEVER}
+            if weights and weights.get(key):
+                entry["weight"] = float(weights[key])
+        self._heap = [self._entry(key) for key in self.keys]
+        heapq.heapify(self._heap)
+
+    def _level(self, key: str) -> int:
+        entry = self.stats[key]
+        return int(entry["count"] // max(entry.get("weight", 1.0), 1e-9))
+
+    def _entry(self, key: str):
+        return (self._level(key), self.stats[key]["last_posted"], key)
+
+    def _top(self):
+        # record_post pushes a fresh entry; outdated ones are dropped lazily here
+        while self._heap and self._heap[0] != self._entry(self._heap[0][2]):
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def next_product(self, ranked_keys: Optional[List[str]] = None) -> Optional[str]:
+        """
+        Returns the key of the product to post next. `ranked_keys` are
+        trend-matched products, best first; the best one whose turn it is
+        (lowest rotation level) wins, otherwise the least recently posted
+        product at that level is chosen.
+        """
+        top = self._top()
+        if top is None:
+            return None
+        for key in ranked_keys or []:
+            if key in self._members and self._level(key) == top[0]:
+                return key
+        return top[2]
+
+    def record_post(self, key: str, when: Optional[str] = None):
+        """Marks a product as posted; O(log n)."""
+        when = when or datetime.now().isoformat()
+        entry = self.stats.setdefault(key, {"count": 0, "last_posted": NEVER})
+        entry["count"] += 1
+        entry["last_posted"] = when
+        self.history[key] = when
+        if key in self._members:
+            heapq.heappush(self._heap, self._entry(key))
+
+    def upcoming(self, n: int = 5) -> List[str]:
+        """The next `n` products in rotation order (without trend preference)."""
+        return [key for _, _, key in heapq.nsmallest(n, (self._entry(k) for k in self.keys))]
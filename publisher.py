@@ -1,44 +1,89 @@
-import requests
-import base64
 import os
 import json
+import threading
 from datetime import datetime
 
+from http_client import get_session
+from media_pipeline import MediaPipeline
+
 class WordPressPublisher:
     def __init__(self, wp_url, wp_user, wp_password):
         self.wp_url = wp_url.rstrip('/')
         self.auth = (wp_user, wp_password)
         self.api_url = f"{self.wp_url}/wp-json/wp/v2"
+        # Pooled keep-alive session shared with YoastSEOIntegrator (auth is pre-set)
+        self.session = get_session(self.wp_url, wp_user, wp_password)
+        # Optional PostMirror kept up to date with successful writes
+        self.mirror = None
+        # Updates skipped because they matched the mirror's last-known state
+        self.skipped_writes = 0
+        # Maintenance workers and the BatchWriter check fields concurrently
+        self._skipped_lock = threading.Lock()
+        self._media = None
+        self._media_lock = threading.Lock()
+
+    @property
+    def media(self):
+        """The media pipeline (typing, transcoding, hash dedupe), created once on first use."""
+        if self._media is None:
+            with self._media_lock:
+                if self._media is None:
+                    self._media = MediaPipeline(self)
+        return self._media
 
     def upload_media(self, image_path, title=None):
-        """Uploads an image to WordPress."""
-        media_url = f"{self.api_url}/media"
-        
+        """Uploads an image to WordPress, reusing an existing attachment for identical bytes."""
         try:
             with open(image_path, 'rb') as img:
-                headers = {
-                    'Content-Disposition': f'attachment; filename="{os.path.basename(image_path)}"',
-                    'Content-Type': 'image/jpeg' # Adjust based on file type if needed
-                }
-                
-                response = requests.post(
-                    media_url, 
-                    auth=self.auth, 
-                    headers=headers, 
-                    data=img
-                )
-                
-                if response.status_code == 201:
-                    data = response.json()
-                    print(f"Image uploaded successfully: {data['source_url']}")
-                    return data['id']
-                else:
-                    print(f"Failed to upload image: {response.text}")
-                    return None
+                data = img.read()
+            return self.upload_media_bytes(data, title=title, filename=os.path.basename(image_path))
         except Exception as e:
             print(f"Error uploading media: {e}")
             return None
 
+    def upload_media_bytes(self, data, title=None, filename=None):
+        """Uploads image bytes through the media pipeline; returns the attachment id."""
+        return self.media.upload(data, title=title, filename=filename)
+
+    def send_media(self, data, filename, content_type, title=None, description=None):
+        """Creates a media attachment from raw bytes; returns the attachment JSON or None."""
+        media_url = f"{self.api_url}/media"
+        headers = {
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Content-Type': content_type
+        }
+        params = {k: v for k, v in {'title': title, 'alt_text': title, 'description': description}.items() if v}
+        # Bytes (not a file handle) so a retried request can resend the body
+        response = self.session.post(media_url, headers=headers, data=data, params=params)
+        if response.status_code == 201:
+            media = response.json()
+            print(f"Image uploaded successfully: {media['source_url']}")
+            return media
+        print(f"Failed to upload image: {response.text}")
+        return None
+
+    def find_media(self, search):
+        """Searches the media library (title, caption, description); returns [{id, source_url}]."""
+        try:
+            response = self.session.get(f"{self.api_url}/media",
+                                        params={'search': search, 'per_page': 5, '_fields': 'id,source_url'})
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            print(f"Media search failed: {e}")
+        return []
+
+    def media_exists(self, media_id):
+        """True/False if the attachment exists or not; None when the lookup failed."""
+        try:
+            response = self.session.get(f"{self.api_url}/media/{media_id}", params={'_fields': 'id'})
+            if response.status_code == 404:
+                return False
+            return response.status_code == 200 or None
+        except Exception as e:
+            print(f"Media lookup failed: {e}")
+            return None
+
     def create_post(self, title, content, status='draft', category_ids=None, tag_ids=None, featured_media_id=None, slug=None, seo_data=None, date=None):
         """Creates a new WordPress post with SEO data."""
         post_url = f"{self.api_url}/posts"
@@ -70,7 +115,7 @@ class WordPressPublisher:
         try:
             print(f"Creating post with data: {json.dumps({k: v for k, v in data.items() if k != 'content'}, indent=2)}")
             print(f"Content length: {len(content)} characters")
-            response = requests.post(post_url, auth=self.auth, json=data)
+            response = self.session.post(post_url, json=data)
             
             if response.status_code == 201:
                 post_data = response.json()
@@ -78,6 +123,8 @@ class WordPressPublisher:
                 print(f"Post ID: {post_data['id']}")
                 print(f"Post status: {post_data.get('status', 'unknown')}")
                 print(f"Post date: {post_data.get('date', 'unknown')}")
+                if self.mirror:
+                    self.mirror.upsert_posts([post_data])
                 return post_data['id']
             else:
                 print(f"Failed to create post: {response.status_code}")
@@ -87,10 +134,31 @@ class WordPressPublisher:
             print(f"Error creating post: {e}")
             return None
 
-    def get_posts(self, per_page=10, page=1):
-        url = f"{self.api_url}/posts?per_page={per_page}&page={page}"
+    def _post_query(self, per_page, page, fields=None, context=None, status=None,
+                    after=None, before=None, modified_after=None, orderby=None, order=None, search=None):
+        params = {'per_page': per_page, 'page': page}
+        if fields:
+            # _fields projection: WordPress only renders and sends these keys
+            params['_fields'] = fields if isinstance(fields, str) else ','.join(fields)
+        optional = {
+            'context': context, 'status': status, 'after': after, 'before': before,
+            'modified_after': modified_after, 'orderby': orderby, 'order': order, 'search': search,
+        }
+        params.update({k: v for k, v in optional.items() if v})
+        return params
+
+    def get_posts(self, per_page=10, page=1, fields=None, context=None, status=None,
+                  after=None, before=None, modified_after=None, orderby=None, order=None, search=None):
+        """
+        Lists posts. `fields` (e.g. ('id', 'title', 'link')) limits the
+        response to those keys and `context='embed'` asks for the light
+        representation; `status`, `after`/`before`/`modified_after` (ISO 8601)
+        and `orderby`/`order`/`search` filter and sort on the server.
+        """
         try:
-            response = requests.get(url, auth=self.auth)
+            response = self.fetch_posts_page(page, per_page, fields=fields, context=context, status=status,
+                                             after=after, before=before, modified_after=modified_after,
+                                             orderby=orderby, order=order, search=search)
             if response.status_code == 200:
                 return response.json()
             else:
@@ -100,12 +168,63 @@ class WordPressPublisher:
             print(f"Fetcher Exception: {e}")
             return []
 
+    def fetch_posts_page(self, page=1, per_page=100, headers=None, **filters):
+        """Requests one page of posts and returns the raw response (for headers and 304s)."""
+        return self.session.get(f"{self.api_url}/posts", params=self._post_query(per_page, page, **filters),
+                                headers=headers)
+
+    def iter_posts(self, per_page=100, **filters):
+        """
+        Yields posts across all pages (same filters as get_posts), stopping
+        at X-WP-TotalPages instead of probing for an empty page.
+        """
+        page = 1
+        total_pages = None
+        while total_pages is None or page <= total_pages:
+            try:
+                response = self.fetch_posts_page(page, per_page, **filters)
+            except Exception as e:
+                print(f"Fetcher Exception: {e}")
+                return
+            if response.status_code != 200:
+                # WordPress answers 400 for a page past the end
+                if response.status_code != 400:
+                    print(f"Error fetching posts: {response.status_code}")
+                return
+            posts = response.json()
+            if not posts:
+                return
+            yield from posts
+            total_pages = int(response.headers.get('X-WP-TotalPages') or page)
+            page += 1
+
+    def changed_fields(self, post_id, data):
+        """
+        Drops the fields of an update that already match the last-known server
+        state in the mirror (everything is kept without one). An empty result
+        means the write can be skipped; such writes are counted in
+        `skipped_writes`.
+        """
+        if self.mirror is None:
+            return data
+        changed = self.mirror.changed_fields(post_id, data)
+        if not changed:
+            with self._skipped_lock:
+                self.skipped_writes += 1
+        return changed
+
     def update_post(self, post_id, data):
         url = f"{self.api_url}/posts/{post_id}"
+        data = self.changed_fields(post_id, data)
+        if not data:
+            print(f"Post {post_id} unchanged, skipping update.")
+            return True
         try:
             # WordPress REST API expects POST for updates with ID in URL
-            response = requests.post(url, json=data, auth=self.auth)
+            response = self.session.post(url, json=data)
             if response.status_code == 200:
+                if self.mirror:
+                    self.mirror.apply_update(post_id, data)
                 return True
             else:
                 print(f"Error updating post {post_id}: {response.status_code}")
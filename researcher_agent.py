@@ -4,19 +4,21 @@ from dotenv import load_dotenv
 from vertex_utils import create_vertex_model, get_model_name_from_env, call_vertex_with_retry
 
 class ResearcherAgent:
-    def __init__(self):
+    def __init__(self, model=None):
+        """`model` is a shared search-grounded model (see agent_runtime); created here if not given."""
         load_dotenv()
         self.model_name = get_model_name_from_env("gemini-2.0-flash-exp")
 
-        # Validate Vertex AI configuration
-        project = os.getenv("GOOGLE_CLOUD_PROJECT")
-        if not project:
-            raise ValueError("GOOGLE_CLOUD_PROJECT not found in .env. "
-                           "Please set your Google Cloud Project ID.")
-
         # Enable Google Search Grounding for research
         self.use_search_tool = True
-        self.model = create_vertex_model(self.model_name, use_search_tool=self.use_search_tool)
+        if model is None:
+            # Validate Vertex AI configuration
+            project = os.getenv("GOOGLE_CLOUD_PROJECT")
+            if not project:
+                raise ValueError("GOOGLE_CLOUD_PROJECT not found in .env. "
+                               "Please set your Google Cloud Project ID.")
+            model = create_vertex_model(self.model_name, use_search_tool=self.use_search_tool)
+        self.model = model
 
     def update_model(self, model_name):
         """Updates the underlying Vertex AI model."""
@@ -2,45 +2,117 @@ import os
 import json
 from dotenv import load_dotenv
 from vertex_utils import create_vertex_model, get_model_name_from_env, call_vertex_with_retry
+from compliance_matcher import get_compliance_matcher, summarize_matches
+from content_linter import ContentLinter
+from text_utils import normalize_text
+from agent_runtime import load_json_config
+
+# Always included in the prompt, whether or not the article mentions them
+CORE_FORBIDDEN_WORDS = ["รักษา", "หายขาด", "รักษาได้หายดี", "ที่สุด", "ดีที่สุด", "อันดับ 1"]
+CORE_ALLOWED_WORDS = ["แลดูกระจ่างใส", "ผิวเรียบเนียน", "ช่วยปกป้องผิวจากอนุมูลอิสระ"]
 
 class ReviewerAgent:
-    def __init__(self):
+    def __init__(self, model=None, compliance_rules=None, matcher=None):
+        """Anything not injected (see agent_runtime) is created or loaded here."""
         load_dotenv()
         self.model_name = get_model_name_from_env("gemini-2.0-flash-exp")
 
-        # Validate Vertex AI configuration
-        project = os.getenv("GOOGLE_CLOUD_PROJECT")
-        if not project:
-            raise ValueError("GOOGLE_CLOUD_PROJECT not found in .env. "
-                           "Please set your Google Cloud Project ID.")
-
-        self.model = create_vertex_model(self.model_name)
+        if model is None:
+            # Validate Vertex AI configuration
+            project = os.getenv("GOOGLE_CLOUD_PROJECT")
+            if not project:
+                raise ValueError("GOOGLE_CLOUD_PROJECT not found in .env. "
+                               "Please set your Google Cloud Project ID.")
+            model = create_vertex_model(self.model_name)
+        self.model = model
 
         # Load compliance rules
-        self.compliance_rules = {}
-        if os.path.exists("compliance_rules.json"):
-            with open("compliance_rules.json", "r", encoding="utf-8") as f:
-                self.compliance_rules = json.load(f)
-        
+        self.compliance_rules = compliance_rules if compliance_rules is not None else load_json_config("compliance_rules.json")
+        self.matcher = matcher or get_compliance_matcher()
+        self.linter = ContentLinter(self.matcher)
+        # Opt-in: approve lint-clean drafts without the LLM's semantic review
+        self.skip_llm_when_clean = os.getenv("REVIEW_SKIP_LLM_WHEN_CLEAN", "false").lower() == "true"
+
     def update_model(self, model_name):
         """Updates the underlying Vertex AI model."""
         self.model_name = model_name
         self.model = create_vertex_model(model_name)
         print(f"Reviewer: Model updated to {model_name}")
 
-    def review_article(self, article):
+    def review_article(self, article, force_llm=False):
         """
         Audits the article for compliance, scientific accuracy, and style.
+
+        Mechanical checks run locally first. Drafts that fail them are auto-fixed
+        and re-linted; if they still fail, the lint result is returned without an
+        LLM call. Drafts that pass go to the LLM for the semantic review (medical
+        claims, soft sell, scientific accuracy); with REVIEW_SKIP_LLM_WHEN_CLEAN=true
+        drafts without lint warnings are approved locally unless `force_llm` is set.
+        If an auto-fix was applied, the fixed article is returned as `fixed_article`.
         """
+        lint = self.linter.lint(article)
+        fixed_article = None
+        if lint['status'] != 'approved':
+            candidate, changed = self.linter.auto_fix(article)
+            if changed:
+                print("Reviewer: Applied local auto-fixes, re-linting...")
+                lint = self.linter.lint(candidate)
+                fixed_article = candidate
+                article = candidate
+
+        if lint['status'] != 'approved':
+            print(f"Reviewer: Local checks failed: {lint['lint_errors']}")
+            return self._with_fixed_article(lint, fixed_article)
+        if self.skip_llm_when_clean and not lint['needs_semantic_review'] and not force_llm:
+            print("Reviewer: Local checks passed, skipping LLM review.")
+            return self._with_fixed_article(lint, fixed_article)
+
+        return self._with_fixed_article(self._review_with_llm(article), fixed_article)
+
+    def _with_fixed_article(self, result, fixed_article):
+        if result is not None and fixed_article is not None:
+            result['fixed_article'] = fixed_article
+        return result
+
+    def _compliance_context(self, article):
+        """
+        Returns (forbidden, allowed) terms worth showing the LLM: the core rules
+        plus every term the matcher finds in the article exactly or as a
+        near-match, instead of the full rule lists.
+        """
+        text = f"<h1>{article.get('title') or ''}</h1>{article.get('content_html') or ''}"
+        relevant = self.matcher.relevant_terms(text, ['forbidden', 'allowed'])
+
+        def clean(terms):
+            # Rule terms carry PDF glyphs; show their normalized form, deduplicated
+            return list(dict.fromkeys(normalize_text(t, strip_html=False).text for t in terms))
+
+        return (clean(CORE_FORBIDDEN_WORDS + relevant['forbidden']),
+                clean(CORE_ALLOWED_WORDS + relevant['allowed']))
+
+    def _review_with_llm(self, article):
+        """Full LLM editorial and compliance review."""
+        # Reuse the generator's local scan when present, otherwise scan once here
+        compliance_hits = article.get('compliance_hits')
+        if compliance_hits is None:
+            compliance_hits = summarize_matches(
+                self.matcher.scan(article.get('content_html') or '', rules=['forbidden', 'hard_sell'])
+            )
+        forbidden_words, allowed_words = self._compliance_context(article)
+
         prompt = f"""
         You are a Professional Editor and Thai FDA Compliance Officer specializing in skincare education content.
 
         Article Title: {article.get('title')}
         Article Content: {article.get('content_html')}
 
-        Compliance Rules:
-        Allowed Words: {self.compliance_rules.get('allowed_words', [])}
-        Forbidden Words: {self.compliance_rules.get('forbidden_words', [])}
+        Compliance Rules (terms relevant to this article):
+        Allowed Words: {json.dumps(allowed_words, ensure_ascii=False)}
+        Forbidden Words: {json.dumps(forbidden_words, ensure_ascii=False)}
+
+        Local Scan Results (exact matches found in this article):
+        Forbidden Words Found: {compliance_hits.get('forbidden', [])}
+        Hard Sell Phrases Found: {compliance_hits.get('hard_sell', [])}
 
         CRITICAL REVIEW CHECKLIST - Check ALL of the following:
 
@@ -101,7 +173,10 @@ class ReviewerAgent:
             if not response: return None
             print("Reviewer: API Call successful.")
             content = response.text.replace("```json", "").replace("```", "").strip()
-            return json.loads(content)
+            result = json.loads(content)
+            if isinstance(result, dict):
+                result['review_source'] = 'llm'
+            return result
         except Exception as e:
             print(f"Reviewer Error: {e}")
             return None
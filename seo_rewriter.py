@@ -0,0 +1,232 @@
+"""
+Section-chunked SEO rewriting for long maintenance posts.
+
+Instead of sending the first 5000 characters of a post and overwriting the
+whole body with the model's answer, the post is split at its H2 headings
+(over-long sections are split again at block boundaries) and reassembled
+after the rewrite, so nothing past a prompt limit is ever dropped:
+
+  - one "head" call optimizes the title, focus keyphrase, meta description
+    and the intro (the text before the first H2), given the H2 outline;
+  - every other section is scored locally (AI leftovers, hard-sell and
+    forbidden words, ingredient overload, readability) and only flagged
+    sections are sent to the model, each in its own small call;
+  - the head and section calls run concurrently.
+
+A rewritten section is only accepted if it keeps its heading and most of its
+text; otherwise the original section is kept.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from compliance_matcher import summarize_matches
+from post_analyzer import analyze_content
+
+# Posts up to this size without H2 sections still go through one call
+SINGLE_CALL_LIMIT = 5000
+MAX_SECTION_CHARS = 4000
+MIN_READABILITY = 50
+# A rewrite must keep at least this share of the section's text
+MIN_KEPT_RATIO = 0.6
+
+_H2_RE = re.compile(r'<h2[\s>]', re.IGNORECASE)
+_H2_TEXT_RE = re.compile(r'<h2[^>]*>(.*?)</h2\s*>', re.IGNORECASE | re.DOTALL)
+_BLOCK_END_RE = re.compile(r'</(?:p|ul|ol|table|blockquote|h3|h4|figure|div)\s*>', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _text(html: str) -> str:
+    return ' '.join(_TAG_RE.sub(' ', html).split())
+
+
+def _split_long(section: str, limit: int) -> List[str]:
+    """Splits `section` at block ends into pieces of at most ~`limit` chars."""
+    if len(section) <= limit:
+        return [section]
+    pieces = []
+    start = 0
+    cut = 0
+    for match in _BLOCK_END_RE.finditer(section):
+        if match.end() - start > limit and cut > start:
+            pieces.append(section[start:cut])
+            start = cut
+        cut = match.end()
+    if len(section) - start > limit and start < cut < len(section):
+        pieces.append(section[start:cut])
+        start = cut
+    pieces.append(section[start:])
+    return pieces
+
+
+def split_sections(html: str, limit: int = MAX_SECTION_CHARS) -> List[str]:
+    """
+    Splits post HTML into [intro, section, ...] at each <h2>. The pieces
+    concatenate back to `html` exactly; the intro may be empty.
+    """
+    starts = [m.start() for m in _H2_RE.finditer(html)]
+    bounds = [0] + starts + [len(html)]
+    sections = [html[a:b] for a, b in zip(bounds, bounds[1:]) if b > a or a == 0]
+    # An over-long intro keeps its first piece for the head call; the rest become sections
+    result = []
+    for section in sections:
+        result.extend(_split_long(section, limit))
+    return result
+
+
+def parse_json_response(text: str) -> Optional[Dict]:
+    """Parses a model JSON answer, tolerating code fences and surrounding text."""
+    if not text:
+        return None
+    text = text.replace("```json", "").replace("```", "").strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find('{'), text.rfind('}')
+        if start != -1 and end > start:
+            try:
+                return json.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                pass
+    return None
+
+
+class SEORewriter:
+    def __init__(self, generate: Callable[[str], Optional[str]], yoast, matcher,
+                 workers: Optional[int] = None):
+        """
+        `generate` sends a prompt to the model and returns the response text
+        (or None); `yoast` provides calculate_readability_score and `matcher`
+        is the shared compliance matcher.
+        """
+        self.generate = generate
+        self.yoast = yoast
+        self.matcher = matcher
+        self.workers = workers or int(os.getenv("SEO_SECTION_WORKERS", "3"))
+
+    def should_chunk(self, content: str) -> bool:
+        """Posts with H2 sections or too long for one prompt are rewritten per section."""
+        return len(content) > SINGLE_CALL_LIMIT or bool(_H2_RE.search(content))
+
+    def section_issues(self, section: str) -> List[str]:
+        """Local reasons to rewrite a section; empty means keep it as is."""
+        reasons = []
+        analysis = analyze_content(section)
+        if analysis.leftovers or analysis.has_placeholders:
+            reasons.append("remove AI placeholder tags")
+        hits = summarize_matches(self.matcher.scan(section, rules=['hard_sell', 'forbidden']))
+        if hits.get('hard_sell'):
+            reasons.append(f"soften hard-sell wording ({', '.join(hits['hard_sell'])})")
+        if hits.get('forbidden'):
+            reasons.append(f"replace FDA-forbidden claims ({', '.join(hits['forbidden'])})")
+        if analysis.ingredient_overload:
+            reasons.append("mention fewer ingredients")
+        if self.yoast.calculate_readability_score(section) < MIN_READABILITY:
+            reasons.append("shorten sentences and paragraphs for readability")
+        return reasons
+
+    def _head_prompt(self, title, intro, outline, keyphrase, meta_description):
+        return f"""
+        You are a senior SEO editor. Optimize the title, meta data and introduction of this post for 2026.
+        TITLE: {title}
+        CURRENT FOCUS KEYPHRASE: {keyphrase}
+        CURRENT META DESCRIPTION: {meta_description}
+        SECTION HEADINGS (H2): {outline}
+        INTRODUCTION HTML: {intro}
+
+        Return JSON with these exact fields:
+        {{
+            "needs_update": true/false,
+            "corrected_title": "optimized title",
+            "seo_keyphrase": "main keyword",
+            "seo_meta_description": "meta description 150-160 chars",
+            "intro_html": "optimized introduction HTML (keep it as is if it is fine)"
+        }}
+        Do not use markdown formatting.
+        """
+
+    def _section_prompt(self, title, keyphrase, section, reasons):
+        return f"""
+        You are a senior SEO editor. Rewrite ONE section of the post "{title}" (focus keyphrase: {keyphrase}).
+        Fix only these issues: {'; '.join(reasons)}.
+        Keep the same <h2> heading topic, facts and HTML structure; keep the length similar.
+        Soft-sell tone, no placeholders like [image: ...].
+        SECTION HTML: {section}
+
+        Return JSON: {{"section_html": "rewritten section HTML"}}
+        Do not use markdown formatting.
+        """
+
+    @staticmethod
+    def _accept(original: str, new_html: Optional[str]) -> Optional[str]:
+        """Returns `new_html` ready to splice in place of `original`, or None if it loses content."""
+        if not new_html or not new_html.strip():
+            return None
+        if bool(_H2_RE.match(original.lstrip())) != bool(_H2_RE.match(new_html.lstrip())):
+            return None
+        if len(_text(new_html)) < MIN_KEPT_RATIO * len(_text(original)):
+            return None
+        # Keep the separator the section was joined with
+        return new_html.strip() + original[len(original.rstrip()):]
+
+    def _rewrite_section(self, title, keyphrase, section, reasons) -> Optional[str]:
+        res = parse_json_response(self.generate(self._section_prompt(title, keyphrase, section, reasons)))
+        return self._accept(section, (res or {}).get('section_html'))
+
+    def rewrite(self, post: Dict, content: str) -> Optional[Dict]:
+        """
+        Rewrites `content` (the cleaned post HTML) section by section. Returns
+        the same fields as the single-call SEO audit plus `sections_rewritten`,
+        or None if every model call failed.
+        """
+        title = post.get('title', {}).get('rendered', '')
+        meta = post.get('meta') if isinstance(post.get('meta'), dict) else {}
+        keyphrase = meta.get('_yoast_wpseo_focuskw', '')
+        meta_description = meta.get('_yoast_wpseo_metadesc', '')
+
+        sections = split_sections(content)
+        outline = [_text(m.group(1)) for m in _H2_TEXT_RE.finditer(content)]
+        flagged = {}
+        for index, section in enumerate(sections[1:], start=1):
+            reasons = self.section_issues(section)
+            if reasons:
+                flagged[index] = reasons
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            head_future = pool.submit(self.generate, self._head_prompt(
+                title, sections[0], outline, keyphrase or title, meta_description))
+            futures = {index: pool.submit(self._rewrite_section, title, keyphrase or title,
+                                          sections[index], reasons)
+                       for index, reasons in flagged.items()}
+            head = parse_json_response(head_future.result())
+            rewritten = {}
+            for index, future in futures.items():
+                try:
+                    new_section = future.result()
+                except Exception as e:
+                    print(f"  [WARN] Section {index} rewrite failed: {e}")
+                    continue
+                if new_section is not None:
+                    rewritten[index] = new_section
+
+        if head is None and not rewritten:
+            return None
+        head = head or {}
+        intro = self._accept(sections[0], head.get('intro_html')) if head.get('needs_update') else None
+        if intro is not None:
+            sections[0] = intro
+        for index, new_section in rewritten.items():
+            sections[index] = new_section
+
+        return {
+            "needs_update": bool(head.get('needs_update') or rewritten),
+            "corrected_title": head.get('corrected_title') or title,
+            "corrected_content_html": ''.join(sections),
+            "seo_keyphrase": head.get('seo_keyphrase') or keyphrase,
+            "seo_meta_description": head.get('seo_meta_description') or meta_description,
+            "sections_rewritten": len(rewritten),
+            "sections_total": len(sections),
+        }
@@ -76,7 +76,7 @@ def test_publisher_fix():
     
     with open("publisher.py", 'r', encoding='utf-8') as f:
         content = f.read()
-        if "requests.post(url, json=data, auth=self.auth)" in content:
+        if "session.post(url, json=data)" in content:
             print("[OK] Publisher uses POST method for updates (WordPress REST API)")
             return True
         else:
@@ -189,8 +189,8 @@ def test_maintenance_error_handling():
     with open("maintenance_agent.py", 'r', encoding='utf-8') as f:
         content = f.read()
         
-    # Check error handling
-    if 'update_success = self.publisher.update_post' in content and 'try:' in content:
+    # Check error handling (writes are batched; failures are reported per post on flush)
+    if 'writer.flush()' in content and '[FAIL] Post {pid} update failed' in content and 'try:' in content:
         print("[OK] Maintenance has proper error handling")
         error_ok = True
     else:
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+import threading
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_runtime import AgentRuntime
+from maintenance_agent import MaintenanceAgent
+
+ENV = {"GOOGLE_CLOUD_PROJECT": "test-project", "VERTEX_MODEL_NAME": "gemini-2.0-flash-exp",
+       "WP_URL": "http://example.com", "WP_USER": "user", "WP_APP_PASSWORD": "pass"}
+
+class TestAgentRuntime(unittest.TestCase):
+
+    def setUp(self):
+        patchers = [patch.dict(os.environ, ENV),
+                    patch('vertex_utils.create_vertex_model', side_effect=lambda name, **kw: MagicMock(name=name)),
+                    patch('post_mirror.PostMirror')]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch('image_generator.ImageGenerator')
+        self.image_generator_cls = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_agents_built_once_and_share_models_and_configs(self):
+        runtime = AgentRuntime()
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(runtime.generator)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(g) for g in seen}), 1)
+
+        generator, reviewer, researcher = runtime.generator, runtime.reviewer, runtime.researcher
+        self.assertIs(generator.model, reviewer.model)
+        self.assertIsNot(researcher.model, generator.model)
+        self.assertIs(generator.compliance_rules, reviewer.compliance_rules)
+        self.assertIs(generator.matcher, runtime.matcher)
+        self.assertIs(runtime.researcher, researcher)
+
+    def test_maintenance_uses_runtime_and_loads_imagen_lazily(self):
+        runtime = AgentRuntime()
+        agent = MaintenanceAgent(runtime)
+        self.assertIs(agent.publisher, runtime.publisher)
+        self.assertIs(agent.matcher, runtime.matcher)
+        self.image_generator_cls.assert_not_called()
+
+        post = {"id": 1, "title": {"rendered": "Serum"}, "content": {"rendered": "<p>Body</p>"}}
+        with patch('researcher_agent.call_vertex_with_retry', return_value=None), \
+                patch('generator.call_vertex_with_retry', return_value=None):
+            agent._regenerate_post_content(post)
+            agent._regenerate_post_content(post)
+        import vertex_utils
+        # Default model plus the search-grounded research model, however many posts
+        self.assertEqual(vertex_utils.create_vertex_model.call_count, 2)
+
+        self.assertIs(agent.image_gen, agent.image_gen)
+        self.image_generator_cls.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
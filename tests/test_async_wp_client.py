@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+import json
+import asyncio
+
+import httpx
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_wp_client import AsyncWordPressClient, fetch_all_posts_sync, update_posts_sync
+
+TOTAL_POSTS = 45
+
+class FakeWordPress:
+    """httpx transport handler serving paged posts and recording updates."""
+
+    def __init__(self, fail_first=()):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_first = set(fail_first)
+
+    async def __call__(self, request):
+        self.requests.append((request.method, str(request.url)))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+        key = (request.method, request.url.path, request.url.params.get('page'))
+        if key in self.fail_first:
+            self.fail_first.discard(key)
+            return httpx.Response(503 if request.method == 'GET' else 500)
+        if request.method == 'POST':
+            return httpx.Response(200, json={"id": int(request.url.path.rsplit('/', 1)[1])})
+
+        per_page = int(request.url.params['per_page'])
+        page = int(request.url.params['page'])
+        ids = range((page - 1) * per_page + 1, min(page * per_page, TOTAL_POSTS) + 1)
+        pages = -(-TOTAL_POSTS // per_page)
+        return httpx.Response(200, json=[{"id": i} for i in ids], headers={"X-WP-TotalPages": str(pages)})
+
+class TestAsyncWordPressClient(unittest.TestCase):
+
+    def test_fetches_remaining_pages_concurrently(self):
+        wp = FakeWordPress(fail_first=[('GET', '/wp-json/wp/v2/posts', '3')])
+        posts = fetch_all_posts_sync("https://example.com", "user", "pass", per_page=10,
+                                     max_concurrency=4, backoff=0, transport=httpx.MockTransport(wp))
+        self.assertEqual([p['id'] for p in posts], list(range(1, TOTAL_POSTS + 1)))
+        self.assertEqual(len(wp.requests), 6)  # 5 pages + one retried 503
+        self.assertGreater(wp.max_in_flight, 1)
+        self.assertLessEqual(wp.max_in_flight, 4)
+
+    def test_concurrent_updates_do_not_retry_post_errors(self):
+        wp = FakeWordPress(fail_first=[('POST', '/wp-json/wp/v2/posts/2', None)])
+        results = update_posts_sync("https://example.com", "user", "pass",
+                                    {1: {"title": "a"}, 2: {"title": "b"}, 3: {"title": "c"}},
+                                    transport=httpx.MockTransport(wp))
+        self.assertEqual(results, {1: True, 2: False, 3: True})
+        self.assertEqual(len(wp.requests), 3)
+
+if __name__ == '__main__':
+    unittest.main()
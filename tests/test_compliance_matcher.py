@@ -0,0 +1,81 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compliance_matcher import ComplianceMatcher, load_compliance_matcher, summarize_matches
+from text_utils import normalize_text
+
+class TestComplianceMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.rules_path = os.path.join(self.tmp_dir, "rules.json")
+        self.cache_path = os.path.join(self.tmp_dir, "rules_matcher.pkl")
+        with open(self.rules_path, "w", encoding="utf-8") as f:
+            # PDF-extracted rules use Private Use Area glyphs for tone marks
+            json.dump({
+                "forbidden_words": ["ที่สุด", "ลดสิว", "Germ"],
+                "allowed_words": ["ช\uf70aวยปกป\uf706องผิว"]
+            }, f, ensure_ascii=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_normalize_maps_positions_to_source(self):
+        html = '<p>ผิว<b>ใส</b>&nbsp;สํา<em>อาง</em></p>'
+        norm = normalize_text(html)
+        self.assertEqual(norm.text, "ผิวใส สำอาง")
+        start, end = norm.source_span(0, 5)
+        self.assertEqual(html[start:end], "ผิว<b>ใส")
+
+    def test_scan_reports_rule_and_position(self):
+        matcher = load_compliance_matcher(self.rules_path, cache_path=self.cache_path)
+        html = '<p>สูตรนี้ช่วยปกป้องผิว ดีที่สุด</p><a href="https://shopee.co.th/x">ซื้อ</a>'
+        matches = matcher.scan(html)
+
+        forbidden = [m for m in matches if m.rule == 'forbidden']
+        self.assertEqual(len(forbidden), 1)
+        self.assertEqual(html[forbidden[0].start:forbidden[0].end], "ที่สุด")
+
+        summary = summarize_matches(matches)
+        self.assertEqual(summary['allowed'], ["ช\uf70aวยปกป\uf706องผิว"])
+        self.assertIn('shopee.co.th', summary['hard_sell'])
+        self.assertIn('ซื้อ', summary['hard_sell'])
+
+    def test_latin_terms_need_word_boundaries(self):
+        matcher = ComplianceMatcher({'forbidden': ['Germ'], 'hard_sell': ['limited']})
+        self.assertEqual(matcher.find_terms("Made in Germany, unlimited", 'forbidden'), [])
+        self.assertEqual(matcher.find_terms("Kills GERM fast", 'forbidden'), ['Germ'])
+        self.assertEqual(matcher.find_terms("unlimited", 'hard_sell'), [])
+
+    def test_relevant_terms_include_near_matches(self):
+        matcher = ComplianceMatcher({
+            'forbidden': ['ลดการอักเสบของสิว', 'เสริมหน้าอก', 'ที่สุด'],
+            'allowed': ['ผิวเรียบเนียน'],
+        })
+        relevant = matcher.relevant_terms("<p>ช่วยลดการอักเสบของผิวที่เป็นสิว ดีที่สุด</p>", ['forbidden', 'allowed'])
+        self.assertEqual(relevant['forbidden'], ['ที่สุด', 'ลดการอักเสบของสิว'])
+        self.assertEqual(relevant['allowed'], [])
+
+    def test_cache_rebuilt_only_when_rules_change(self):
+        load_compliance_matcher(self.rules_path, cache_path=self.cache_path)
+        mtime = os.path.getmtime(self.cache_path)
+        os.utime(self.cache_path, (mtime - 100, mtime - 100))
+
+        load_compliance_matcher(self.rules_path, cache_path=self.cache_path)
+        self.assertEqual(os.path.getmtime(self.cache_path), mtime - 100)
+
+        with open(self.rules_path, "w", encoding="utf-8") as f:
+            json.dump({"forbidden_words": ["หายขาด"], "allowed_words": []}, f, ensure_ascii=False)
+        matcher = load_compliance_matcher(self.rules_path, cache_path=self.cache_path)
+        self.assertNotEqual(os.path.getmtime(self.cache_path), mtime - 100)
+        self.assertEqual(matcher.find_terms("ไม่หายขาด", 'forbidden'), ["หายขาด"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+import json
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compliance_matcher import ComplianceMatcher, HARD_SELL_PATTERNS
+from content_linter import ContentLinter
+from reviewer_agent import ReviewerAgent
+
+CLEAN_HTML = (
+    "<h2>คอลลาเจนบำรุงผิว คืออะไร</h2><p>ความรู้เรื่องผิว</p>"
+    "<h2>สรุป</h2><p>ดูแลผิวอย่างสม่ำเสมอ</p>"
+    "<h2>บทความที่เกี่ยวข้อง</h2><ul><li>ลิงก์</li></ul>"
+    "<h2>คำถามที่พบบ่อย (FAQ)</h2><p>ตอบคำถาม</p>"
+)
+
+class TestContentLinter(unittest.TestCase):
+
+    def setUp(self):
+        matcher = ComplianceMatcher({'forbidden': ['หายขาด'], 'hard_sell': HARD_SELL_PATTERNS})
+        self.linter = ContentLinter(matcher)
+
+    def test_clean_article_is_approved(self):
+        result = self.linter.lint({"title": "คอลลาเจนบำรุงผิว", "content_html": CLEAN_HTML})
+        self.assertEqual(result['status'], 'approved')
+        self.assertFalse(result['needs_semantic_review'])
+        self.assertEqual(result['review_source'], 'lint')
+
+    def test_mechanical_errors(self):
+        html = CLEAN_HTML + "<p>[IMAGE_PLACEHOLDER_1] สิวหายขาด Buy now!</p>" + "<p>วิตามิน</p>" * 6
+        result = self.linter.lint({"title": "Title", "content_html": html})
+        self.assertEqual(result['status'], 'needs_fix')
+        self.assertTrue(result['has_placeholders'])
+        self.assertTrue(result['is_hard_sell'])
+        self.assertTrue(result['ingredient_overload'])
+        self.assertTrue(any('หายขาด' in e for e in result['lint_errors']))
+
+    def test_section_order_needs_semantic_review(self):
+        html = "<h2>คำถามที่พบบ่อย</h2><p>a</p><h2>สรุป</h2><p>b</p>"
+        result = self.linter.lint({"title": "Title", "content_html": html})
+        self.assertEqual(result['status'], 'approved')
+        self.assertTrue(result['needs_semantic_review'])
+
+    def test_auto_fix_removes_placeholders(self):
+        article = {"title": "Title", "content_html": CLEAN_HTML + "[image: serum]"}
+        fixed, changed = self.linter.auto_fix(article)
+        self.assertTrue(changed)
+        self.assertNotIn("[image:", fixed['content_html'])
+        self.assertEqual(self.linter.lint(fixed)['status'], 'approved')
+
+class TestReviewerPreGate(unittest.TestCase):
+
+    def setUp(self):
+        os.environ["GOOGLE_CLOUD_PROJECT"] = "claudecode-480704"
+
+    @patch('reviewer_agent.call_vertex_with_retry')
+    @patch('reviewer_agent.create_vertex_model')
+    def test_clean_draft_still_gets_semantic_review(self, mock_create_model, mock_call_vertex):
+        mock_call_vertex.return_value = MagicMock(text=json.dumps({"status": "needs_fix", "editor_feedback": "claim"}))
+        reviewer = ReviewerAgent()
+        result = reviewer.review_article({"title": "คอลลาเจนบำรุงผิว", "content_html": CLEAN_HTML + "[image: x]"})
+        mock_call_vertex.assert_called_once()
+        self.assertEqual(result['status'], 'needs_fix')
+        self.assertNotIn("[image:", result['fixed_article']['content_html'])
+
+    @patch('reviewer_agent.call_vertex_with_retry')
+    @patch('reviewer_agent.create_vertex_model')
+    def test_clean_draft_skips_llm_when_opted_in(self, mock_create_model, mock_call_vertex):
+        with patch.dict(os.environ, {"REVIEW_SKIP_LLM_WHEN_CLEAN": "true"}):
+            reviewer = ReviewerAgent()
+        result = reviewer.review_article({"title": "คอลลาเจนบำรุงผิว", "content_html": CLEAN_HTML})
+        mock_call_vertex.assert_not_called()
+        self.assertEqual(result['status'], 'approved')
+
+    @patch('reviewer_agent.call_vertex_with_retry')
+    @patch('reviewer_agent.create_vertex_model')
+    def test_lint_failures_skip_llm(self, mock_create_model, mock_call_vertex):
+        reviewer = ReviewerAgent()
+        result = reviewer.review_article({"title": "คอลลาเจนบำรุงผิว", "content_html": CLEAN_HTML + "<p>buy now</p>"})
+        mock_call_vertex.assert_not_called()
+        self.assertEqual(result['status'], 'needs_fix')
+
+    @patch('reviewer_agent.call_vertex_with_retry')
+    @patch('reviewer_agent.create_vertex_model')
+    def test_warnings_escalate_to_llm(self, mock_create_model, mock_call_vertex):
+        mock_response = MagicMock()
+        mock_response.text = json.dumps({"status": "approved", "editor_feedback": "ok"})
+        mock_call_vertex.return_value = mock_response
+
+        reviewer = ReviewerAgent()
+        result = reviewer.review_article({"title": "Title", "content_html": "<p>no faq section</p>"})
+        mock_call_vertex.assert_called_once()
+        self.assertEqual(result['review_source'], 'llm')
+
+    @patch('reviewer_agent.call_vertex_with_retry')
+    @patch('reviewer_agent.create_vertex_model')
+    def test_prompt_only_lists_relevant_terms(self, mock_create_model, mock_call_vertex):
+        mock_call_vertex.return_value = None
+        reviewer = ReviewerAgent()
+        reviewer._review_with_llm({"title": "Title", "content_html": "<p>สูตรนี้ช่วยลดสิว</p>"})
+
+        prompt = mock_call_vertex.call_args[0][1]
+        self.assertIn("ลดสิว", prompt)
+        self.assertIn("หายขาด", prompt)  # core rule
+        self.assertNotIn("เสริมหน้าอก", prompt)
+        full_lists = json.dumps(reviewer.compliance_rules, ensure_ascii=False)
+        self.assertLess(len(prompt), len(full_lists))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -63,7 +63,7 @@ class TestAutoBlogging(unittest.TestCase):
         self.assertEqual(article['title'], "Mock Title")
         self.assertEqual(article['content_html'], "<p>Mock Content</p>")
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_publisher_mock(self, mock_post):
         # Mock WP response
         mock_post.return_value.status_code = 201
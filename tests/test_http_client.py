@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_client import create_session, get_session, close_sessions, DEFAULT_TIMEOUT
+from publisher import WordPressPublisher
+from yoast_integrator import YoastSEOIntegrator
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers with the queued status codes, then 200."""
+    statuses = []
+    calls = []
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        FlakyHandler.calls.append((self.command, self.headers.get('Authorization')))
+        status = FlakyHandler.statuses.pop(0) if FlakyHandler.statuses else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    do_GET = do_POST = respond
+
+    def log_message(self, *args):
+        pass
+
+class TestHttpClient(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(('127.0.0.1', 0), FlakyHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/wp-json"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FlakyHandler.statuses = []
+        FlakyHandler.calls = []
+        self.session = create_session("user", "pass", backoff_factor=0)
+
+    def tearDown(self):
+        self.session.close()
+        close_sessions()
+
+    def test_get_retries_server_errors(self):
+        FlakyHandler.statuses = [503, 502]
+        response = self.session.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(FlakyHandler.calls), 3)
+        self.assertTrue(FlakyHandler.calls[0][1].startswith("Basic "))
+
+    def test_post_only_retried_on_429(self):
+        FlakyHandler.statuses = [500]
+        self.assertEqual(self.session.post(self.url, json={}).status_code, 500)
+        self.assertEqual(len(FlakyHandler.calls), 1)
+
+        FlakyHandler.statuses = [429]
+        self.assertEqual(self.session.post(self.url, json={}).status_code, 200)
+        self.assertEqual(len(FlakyHandler.calls), 3)
+
+    def test_publisher_and_yoast_share_a_session(self):
+        publisher = WordPressPublisher("https://example.com/", "user", "pass")
+        yoast = YoastSEOIntegrator("https://example.com", "user", "pass")
+        self.assertIs(publisher.session, yoast.session)
+        self.assertIsNot(publisher.session, get_session("https://example.com", "other", "pass"))
+
+        with patch('requests.Session.request') as mock_request:
+            mock_request.return_value.status_code = 200
+            publisher.update_post(1, {"title": "x"})
+            self.assertEqual(mock_request.call_args[1]['timeout'], DEFAULT_TIMEOUT)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_backfill import ImageBackfill
+from test_maintenance_engine import make_agent
+
+def site(n):
+    """Every other post is missing its featured image."""
+    return [{"id": i, "title": {"rendered": f"Post {i}"}, "featured_media": 0 if i % 2 else 9}
+            for i in range(1, n + 1)]
+
+class FakeStages:
+    """Slow image generation and uploads that record how much of each runs at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = {'image': 0, 'upload': 0}
+        self.peak = {'image': 0, 'upload': 0, 'overlap': 0}
+        self.uploaded = []
+
+    def _enter(self, stage):
+        with self.lock:
+            self.active[stage] += 1
+            self.peak[stage] = max(self.peak[stage], self.active[stage])
+            if self.active['image'] and self.active['upload']:
+                self.peak['overlap'] += 1
+
+    def _exit(self, stage):
+        with self.lock:
+            self.active[stage] -= 1
+
+    def generate_image_bytes(self, prompt):
+        self._enter('image')
+        time.sleep(0.03)
+        self._exit('image')
+        return f"png:{prompt}".encode()
+
+    def upload_media_bytes(self, data, title=None, filename=None):
+        self._enter('upload')
+        time.sleep(0.03)
+        self._exit('upload')
+        with self.lock:
+            self.uploaded.append((data, filename))
+        return 1000 + int(filename.split('-')[1].split('.')[0])
+
+class TestImageBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.stages = FakeStages()
+        self.limiter = MagicMock()
+        self.limiter.acquire.return_value = True
+
+    @patch('requests.Session.post')
+    def test_generation_overlaps_uploads_and_writes_are_batched(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=207)
+        mock_post.return_value.json.return_value = {"responses": [{"status": 200}] * 10}
+        agent = make_agent(os.path.join(self.tmp_dir.name, "ledger.json"))
+        agent.image_gen = self.stages
+        agent.publisher.upload_media_bytes = self.stages.upload_media_bytes
+        agent._fetch_all_posts = MagicMock(return_value=site(24))
+
+        with patch('maintenance_agent.get_image_rate_limiter', return_value=self.limiter), \
+                patch.dict(os.environ, {"BACKFILL_IMAGE_WORKERS": "2", "BACKFILL_UPLOAD_WORKERS": "2"}):
+            summary = agent.fix_missing_images(limit=10)
+
+        self.assertEqual(summary, {'processed': 10, 'fixed': 10})
+        self.assertEqual(self.limiter.acquire.call_count, 10)
+        self.assertEqual(self.stages.peak['image'], 2)
+        self.assertGreater(self.stages.peak['overlap'], 0)
+        self.assertEqual(mock_post.call_count, 1)
+        sent = mock_post.call_args[1]['json']['requests']
+        self.assertEqual(sorted(int(r['path'].rsplit('/', 1)[1]) for r in sent), list(range(1, 20, 2)))
+        self.assertTrue(all(r['body']['featured_media'] > 1000 for r in sent))
+        self.assertIn((b"png:" + b"Professional skincare product photography for Post 3, high end, clean background, 4k",
+                       "post-3.png"), self.stages.uploaded)
+
+    def test_queues_are_bounded_and_stop_on_exhausted_quota(self):
+        writer = MagicMock()
+        writer.__len__.return_value = 0
+        writer.flush.return_value = {}
+        writer.chunk_size = 25
+        self.limiter.acquire.side_effect = [True] * 3 + [False] * 100
+        scanned = []
+
+        def posts():
+            for post in site(400):
+                scanned.append(post['id'])
+                yield post
+
+        backfill = ImageBackfill(self.stages, self.stages, writer, limiter=self.limiter,
+                                 gen_workers=1, upload_workers=1, queue_size=2)
+        summary = backfill.run(posts())
+
+        self.assertEqual(summary['processed'], 3)
+        self.assertEqual(writer.queue.call_count, 3)
+        # The scanner stops soon after the quota runs out instead of reading every post
+        self.assertLess(len(scanned), 30)
+
+if __name__ == '__main__':
+    unittest.main()
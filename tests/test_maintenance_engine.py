@@ -0,0 +1,224 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from publisher import WordPressPublisher
+from wp_batch import BatchWriter
+from compliance_matcher import get_compliance_matcher
+from maintenance_agent import MaintenanceAgent
+from maintenance_ledger import MaintenanceLedger, content_fingerprint, post_fingerprint
+from maintenance_scheduler import LatencyStats
+
+SEO_RESPONSE = json.dumps({
+    "needs_update": True, "corrected_title": "Better title", "corrected_content_html": "<p>Better</p>",
+    "seo_keyphrase": "serum", "seo_meta_description": "desc",
+})
+
+def make_agent(ledger_path):
+    agent = MaintenanceAgent.__new__(MaintenanceAgent)
+    agent.publisher = WordPressPublisher("http://example.com", "user", "pass")
+    agent.mirror = None
+    agent.wp_credentials = ("http://example.com", "user", "pass")
+    agent.model = MagicMock()
+    agent.image_gen = MagicMock()
+    agent.yoast = MagicMock()
+    agent.yoast.calculate_seo_score.return_value = 70
+    agent.yoast.calculate_readability_score.return_value = 60
+    agent.yoast.build_meta_payload.return_value = {"_yoast_wpseo_linkdex": "70"}
+    agent.matcher = get_compliance_matcher()
+    agent.max_workers = 4
+    agent.ledger = MaintenanceLedger(ledger_path)
+    agent.timings = LatencyStats(os.path.join(os.path.dirname(ledger_path), "timings.json"))
+    return agent
+
+def posts(n):
+    return [{"id": i, "title": {"rendered": f"Post {i}"}, "content": {"rendered": "<p>Body</p>"}, "featured_media": 5}
+            for i in range(1, n + 1)]
+
+class TestMaintenanceEngine(unittest.TestCase):
+
+    def setUp(self):
+        limiter = MagicMock(requests_per_day=1500)
+        limiter.get_daily_usage.return_value = 0
+        patcher = patch('maintenance_agent.get_rate_limiter', return_value=limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.ledger_path = os.path.join(self.tmp_dir.name, "ledger.json")
+
+    def slow_llm(self, model, prompt):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return MagicMock(text=SEO_RESPONSE)
+
+    @patch('requests.Session.post')
+    def test_posts_processed_concurrently_and_written_in_one_batch(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=207)
+        mock_post.return_value.json.return_value = {"responses": [{"status": 200}] * 6}
+        agent = make_agent(self.ledger_path)
+        agent._fetch_all_posts = MagicMock(return_value=posts(8))
+
+        with patch('maintenance_agent.call_vertex_with_retry', side_effect=self.slow_llm):
+            summary = agent.audit_and_fix_posts(limit=6, mode='seo', workers=3)
+
+        self.assertEqual(summary['processed'], 6)
+        self.assertEqual(summary['fixed'], 6)
+        self.assertGreater(self.peak, 1)
+        self.assertLessEqual(self.peak, 3)
+        self.assertEqual(mock_post.call_count, 1)
+        sent = mock_post.call_args[1]['json']['requests']
+        self.assertEqual(sorted(r['path'] for r in sent), [f"/wp/v2/posts/{i}" for i in range(1, 7)])
+        self.assertEqual(sent[0]['body']['meta']['_yoast_wpseo_linkdex'], "70")
+
+    @patch('requests.Session.post')
+    def test_dry_run_sends_nothing(self, mock_post):
+        agent = make_agent(self.ledger_path)
+        agent._fetch_all_posts = MagicMock(return_value=posts(3))
+
+        with patch('maintenance_agent.call_vertex_with_retry', side_effect=self.slow_llm):
+            summary = agent.audit_and_fix_posts(dry_run=True, mode='seo')
+
+        self.assertEqual(summary['fixed'], 3)
+        mock_post.assert_not_called()
+        agent.image_gen.generate_image.assert_not_called()
+        self.assertFalse(os.path.exists(self.ledger_path))
+
+    @patch('requests.Session.post')
+    def test_ledger_skips_audited_posts_and_resumes(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=207)
+        mock_post.return_value.json.return_value = {"responses": [{"status": 200}] * 2}
+        agent = make_agent(self.ledger_path)
+        site = posts(5)
+        agent._fetch_all_posts = MagicMock(return_value=site)
+
+        with patch('maintenance_agent.call_vertex_with_retry', side_effect=self.slow_llm):
+            agent.audit_and_fix_posts(limit=2, mode='seo', workers=2)
+        first_batch = sorted(r['path'] for r in mock_post.call_args[1]['json']['requests'])
+        self.assertEqual(first_batch, ["/wp/v2/posts/1", "/wp/v2/posts/2"])
+
+        # WordPress now serves the optimized posts 1-2 (rendered HTML of what was written)
+        for post in site[:2]:
+            post['title'] = {"rendered": "Better title"}
+            post['content'] = {"rendered": "<p>Better</p>\n"}
+        agent = make_agent(self.ledger_path)
+        agent._fetch_all_posts = MagicMock(return_value=site)
+        with patch('maintenance_agent.call_vertex_with_retry', side_effect=self.slow_llm):
+            agent.audit_and_fix_posts(limit=2, mode='seo', workers=2)
+        second_batch = sorted(r['path'] for r in mock_post.call_args[1]['json']['requests'])
+        self.assertEqual(second_batch, ["/wp/v2/posts/3", "/wp/v2/posts/4"])
+
+        entry = agent.ledger.entry(3)
+        self.assertEqual(entry['modes']['seo']['result'], "fixed")
+        self.assertEqual(entry['modes']['seo']['seo_score'], 70)
+        self.assertEqual(agent.ledger.cursors['seo'], 4)
+
+    @patch('requests.Session.post')
+    def test_long_post_rewritten_per_section_without_truncation(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=207)
+        mock_post.return_value.json.return_value = {"responses": [{"status": 200}]}
+        agent = make_agent(self.ledger_path)
+        body = "<p>Intro</p>\n<h2>Price</h2>\n<p>Buy now on shopee</p>\n<h2>Review</h2>\n" + "<p>Soft skin.</p>\n" * 600
+        site = posts(1)
+        site[0]['content'] = {"rendered": body}
+        agent._fetch_all_posts = MagicMock(return_value=site)
+        prompts = []
+
+        def llm(model, prompt):
+            prompts.append(prompt)
+            if "Rewrite ONE section" in prompt:
+                return MagicMock(text=json.dumps({"section_html": "<h2>Price</h2>\n<p>Available at partner stores</p>"}))
+            return MagicMock(text=json.dumps({"needs_update": True, "corrected_title": "Better title",
+                                              "seo_keyphrase": "serum", "seo_meta_description": "desc"}))
+
+        with patch('maintenance_agent.call_vertex_with_retry', side_effect=llm):
+            summary = agent.audit_and_fix_posts(mode='seo')
+
+        self.assertEqual(summary['fixed'], 1)
+        self.assertEqual(len(prompts), 2)
+        written = mock_post.call_args[1]['json']['requests'][0]['body']
+        self.assertEqual(written['title'], "Better title")
+        self.assertIn("Available at partner stores", written['content'])
+        self.assertNotIn("shopee", written['content'])
+        self.assertEqual(written['content'].count("<p>Soft skin.</p>"), 600)
+
+    @patch('requests.Session.post')
+    def test_write_flushed_before_its_job_is_collected_is_still_recorded(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=207)
+        mock_post.return_value.json.return_value = {"responses": [{"status": 200}] * 2}
+        agent = make_agent(self.ledger_path)
+        agent._fetch_all_posts = MagicMock(return_value=posts(2))
+
+        def process(job, writer, fix_messages, dry_run, hot_topic_keywords):
+            post_id = job['post']['id']
+            update = {"content": f"<p>Fixed {post_id}</p>"}
+            writer.queue(post_id, update)
+            # Post 2 is still running when post 1 completes and triggers a flush
+            time.sleep(0.05 if post_id == 1 else 0.3)
+            job.update(result='queued', update=update)
+            fix_messages[post_id] = f"Post {post_id} fixed"
+            return 0
+
+        agent._process_post = process
+        with patch('maintenance_agent.BatchWriter', lambda *a, **kw: BatchWriter(*a, chunk_size=1, **kw)):
+            summary = agent.audit_and_fix_posts(mode='seo', workers=2)
+
+        # One flush while post 2 was running sent both writes; nothing is resent
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(summary['fixed'], 2)
+        self.assertEqual(agent.ledger.entry(2)['modes']['seo']['result'], "fixed")
+
+    def test_planning_reuses_the_analysis_pass(self):
+        agent = make_agent(self.ledger_path)
+        post = posts(1)[0]
+        post['content'] = {"rendered": "<p>Body [image: serum]</p>\n"}
+        issues = agent._analyze_post_issues(post)
+
+        with patch('maintenance_agent.analyze_content') as analyze, \
+                patch('maintenance_agent.strip_ai_leftovers') as strip:
+            job = agent._plan_post(post, 'seo', True, issues)
+
+        analyze.assert_not_called()
+        strip.assert_not_called()
+        self.assertEqual(job['content'], "<p>Body </p>")
+        self.assertEqual(agent._plan_post(posts(1)[0], 'seo', True)['content'], "<p>Body</p>")
+
+class TestMaintenanceLedger(unittest.TestCase):
+
+    def test_fingerprint_matches_rendered_html(self):
+        written = content_fingerprint("Serum \"Hya\" - review", "<p>Don't skip it...</p>")
+        rendered = content_fingerprint("Serum &#8220;Hya&#8221; &#8211; review", "<p>Don&#8217;t skip it&#8230;</p>\n")
+        self.assertEqual(written, rendered)
+        self.assertNotEqual(written, content_fingerprint("Serum Hya review", "<p>Skip it</p>"))
+
+    def test_is_current_per_mode(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ledger = MaintenanceLedger(os.path.join(tmp_dir, "ledger.json"))
+            post = posts(1)[0]
+            ledger.record(1, post_fingerprint(post), 'seo', 'fixed', 70, 60)
+            self.assertTrue(ledger.is_current(post, 'seo'))
+            self.assertFalse(ledger.is_current(post, 'fix'))
+            ledger.save()
+
+            reloaded = MaintenanceLedger(ledger.path)
+            self.assertTrue(reloaded.is_current(post, 'seo'))
+            post['content'] = {"rendered": "<p>Edited by hand</p>"}
+            self.assertFalse(reloaded.is_current(post, 'seo'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from datetime import datetime
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compliance_matcher import get_compliance_matcher
+from maintenance_agent import MaintenanceAgent
+from maintenance_planner import MaintenancePlanner
+
+def post(post_id, content, featured_media=5, modified="2026-10-01T00:00:00"):
+    return {"id": post_id, "title": {"rendered": f"Post {post_id}"}, "content": {"rendered": content},
+            "featured_media": featured_media, "modified": modified}
+
+class TestMaintenancePlanner(unittest.TestCase):
+
+    def setUp(self):
+        agent = MaintenanceAgent.__new__(MaintenanceAgent)
+        agent.matcher = get_compliance_matcher()
+        self.analyze = agent._analyze_post_issues
+        self.now = datetime(2026, 10, 18)
+
+    def test_worst_posts_first(self):
+        posts = [
+            post(1, "<p>Clean post</p>"),
+            post(2, "<p>Body [image: serum]</p>", featured_media=0),
+            post(3, "<p>Clean but old</p>", modified="2025-01-01T00:00:00"),
+            post(4, "<p>Body [image: serum]</p>"),
+        ]
+        planner = MaintenancePlanner(self.analyze, traffic={}, now=self.now)
+        order = [p['id'] for _, p, _ in planner.ranked(posts)]
+        self.assertEqual(order, [2, 4, 3, 1])
+
+    def test_traffic_and_seo_break_ties(self):
+        posts = [post(1, "<p>Same</p>"), post(2, "<p>Same</p>"), post(3, "<p>Same</p>")]
+        planner = MaintenancePlanner(self.analyze, seo_score=lambda p: 90 if p['id'] == 1 else 50,
+                                     traffic={3: 1000}, now=self.now)
+        ranked = list(planner.ranked(posts))
+        self.assertEqual([p['id'] for _, p, _ in ranked], [3, 2, 1])
+        self.assertGreater(ranked[0][0], ranked[1][0])
+
+        # Equal scores keep the incoming order
+        planner = MaintenancePlanner(self.analyze, traffic={}, now=self.now)
+        self.assertEqual([p['id'] for _, p, _ in planner.ranked(posts)], [1, 2, 3])
+
+if __name__ == '__main__':
+    unittest.main()
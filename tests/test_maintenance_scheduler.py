@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import json
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from maintenance_scheduler import LatencyStats, MaintenanceScheduler
+from test_maintenance_engine import SEO_RESPONSE, make_agent, posts
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestMaintenanceScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "timings.json")
+
+    def test_latency_ewma_persists(self):
+        stats = LatencyStats(self.path)
+        self.assertEqual(stats.estimate('seo'), 40.0)
+        stats.observe('seo', 10)
+        stats.observe('seo', 20)
+        self.assertAlmostEqual(stats.estimate('seo'), 13.0)
+        stats.save()
+        reloaded = LatencyStats(self.path)
+        self.assertAlmostEqual(reloaded.estimate('seo'), 13.0)
+        self.assertEqual(reloaded.stats['seo']['samples'], 2)
+
+    def test_plans_to_time_and_quota_budget(self):
+        stats = LatencyStats(self.path)
+        stats.observe('seo', 39)
+        stats.observe('write', 1)
+        clock = FakeClock()
+        scheduler = MaintenanceScheduler(stats, 600, workers=2, clock=clock)
+        planned = sum(scheduler.reserve('seo', False) for _ in range(40))
+        self.assertEqual(planned, 24)  # 24 x 40 s on 2 workers = 480 s = budget - margin
+
+        scheduler = MaintenanceScheduler(stats, 600, workers=2, quota=10, clock=clock)
+        self.assertEqual(sum(scheduler.reserve('seo', False) for _ in range(40)), 3)
+        self.assertTrue(scheduler.reserve('cleanup', False))
+
+        self.assertTrue(scheduler.admit('seo', False))
+        clock.now += 600 - 120 - 39
+        self.assertFalse(scheduler.admit('seo', False))
+        self.assertTrue(scheduler.admit('cleanup', False))
+
+    @patch('requests.Session.post')
+    def test_audit_fits_time_budget(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=207)
+        mock_post.return_value.json.return_value = {"responses": [{"status": 200}] * 5}
+        limiter = MagicMock(requests_per_day=1500)
+        limiter.get_daily_usage.return_value = 0
+        agent = make_agent(os.path.join(self.tmp_dir.name, "ledger.json"))
+        agent.timings.observe('seo', 100)
+        agent.timings.observe('write', 1)
+        agent._fetch_all_posts = MagicMock(return_value=posts(8))
+
+        with patch('maintenance_agent.get_rate_limiter', return_value=limiter), \
+                patch('maintenance_agent.call_vertex_with_retry', return_value=MagicMock(text=SEO_RESPONSE)):
+            summary = agent.audit_and_fix_posts(mode='seo', workers=2, time_budget=400)
+
+        # (400 s - 120 s margin) x 2 workers / 101 s per post
+        self.assertEqual(summary['processed'], 5)
+        self.assertEqual(summary['fixed'], 5)
+        with open(agent.timings.path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        self.assertLess(saved['seo']['ewma'], 100)
+        self.assertEqual(saved['seo']['samples'], 6)
+
+if __name__ == '__main__':
+    unittest.main()
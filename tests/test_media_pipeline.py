@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import json
+import os
+import sys
+import tempfile
+import threading
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from publisher import WordPressPublisher
+from media_pipeline import MediaIndex, MediaPipeline, PIL_AVAILABLE, detect_image_type
+from image_generator import ImageGenerator
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+def media_response(status, payload):
+    response = MagicMock()
+    response.status_code = status
+    response.json.return_value = payload
+    return response
+
+class TestMediaPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.publisher = WordPressPublisher("http://example.com", "user", "pass")
+        self.index = MediaIndex(os.path.join(self.tmp_dir.name, "media_index.json"))
+        self.publisher._media = MediaPipeline(self.publisher, index=self.index, fmt="original")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_detect_image_type(self):
+        self.assertEqual(detect_image_type(PNG_BYTES), ("image/png", "png"))
+        self.assertEqual(detect_image_type(b"\xff\xd8\xff\xe0rest"), ("image/jpeg", "jpg"))
+        self.assertEqual(detect_image_type(b"RIFF\x00\x00\x00\x00WEBPVP8 "), ("image/webp", "webp"))
+        self.assertIsNone(detect_image_type(b"not an image"))
+
+    def test_concurrent_uploads_share_one_consistent_index(self):
+        publisher = WordPressPublisher("http://example.com", "user", "pass")
+        pipelines = []
+
+        def record(i):
+            pipelines.append(publisher.media)
+            self.index.put(f"digest{i}", {"id": i, "source_url": f"http://example.com/{i}.png"})
+
+        threads = [threading.Thread(target=record, args=(i,)) for i in range(40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(p) for p in pipelines}), 1)
+        with open(self.index.path, encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)), 40)
+        self.assertFalse(os.path.exists(self.index.path + ".tmp"))
+
+    def test_image_generator_hands_over_bytes_without_shared_files(self):
+        gen = ImageGenerator.__new__(ImageGenerator)
+        gen.model = MagicMock()
+        image = MagicMock(spec=['save'])
+        saved_to = []
+
+        def save(location, include_generation_parameters=True):
+            saved_to.append(location)
+            with open(location, 'wb') as f:
+                f.write(PNG_BYTES)
+        image.save.side_effect = save
+        gen.model.generate_images.return_value = [image]
+
+        self.assertEqual(gen.generate_image_bytes("serum"), PNG_BYTES)
+        first, second = gen.generate_image("serum"), gen.generate_image("serum")
+        self.addCleanup(os.remove, first)
+        self.addCleanup(os.remove, second)
+        self.assertNotEqual(first, second)
+        with open(second, 'rb') as f:
+            self.assertEqual(f.read(), PNG_BYTES)
+        # Every call saved to its own temp file, which is gone afterwards
+        self.assertEqual(len(set(saved_to)), 3)
+        self.assertFalse(any(os.path.exists(path) for path in saved_to))
+
+        # A public bytes accessor is used directly when the SDK has one
+        gen.model.generate_images.return_value = [MagicMock(spec=['image_bytes'], image_bytes=PNG_BYTES)]
+        self.assertEqual(gen.generate_image_bytes("serum"), PNG_BYTES)
+
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    def test_uploads_once_with_real_type(self, mock_post, mock_get):
+        mock_get.side_effect = [media_response(200, []), media_response(200, {"id": 41})]
+        mock_post.return_value = media_response(201, {"id": 41, "source_url": "http://example.com/a.png"})
+
+        self.assertEqual(self.publisher.upload_media_bytes(PNG_BYTES, title="Serum", filename="generated.png"), 41)
+        headers = mock_post.call_args[1]['headers']
+        self.assertEqual(headers['Content-Type'], "image/png")
+        self.assertTrue(headers['Content-Disposition'].endswith('.png"'))
+        self.assertTrue(mock_post.call_args[1]['params']['description'].startswith("sha256:"))
+
+        # Identical bytes reuse the indexed attachment (only an existence check)
+        self.assertEqual(self.publisher.upload_media_bytes(PNG_BYTES, title="Serum"), 41)
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(MediaIndex(self.index.path).entries, self.index.entries)
+
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    def test_reuses_tagged_library_media(self, mock_post, mock_get):
+        mock_get.return_value = media_response(200, [{"id": 9, "source_url": "http://example.com/b.png"}])
+        self.assertEqual(self.publisher.upload_media_bytes(PNG_BYTES), 9)
+        mock_post.assert_not_called()
+        self.assertIn("sha256:", mock_get.call_args[1]['params']['search'])
+
+    @unittest.skipUnless(PIL_AVAILABLE, "Pillow not installed")
+    def test_transcodes_to_smaller_webp(self):
+        import io
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new("RGB", (2000, 2000), (200, 120, 90)).save(buffer, format="PNG")
+        pipeline = MediaPipeline(self.publisher, index=self.index, fmt="webp", max_size=800)
+        body, mime, ext = pipeline._prepare(buffer.getvalue(), ("image/png", "png"), "x.png")
+        self.assertEqual((mime, ext), ("image/webp", "webp"))
+        self.assertLess(len(body), len(buffer.getvalue()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -37,7 +37,7 @@ class TestNewFeatures(unittest.TestCase):
         products = loader.load_products_from_csv("non_existent.csv")
         self.assertEqual(products, [])
 
-    @patch('publisher.requests.post')
+    @patch('requests.Session.post')
     def test_scheduling_parameter(self, mock_post):
         # Setup mock response
         mock_response = MagicMock()
@@ -0,0 +1,50 @@
+import unittest
+import re
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from post_analyzer import LEFTOVER_PATTERNS, analyze_content, strip_ai_leftovers
+
+def sequential_cleanup(content):
+    for pattern in LEFTOVER_PATTERNS:
+        content = re.sub(pattern, '', content, flags=re.IGNORECASE)
+    return content.strip()
+
+class TestPostAnalyzer(unittest.TestCase):
+
+    def test_removes_every_leftover_in_one_pass(self):
+        content = ("  <p>Intro [image: serum bottle]</p>[Link: /review]\n"
+                   "<p>[internal link: guide] body [IMAGE_PLACEHOLDER_1]</p>"
+                   "[INSERT_INTERNAL_LINK here][(ภาพประกอบ ผิว) ]<p>end</p>  ")
+        analysis = analyze_content(content)
+        self.assertEqual(analysis.cleaned, "<p>Intro </p>\n<p> body </p><p>end</p>")
+        self.assertEqual(len(analysis.leftovers), 6)
+        self.assertTrue(analysis.has_placeholders)
+
+    def test_matches_sequential_cleanup(self):
+        cases = [
+            "<p>No tags at all</p>",
+            "<p>[IMAGE_PLACEHOLDER without end</p>",
+            "[link: [image: nested]]",
+            "[li[image: split]nk: joined]",
+            "[(a] b ภาพ) c] tail",
+            "[link: a [image: b] rest",
+        ]
+        for content in cases:
+            self.assertEqual(strip_ai_leftovers(content), sequential_cleanup(content), content)
+
+        self.assertTrue(analyze_content("<p>[IMAGE_PLACEHOLDER without end</p>").has_placeholders)
+        self.assertFalse(analyze_content("<p>[internal link: guide]</p>").has_placeholders)
+
+    def test_ingredient_overload(self):
+        self.assertTrue(analyze_content("<p>วิตามินซี</p>" * 6).ingredient_overload)
+        analysis = analyze_content("<p>วิตามิน สารสกัด</p>" * 5 + "[image: วิตามิน]")
+        self.assertEqual(analysis.ingredients, {'วิตามิน': 6, 'สารสกัด': 5})
+        self.assertTrue(analysis.ingredient_overload)
+        self.assertFalse(analyze_content("<p>สารสกัด</p>" * 5).ingredient_overload)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from publisher import WordPressPublisher
+from post_mirror import PostMirror
+
+def wp_post(post_id, modified, title="Title", content="<p>Body</p>"):
+    return {
+        "id": post_id, "title": {"rendered": title}, "content": {"rendered": content},
+        "excerpt": {"rendered": ""}, "link": f"http://example.com/?p={post_id}",
+        "date": modified, "modified": modified, "featured_media": 0,
+        "meta": {"_yoast_wpseo_focuskw": "kw"},
+    }
+
+def response(status, posts=None, headers=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.json.return_value = posts or []
+    resp.headers = headers or {}
+    return resp
+
+class TestPostMirror(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.publisher = WordPressPublisher("http://example.com", "user", "pass")
+        self.mirror = PostMirror(self.publisher, db_path=os.path.join(self.tmp_dir.name, "mirror.db"))
+        # Skip the weekly id reconcile unless a test asks for it
+        self.mirror.reconcile = MagicMock(return_value=0)
+
+    def tearDown(self):
+        self.mirror.close()
+        self.tmp_dir.cleanup()
+
+    @patch('requests.Session.get')
+    def test_incremental_sync_and_conditional_request(self, mock_get):
+        mock_get.return_value = response(200, [wp_post(1, "2026-01-01T10:00:00"), wp_post(2, "2026-01-02T10:00:00")],
+                                         {'X-WP-TotalPages': '1', 'ETag': '"v1"'})
+        self.assertEqual(self.mirror.sync(), 2)
+        self.assertNotIn('modified_after', mock_get.call_args[1]['params'])
+
+        # Second sync asks only for newer posts
+        mock_get.return_value = response(200, [wp_post(2, "2026-01-02T10:00:00", title="New")],
+                                         {'X-WP-TotalPages': '1', 'ETag': '"v2"'})
+        self.mirror.sync()
+        params = mock_get.call_args[1]['params']
+        self.assertEqual(params['modified_after'], "2026-01-02T09:59:59")
+        self.assertEqual(params['orderby'], 'modified')
+        self.assertEqual(len(self.mirror), 2)
+        self.assertEqual(self.mirror.get_post(2)['title']['rendered'], "New")
+
+        # Same query again carries the validator; a 304 leaves the mirror as is
+        mock_get.return_value = response(304)
+        self.assertEqual(self.mirror.sync(), 0)
+        self.assertEqual(mock_get.call_args[1]['headers']['If-None-Match'], '"v2"')
+        self.assertEqual(len(self.mirror.get_posts()), 2)
+
+    @patch('requests.Session.post')
+    def test_updates_write_through(self, mock_post):
+        self.mirror.upsert_posts([wp_post(5, "2026-01-01T10:00:00")])
+        before = self.mirror.get_post(5)['content_hash']
+        mock_post.return_value = response(200)
+        self.assertTrue(self.publisher.update_post(5, {"content": "<p>Fixed</p>", "meta": {"_yoast_wpseo_metadesc": "desc"}}))
+        post = self.mirror.get_post(5)
+        self.assertEqual(post['content']['rendered'], "<p>Fixed</p>")
+        self.assertEqual(post['meta']['_yoast_wpseo_metadesc'], "desc")
+        self.assertEqual(post['meta']['_yoast_wpseo_focuskw'], "kw")
+        self.assertNotEqual(post['content_hash'], before)
+
+    @patch('requests.Session.post')
+    def test_update_sends_only_changed_fields(self, mock_post):
+        post = wp_post(7, "2026-01-01T10:00:00", title="Old title")
+        post['content'] = {"rendered": "<p>Body</p>\n", "raw": "<p>Body</p>"}
+        self.mirror.upsert_posts([post])
+        mock_post.return_value = response(200)
+
+        # Same raw content and focus keyword: nothing is sent
+        self.assertTrue(self.publisher.update_post(7, {"content": "<p>Body</p>", "meta": {"_yoast_wpseo_focuskw": "kw"}}))
+        mock_post.assert_not_called()
+        self.assertEqual(self.publisher.skipped_writes, 1)
+
+        # Only the differing title and the new meta key go out
+        self.publisher.update_post(7, {"title": "New title", "content": "<p>Body</p>",
+                                       "meta": {"_yoast_wpseo_focuskw": "kw", "_yoast_wpseo_linkdex": "80"}})
+        self.assertEqual(mock_post.call_args[1]['json'], {"title": "New title", "meta": {"_yoast_wpseo_linkdex": "80"}})
+
+        # Repeating the write that just succeeded is a no-op
+        self.publisher.update_post(7, {"title": "New title", "meta": {"_yoast_wpseo_linkdex": "80"}})
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(self.publisher.skipped_writes, 2)
+
+    @patch('requests.Session.post')
+    def test_mirror_stores_raw_html_from_sync_and_writes(self, mock_post):
+        post = wp_post(8, "2026-01-01T10:00:00")
+        post['content'] = {"rendered": "<p>Body &#8211; more</p>\n", "raw": "<p>Body - more</p>"}
+        self.mirror.upsert_posts([post])
+        self.assertEqual(self.mirror.get_post(8)['content']['raw'], "<p>Body - more</p>")
+
+        mock_post.return_value = response(200)
+        self.publisher.update_post(8, {"content": "<p>Fixed - now</p>"})
+        synced = wp_post(9, "2026-01-01T10:00:00")
+        synced['content'] = {"rendered": "<p>Fixed &#8211; now</p>\n", "raw": "<p>Fixed - now</p>"}
+        self.mirror.upsert_posts([synced])
+        # A written post and a synced post with the same raw HTML look the same
+        self.assertEqual(self.mirror.get_post(8)['content'], self.mirror.get_post(9)['content'])
+        self.assertEqual(self.mirror.get_post(8)['content_hash'], self.mirror.get_post(9)['content_hash'])
+
+    @patch('requests.Session.get')
+    def test_reconcile_drops_deleted_posts(self, mock_get):
+        self.mirror.upsert_posts([wp_post(1, "2026-01-01T10:00:00"), wp_post(2, "2026-01-01T11:00:00")])
+        mock_get.return_value = response(200, [{"id": 2}], {'X-WP-TotalPages': '1', 'X-WP-Total': '1'})
+        self.assertEqual(PostMirror.reconcile(self.mirror), 1)
+        self.assertEqual(mock_get.call_args[1]['params']['_fields'], 'id')
+        self.assertEqual([p['id'] for p in self.mirror.get_posts(include_content=False)], [2])
+        self.assertNotIn('content', self.mirror.get_posts(include_content=False)[0])
+        self.assertIsNotNone(self.mirror._get_state('last_reconcile'))
+
+    @patch('requests.Session.get')
+    def test_reconcile_keeps_posts_when_listing_is_incomplete(self, mock_get):
+        self.mirror.upsert_posts([wp_post(i, "2026-01-01T10:00:00") for i in (1, 2, 3)])
+        headers = {'X-WP-TotalPages': '2', 'X-WP-Total': '3'}
+        mock_get.side_effect = [response(200, [{"id": 1}, {"id": 2}], headers), response(500)]
+        self.assertEqual(PostMirror.reconcile(self.mirror, per_page=2), 0)
+        self.assertEqual(len(self.mirror), 3)
+        self.assertIsNone(self.mirror._get_state('last_reconcile'))
+
+        # A listing short of X-WP-Total is not trusted either
+        mock_get.side_effect = [response(200, [{"id": 1}], {'X-WP-TotalPages': '1', 'X-WP-Total': '3'})]
+        self.assertEqual(PostMirror.reconcile(self.mirror), 0)
+        self.assertEqual(len(self.mirror), 3)
+
+    @patch('requests.Session.get')
+    def test_validators_kept_only_after_a_complete_single_page_sync(self, mock_get):
+        headers = {'X-WP-TotalPages': '2', 'ETag': '"v1"'}
+        mock_get.side_effect = [response(200, [wp_post(1, "2026-01-01T10:00:00")], headers), response(500)]
+        self.mirror.sync(full=True)
+        self.assertIsNone(self.mirror._get_state('etag'))
+
+        # Both pages arrive, but a multi-page result is never revalidated by page 1 alone
+        mock_get.side_effect = [response(200, [wp_post(1, "2026-01-01T10:00:00")], headers),
+                                response(200, [wp_post(2, "2026-01-02T10:00:00")], headers)]
+        self.mirror.sync(full=True)
+        self.assertEqual(len(self.mirror), 2)
+        self.assertIsNone(self.mirror._get_state('etag'))
+        mock_get.side_effect = [response(200, [], {'X-WP-TotalPages': '1', 'ETag': '"v2"'})]
+        self.mirror.sync()
+        self.assertNotIn('If-None-Match', mock_get.call_args[1]['headers'] or {})
+        self.assertEqual(self.mirror._get_state('etag'), '"v2"')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_compliance import split_into_pages, build_chunks, process_compliance
+
+def make_manual(extra=""):
+    pages = [
+        "1. หลักการโฆษณา\nข้อความที่ห้ามใช้ เช่น หายขาด\n" + "ก" * 4000,
+        "2. กลุ่มเครื่องสำอางลดริ้วรอย\nDo: ผิวเรียบเนียน Don't: ลบริ้วรอย\n" + extra + "ข" * 4000,
+    ]
+    return "\n".join(f"{text}\n{i}" for i, text in enumerate(pages, start=1))
+
+class FakeExtractor:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, prompt):
+        self.calls += 1
+        if "[Page 2]" in prompt:
+            return json.dumps({"allowed_words": [{"term": "ผิวเรียบเนียน", "page": 2}],
+                               "forbidden_words": [{"term": "ลบริ้วรอย", "page": 2}]})
+        return json.dumps({"allowed_words": [], "forbidden_words": ["หายขาด", "ลบริ้วรอย "]})
+
+class TestProcessCompliance(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.text_file = os.path.join(self.tmp_dir, "manual.txt")
+        self.rules_file = os.path.join(self.tmp_dir, "rules.json")
+        self.cache_file = os.path.join(self.tmp_dir, "chunks.json")
+        with open(self.rules_file, "w", encoding="utf-8") as f:
+            json.dump({"allowed_words": ["แลดูขาว"], "forbidden_words": []}, f, ensure_ascii=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def run_pipeline(self, text, extractor):
+        with open(self.text_file, "w", encoding="utf-8") as f:
+            f.write(text)
+        return process_compliance(extractor, self.text_file, self.rules_file, self.cache_file)
+
+    def test_split_by_page_and_section(self):
+        pages = split_into_pages(make_manual())
+        self.assertEqual([p["page"] for p in pages], [1, 2])
+        self.assertEqual(pages[1]["section"], "2. กลุ่มเครื่องสำอางลดริ้วรอย")
+        self.assertEqual(len(build_chunks(pages)), 2)
+
+    def test_rebuild_with_provenance_and_dedup(self):
+        rules = self.run_pipeline(make_manual(), FakeExtractor())
+        self.assertEqual(rules["forbidden_words"], ["หายขาด", "ลบริ้วรอย"])
+        # Terms from the previous rules file that the manual no longer has are dropped
+        self.assertEqual(rules["allowed_words"], ["ผิวเรียบเนียน"])
+        self.assertEqual(rules["provenance"]["allowed_words"]["ผิวเรียบเนียน"],
+                         [{"page": 2, "section": "2. กลุ่มเครื่องสำอางลดริ้วรอย"}])
+        self.assertEqual(len(rules["provenance"]["forbidden_words"]["ลบริ้วรอย"]), 2)
+
+    def test_only_changed_chunks_are_reprocessed(self):
+        extractor = FakeExtractor()
+        self.run_pipeline(make_manual(), extractor)
+        self.assertEqual(extractor.calls, 2)
+
+        self.run_pipeline(make_manual(), extractor)
+        self.assertEqual(extractor.calls, 2)
+
+        self.run_pipeline(make_manual(extra="ข้อความใหม่\n"), extractor)
+        self.assertEqual(extractor.calls, 3)
+
+    def test_failed_chunk_keeps_existing_rules(self):
+        def extractor(prompt):
+            if "[Page 2]" in prompt:
+                raise RuntimeError("quota")
+            return FakeExtractor()(prompt)
+
+        self.assertIsNone(self.run_pipeline(make_manual(), extractor))
+        with open(self.rules_file, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["allowed_words"], ["แลดูขาว"])
+
+if __name__ == '__main__':
+    unittest.main()
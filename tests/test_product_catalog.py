@@ -0,0 +1,122 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_catalog import load_catalog
+from product_loader import ProductLoader
+from text_utils import html_to_text, normalize_text
+
+CSV_HEADER = "product_id,category,brand,product_name,product_description\n"
+
+class TestProductCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, "products.csv")
+        self.data_dir = os.path.join(self.tmp_dir, "Products Data")
+        self.catalog_path = os.path.join(self.tmp_dir, "catalog.pkl")
+        os.makedirs(self.data_dir)
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write(CSV_HEADER)
+            f.write('1,Skin,D PLUS,Hya Serum เซรั่มบำรุงผิว,"<p>ผิว<b>ชุ่มชื้น</b></p><ul><li>Hyaluronic</li></ul>"\n')
+            f.write('2,Skin,D PLUS,Sunscreen กันแดด,"<p>SPF50 PA++++</p>"\n')
+        with open(os.path.join(self.data_dir, "collagen.txt"), "w", encoding="utf-8") as f:
+            f.write("Collagen Drink\nคอลลาเจนเพื่อผิว")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def load(self):
+        return load_catalog(self.csv_path, self.data_dir, catalog_path=self.catalog_path)
+
+    def test_compiles_clean_text_and_tokens(self):
+        catalog = self.load()
+        self.assertEqual(len(catalog), 3)
+        serum = catalog.csv_products()[0]
+        self.assertEqual(serum['content'], "ผิวชุ่มชื้น hyaluronic")
+        self.assertEqual(serum['key'], "CSV:Hya Serum เซรั่มบำรุงผิว")
+        self.assertIn('hya', serum['keywords'])
+        self.assertIn(catalog.vocab_index['hyaluronic'], catalog.token_set(0))
+        self.assertEqual(catalog.file_products()[0]['key'], "collagen.txt")
+
+    def test_best_match_uses_normalized_content(self):
+        catalog = self.load()
+        product, score = catalog.best_match(["SPF50", "กันแดด"], catalog.csv_products())
+        self.assertEqual(product['name'], "Sunscreen กันแดด")
+        self.assertEqual(score, 2)
+        self.assertEqual(catalog.best_match(["retinol"]), (None, 0))
+
+    def test_rebuilt_only_when_sources_change(self):
+        self.load()
+        mtime = os.path.getmtime(self.catalog_path)
+        os.utime(self.catalog_path, (mtime - 100, mtime - 100))
+
+        # Touching a source without changing it keeps the compiled catalog
+        os.utime(self.csv_path, None)
+        catalog = self.load()
+        self.assertEqual(len(catalog), 3)
+
+        with open(self.csv_path, "a", encoding="utf-8") as f:
+            f.write('3,Skin,D PLUS,Retinol Night Cream,"<p>retinol</p>"\n')
+        catalog = self.load()
+        self.assertEqual(len(catalog.csv_products()), 3)
+        self.assertEqual(catalog.best_match(["retinol"])[0]['name'], "Retinol Night Cream")
+
+    def test_loader_uses_shared_row_mapping(self):
+        loader = ProductLoader(self.data_dir)
+        products = loader.load_products_from_csv(self.csv_path)
+        self.assertEqual([p['name'] for p in products], ["Hya Serum เซรั่มบำรุงผิว", "Sunscreen กันแดด"])
+        catalog = loader.load_catalog(self.csv_path, catalog_path=self.catalog_path)
+        self.assertEqual(len(catalog), 3)
+
+    def test_streaming_filter_projection_and_top_k(self):
+        loader = ProductLoader(self.data_dir)
+        products = loader.iter_products_from_csv(self.csv_path, fields=('name', 'content'),
+                                                 predicate=lambda p: 'spf50' in p['content'])
+        self.assertFalse(isinstance(products, list))
+        self.assertEqual(list(products), [{'name': "Sunscreen กันแดด", 'content': "spf50 pa++++"}])
+
+        raw = next(loader.iter_products_from_csv(self.csv_path, clean_html=False))
+        self.assertTrue(raw['content'].startswith("<p>"))
+
+        top = loader.top_products(lambda p: len(p['content']), k=1, csv_path=self.csv_path)
+        self.assertEqual(top[0]['content'], "ผิวชุ่มชื้น hyaluronic")
+
+    def test_html_to_text_matches_normalize_text(self):
+        html = '<p>ผิว<b>ใส</b>&nbsp;ส\u0e4d\u0e32<a href="https://x.co">อาง</a></p><script>x</script>\u200bA'
+        self.assertEqual(html_to_text(html), normalize_text(html).text)
+
+class TestProductRanking(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, "products.csv")
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write(CSV_HEADER)
+            f.write('1,Skin,D PLUS,ครีมกันแดด SPF50,"<p>กันแดด กันน้ำ ปกป้องผิวจากแสงแดด</p>"\n')
+            f.write('2,Skin,D PLUS,Collagen Drink,"<p>คอลลาเจนบำรุงผิว</p>"\n')
+            f.write('3,Skin,D PLUS,Acne Cream ครีมสิว,"<p>ดูแลผิวที่เป็นสิว</p>"\n')
+        self.loader = ProductLoader(os.path.join(self.tmp_dir, "missing"))
+        self.loader.load_catalog(self.csv_path, catalog_path=None)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_rank_products_orders_by_relevance(self):
+        ranked = self.loader.rank_products(["แสงแดดแรง ทาครีมกันแดด"], k=2)
+        self.assertEqual(ranked[0][0]['name'], "ครีมกันแดด SPF50")
+        self.assertTrue(all(score > 0 for _, score in ranked))
+        self.assertGreater(ranked[0][1], ranked[-1][1])
+
+    def test_rank_products_without_match(self):
+        self.assertEqual(self.loader.rank_products(["retinol"]), [])
+        self.assertEqual(self.loader.rank_products(["collagen"], source='file'), [])
+        self.assertEqual(self.loader.rank_products(["collagen"], k=3)[0][0]['name'], "Collagen Drink")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import os
+import sys
+import json
+from unittest.mock import MagicMock
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_scheduler import ProductScheduler, STATS_KEY
+from main import schedule_product
+
+class TestProductScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.history = {
+            "__last_post_date__": "2026-01-31",
+            "CSV:A": "2026-01-31T04:22:56",
+            "CSV:B": "2026-01-26T16:44:09",
+        }
+        self.keys = ["CSV:A", "CSV:B", "CSV:C", "CSV:D"]
+
+    def post_sequence(self, scheduler, n, ranked=None):
+        sequence = []
+        for i in range(n):
+            key = scheduler.next_product(ranked)
+            scheduler.record_post(key, f"2026-02-{i + 1:02d}T00:00:00")
+            sequence.append(key)
+        return sequence
+
+    def test_seeds_from_history_and_covers_catalog(self):
+        scheduler = ProductScheduler(self.history, self.keys)
+        self.assertEqual(self.history[STATS_KEY]["CSV:A"], {"count": 1, "last_posted": "2026-01-31T04:22:56"})
+        first_round = self.post_sequence(scheduler, 2)
+        self.assertEqual(sorted(first_round), ["CSV:C", "CSV:D"])
+        # Everything has one post now; the rotation continues least recent first
+        self.assertEqual(self.post_sequence(scheduler, 4), ["CSV:B", "CSV:A", "CSV:C", "CSV:D"])
+
+    def test_trend_match_only_when_its_turn(self):
+        scheduler = ProductScheduler(self.history, self.keys)
+        self.assertEqual(scheduler.next_product(["CSV:A", "CSV:D"]), "CSV:D")
+        sequence = self.post_sequence(scheduler, 8, ranked=["CSV:A"])
+        # A already had a post, so it waits until C and D catch up
+        self.assertEqual(sequence[:3], ["CSV:C", "CSV:D", "CSV:A"])
+        self.assertEqual([sequence.count(k) for k in self.keys], [2, 2, 2, 2])
+
+    def test_weights_and_persistence(self):
+        scheduler = ProductScheduler(self.history, self.keys, weights={"CSV:C": 2})
+        sequence = self.post_sequence(scheduler, 10)
+        self.assertEqual(sequence.count("CSV:C"), 4)
+
+        saved = json.loads(json.dumps(self.history))
+        self.assertEqual(saved["CSV:C"], self.history[STATS_KEY]["CSV:C"]["last_posted"])
+        reloaded = ProductScheduler(saved, self.keys + ["CSV:E"])
+        self.assertEqual(reloaded.next_product(), "CSV:E")
+        self.assertEqual(reloaded.upcoming(2)[0], "CSV:E")
+
+    def test_schedule_product_without_products(self):
+        loader = MagicMock()
+        loader.match_products.return_value = []
+        self.assertEqual(schedule_product(loader, dict(self.history), [], ["serum"], source='file'), (None, False))
+
+        product = {"key": "CSV:A", "name": "A"}
+        self.assertEqual(schedule_product(loader, dict(self.history), [product]), (product, False))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+import threading
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from publisher import WordPressPublisher
+
+def page_response(posts, total_pages):
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = posts
+    response.headers = {'X-WP-TotalPages': str(total_pages)}
+    return response
+
+class TestPostListing(unittest.TestCase):
+
+    def setUp(self):
+        self.publisher = WordPressPublisher("http://example.com", "user", "pass")
+
+    @patch('requests.Session.get')
+    def test_get_posts_projection_and_filters(self, mock_get):
+        mock_get.return_value = page_response([{"id": 1, "title": {"rendered": "A"}}], 1)
+        posts = self.publisher.get_posts(per_page=50, fields=('id', 'title'), context='embed',
+                                         status='publish', modified_after='2026-01-01T00:00:00')
+        self.assertEqual(posts[0]['id'], 1)
+        params = mock_get.call_args[1]['params']
+        self.assertEqual(params['_fields'], 'id,title')
+        self.assertEqual(params['context'], 'embed')
+        self.assertEqual(params['status'], 'publish')
+        self.assertEqual(params['modified_after'], '2026-01-01T00:00:00')
+        self.assertNotIn('before', params)
+
+    @patch('requests.Session.get')
+    def test_iter_posts_stops_at_total_pages(self, mock_get):
+        mock_get.side_effect = [
+            page_response([{"id": 1}, {"id": 2}], 2),
+            page_response([{"id": 3}], 2),
+        ]
+        ids = [p['id'] for p in self.publisher.iter_posts(per_page=2, fields=('id',))]
+        self.assertEqual(ids, [1, 2, 3])
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args[1]['params']['page'], 2)
+
+    def test_skipped_writes_counted_across_threads(self):
+        publisher = WordPressPublisher("http://example.com", "user", "pass")
+        publisher.mirror = MagicMock()
+        publisher.mirror.changed_fields.return_value = {}
+
+        def check():
+            for post_id in range(500):
+                publisher.changed_fields(post_id, {"content": "x"})
+        threads = [threading.Thread(target=check) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(publisher.skipped_writes, 4000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import MagicMock
+import json
+import os
+import sys
+import threading
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compliance_matcher import get_compliance_matcher
+from seo_rewriter import SEORewriter, split_sections
+
+INTRO = "<p>เซรั่มไฮยาช่วยให้ผิวชุ่มชื้น อ่านรีวิวฉบับเต็มได้ที่นี่</p>\n"
+CLEAN = "<h2>วิธีใช้</h2>\n<p>ทาเช้าและเย็นหลังล้างหน้า ใช้ต่อเนื่องทุกวัน</p>\n"
+PUSHY = "<h2>ราคา</h2>\n<p>ซื้อเลยที่ shopee วันนี้ ลดราคา order now</p>\n"
+LONG_TAIL = "<h2>รีวิวจากผู้ใช้</h2>\n" + "<p>ผิวดูสุขภาพดีขึ้นหลังใช้สองสัปดาห์</p>\n" * 200 + "<p>TAIL-MARKER</p>"
+
+class FakeModel:
+    """Answers head and section prompts; records the section prompts it saw."""
+
+    def __init__(self, section_html=None):
+        self.section_html = section_html
+        self.section_prompts = []
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt):
+        if "Rewrite ONE section" in prompt:
+            with self.lock:
+                self.section_prompts.append(prompt)
+            html = self.section_html or "<h2>ราคา</h2>\n<p>ดูรายละเอียดราคาและช่องทางจำหน่ายได้ตามสะดวก</p>"
+            return json.dumps({"section_html": html})
+        return "```json\n" + json.dumps({
+            "needs_update": True, "corrected_title": "Better title", "seo_keyphrase": "เซรั่มไฮยา",
+            "seo_meta_description": "desc", "intro_html": "<p>เซรั่มไฮยา ช่วยให้ผิวชุ่มชื้น อ่านรีวิวฉบับเต็ม</p>",
+        }) + "\n```"
+
+class TestSEORewriter(unittest.TestCase):
+
+    def setUp(self):
+        self.yoast = MagicMock()
+        self.yoast.calculate_readability_score.return_value = 80
+        self.matcher = get_compliance_matcher()
+        self.post = {"id": 7, "title": {"rendered": "รีวิวเซรั่ม"}, "meta": {"_yoast_wpseo_focuskw": "เซรั่ม"}}
+
+    def test_split_sections_is_lossless(self):
+        content = INTRO + CLEAN + PUSHY + LONG_TAIL
+        sections = split_sections(content)
+        self.assertEqual(''.join(sections), content)
+        self.assertEqual(sections[0], INTRO)
+        self.assertEqual(sections[1], CLEAN)
+        self.assertTrue(all(len(s) <= 4000 for s in sections))
+        self.assertGreater(len(sections), 4)
+        self.assertEqual(split_sections(CLEAN)[0], "")
+
+    def test_rewrites_only_flagged_sections(self):
+        model = FakeModel()
+        rewriter = SEORewriter(model, self.yoast, self.matcher)
+        content = INTRO + CLEAN + PUSHY + LONG_TAIL
+        self.assertTrue(rewriter.should_chunk(content))
+
+        res = rewriter.rewrite(self.post, content)
+
+        self.assertEqual(len(model.section_prompts), 1)
+        self.assertIn("shopee", model.section_prompts[0])
+        self.assertEqual(res['sections_rewritten'], 1)
+        self.assertEqual(res['corrected_title'], "Better title")
+        html = res['corrected_content_html']
+        self.assertTrue(html.startswith("<p>เซรั่มไฮยา ช่วยให้ผิวชุ่มชื้น"))
+        self.assertIn(CLEAN, html)
+        self.assertNotIn("shopee", html)
+        self.assertTrue(html.endswith(LONG_TAIL))
+
+    def test_rejects_rewrites_that_drop_content(self):
+        model = FakeModel(section_html="<p>สั้น</p>")
+        rewriter = SEORewriter(model, self.yoast, self.matcher)
+        content = INTRO + PUSHY
+
+        res = rewriter.rewrite(self.post, content)
+
+        self.assertEqual(res['sections_rewritten'], 0)
+        self.assertTrue(res['corrected_content_html'].endswith(PUSHY))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex, HashingEmbedder
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__(dim=256)
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+class TestVectorIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.docs = {
+            "post:1": ("ครีมกันแดด ปกป้องผิวจากแสงแดด", {"title": "Sunscreen"}),
+            "post:2": ("คอลลาเจน บำรุงผิวให้เต่งตึง", {"title": "Collagen"}),
+            "post:3": ("วิธีดูแลผิวเป็นสิว", {"title": "Acne"}),
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_index(self, embedder=None):
+        return VectorIndex("posts", embedder=embedder or CountingEmbedder(), index_dir=self.tmp_dir)
+
+    def test_search_returns_cosine_top_k(self):
+        index = self.make_index()
+        index.update(self.docs)
+        results = index.search("แสงแดดแรง ต้องทากันแดด", k=2)
+        self.assertEqual(results[0][0]['meta']['title'], "Sunscreen")
+        self.assertLessEqual(results[0][1], 1.0 + 1e-6)
+        self.assertEqual([r[0]['id'] for r in index.search("สิว", k=3, ids=["post:3"])], ["post:3"])
+
+    def test_updates_are_incremental_and_persisted(self):
+        self.make_index().update(self.docs)
+
+        embedder = CountingEmbedder()
+        index = self.make_index(embedder)
+        self.assertIsInstance(index.matrix, np.memmap)
+        self.assertEqual(index.update(self.docs), 0)
+
+        changed = dict(self.docs)
+        changed["post:2"] = ("คอลลาเจนชนิดใหม่", {"title": "Collagen v2"})
+        changed["post:4"] = ("เซรั่มวิตามินซี", {"title": "Vitamin C"})
+        del changed["post:1"]
+        self.assertEqual(index.update(changed, prune=True), 2)
+        self.assertEqual(embedder.embedded, ["คอลลาเจนชนิดใหม่", "เซรั่มวิตามินซี"])
+
+        reloaded = self.make_index()
+        self.assertEqual(sorted(i['id'] for i in reloaded.items), ["post:2", "post:3", "post:4"])
+        self.assertEqual(reloaded.search("วิตามินซี", k=1)[0][0]['meta']['title'], "Vitamin C")
+        self.assertEqual(reloaded.search("สิว", k=1)[0][0]['id'], "post:3")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from publisher import WordPressPublisher
+from wp_batch import BatchWriter
+
+def batch_response(statuses):
+    response = MagicMock()
+    response.status_code = 207
+    response.json.return_value = {"responses": [
+        {"status": status, "body": {} if status == 200 else {"message": "Invalid parameter"}} for status in statuses
+    ]}
+    return response
+
+class TestBatchWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.publisher = WordPressPublisher("http://example.com", "user", "pass")
+
+    @patch('requests.Session.post')
+    def test_coalesces_writes_per_post(self, mock_post):
+        mock_post.return_value = batch_response([200, 400])
+        writer = BatchWriter(self.publisher)
+        writer.queue(1, {"content": "<p>Fixed</p>", "meta": {"_yoast_wpseo_focuskw": "kw"}})
+        writer.queue(1, {"featured_media": 9, "meta": {"_yoast_wpseo_linkdex": "80"}})
+        writer.queue(2, {"title": "New"})
+        self.assertEqual(len(writer), 2)
+
+        self.assertEqual(writer.flush(), {1: True, 2: False})
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(mock_post.call_args[0][0], "http://example.com/wp-json/batch/v1")
+        requests_sent = mock_post.call_args[1]['json']['requests']
+        self.assertEqual(requests_sent[0]['path'], "/wp/v2/posts/1")
+        self.assertEqual(requests_sent[0]['body'], {
+            "content": "<p>Fixed</p>", "featured_media": 9,
+            "meta": {"_yoast_wpseo_focuskw": "kw", "_yoast_wpseo_linkdex": "80"},
+        })
+        self.assertEqual(len(writer), 0)
+
+    @patch('requests.Session.post')
+    def test_chunks_of_25(self, mock_post):
+        mock_post.side_effect = [batch_response([200] * 25), batch_response([200] * 5)]
+        writer = BatchWriter(self.publisher)
+        for post_id in range(30):
+            writer.queue(post_id, {"content": "x"})
+        self.assertTrue(all(writer.flush().values()))
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch('requests.Session.post')
+    def test_falls_back_without_batch_endpoint(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=404)
+        fallback = MagicMock(return_value={1: True, 2: True})
+        writer = BatchWriter(self.publisher, fallback=fallback)
+        writer.queue(1, {"content": "a"})
+        writer.queue(2, {"content": "b"})
+        self.assertEqual(writer.flush(), {1: True, 2: True})
+        fallback.assert_called_once_with({1: {"content": "a"}, 2: {"content": "b"}})
+
+        # The endpoint is not retried once it is known to be missing
+        writer.queue(3, {"content": "c"})
+        fallback.return_value = {3: True}
+        writer.flush()
+        self.assertEqual(mock_post.call_count, 1)
+
+    @patch('requests.Session.post')
+    def test_failed_chunk_falls_back_without_disabling_batching(self, mock_post):
+        mock_post.side_effect = [MagicMock(status_code=500), batch_response([200])]
+        fallback = MagicMock(return_value={1: True})
+        writer = BatchWriter(self.publisher, chunk_size=1, fallback=fallback)
+        writer.queue(1, {"content": "a"})
+        writer.queue(2, {"content": "b"})
+        self.assertEqual(writer.flush(), {1: True, 2: True})
+        fallback.assert_called_once_with({1: {"content": "a"}})
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertTrue(writer.batch_supported)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,279 @@
+"""
+Text normalization helpers shared by the compliance matcher and content checks.
+
+Thai text reaching this project is noisy: the FDA manual was extracted from a
+PDF whose fonts emit Private Use Area glyphs for shifted tone marks and vowels,
+SARA AM often arrives decomposed (NIKHAHIT + SARA AA), and article/product text
+is wrapped in HTML with entities. `normalize_text` folds all of that into one
+canonical form in a single pass and keeps enough bookkeeping to map positions
+in the normalized string back to the original source.
+"""
+
+import bisect
+import html
+import re
+from typing import List, Tuple
+
+# Legacy Thai font glyphs (Private Use Area) -> standard Unicode code points.
+_THAI_PUA_MAP = {
+    0xF700: 0x0E10, 0xF701: 0x0E34, 0xF702: 0x0E35, 0xF703: 0x0E36,
+    0xF704: 0x0E37, 0xF705: 0x0E48, 0xF706: 0x0E49, 0xF707: 0x0E4A,
+    0xF708: 0x0E4B, 0xF709: 0x0E4C, 0xF70A: 0x0E48, 0xF70B: 0x0E49,
+    0xF70C: 0x0E4A, 0xF70D: 0x0E4B, 0xF70E: 0x0E4C, 0xF70F: 0x0E0D,
+    0xF710: 0x0E31, 0xF711: 0x0E4D, 0xF712: 0x0E47, 0xF713: 0x0E48,
+    0xF714: 0x0E49, 0xF715: 0x0E4A, 0xF716: 0x0E4B, 0xF717: 0x0E4C,
+    0xF718: 0x0E38, 0xF719: 0x0E39, 0xF71A: 0x0E3A,
+    0x00A0: 0x0020,  # NBSP behaves like a normal space
+}
+
+_ZERO_WIDTH = '\u200b\u200c\u200d\u2060\ufeff'
+
+# Runs that change length when normalized: whitespace, zero-width characters
+# and decomposed SARA AM (optionally with a tone mark in between).
+_SPECIAL_RE = re.compile('\\s+|[\u200b\u200c\u200d\u2060\ufeff]+|\u0e4d([\u0e48-\u0e4b]?)\u0e32')
+
+# Tags (including script/style bodies and comments) and character entities.
+_MARKUP_RE = re.compile(
+    r'<(script|style)\b.*?</\1\s*>|<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>|'
+    r'&(?:#\d+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);',
+    re.S | re.I
+)
+
+_HREF_RE = re.compile(r'''\bhref\s*=\s*(["'])(.*?)\1''', re.S | re.I)
+
+# Tags that separate words. Inline tags (strong, em, span, a...) must not
+# insert a space: Thai has no word spacing, so "ผิว<b>ใส</b>" is one word.
+_BLOCK_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hr', 'img', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section',
+    'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul',
+])
+
+
+class NormalizedText:
+    """
+    Normalized text plus a piecewise mapping back to source offsets.
+
+    The mapping is stored as anchors: each anchor starts a run of normalized
+    characters that either maps 1:1 onto the source (linear) or collapses onto
+    a single source position (whitespace runs, entities, composed SARA AM).
+    """
+
+    __slots__ = ('text', '_norm_starts', '_src_starts', '_linear')
+
+    def __init__(self, text, norm_starts, src_starts, linear):
+        self.text = text
+        self._norm_starts = norm_starts
+        self._src_starts = src_starts
+        self._linear = linear
+
+    def source_offset(self, index: int) -> int:
+        """Maps an index in the normalized text to an index in the source."""
+        i = bisect.bisect_right(self._norm_starts, index) - 1
+        if i < 0:
+            return 0
+        if self._linear[i]:
+            return self._src_starts[i] + (index - self._norm_starts[i])
+        return self._src_starts[i]
+
+    def source_span(self, start: int, end: int) -> Tuple[int, int]:
+        """Maps a normalized [start, end) span to a source [start, end) span."""
+        if end <= start:
+            src = self.source_offset(start)
+            return src, src
+        return self.source_offset(start), self.source_offset(end - 1) + 1
+
+
+class _Builder:
+    """Accumulates normalized pieces and their source anchors."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.length = 0
+        self.norm_starts: List[int] = []
+        self.src_starts: List[int] = []
+        self.linear: List[bool] = []
+        self.trailing_space = True  # suppress leading whitespace
+
+    def emit(self, piece: str, src: int, linear: bool):
+        if not piece:
+            return
+        self.norm_starts.append(self.length)
+        self.src_starts.append(src)
+        self.linear.append(linear)
+        self.parts.append(piece)
+        self.length += len(piece)
+        self.trailing_space = piece.endswith(' ')
+
+    def space(self, src: int):
+        if not self.trailing_space:
+            self.emit(' ', src, False)
+
+    def build(self) -> NormalizedText:
+        text = ''.join(self.parts)
+        if text.endswith(' '):
+            text = text[:-1]
+        return NormalizedText(text, self.norm_starts, self.src_starts, self.linear)
+
+
+def _emit_text(builder: _Builder, chunk: str, base: int):
+    """Normalizes a markup-free chunk that starts at source offset `base`."""
+    chunk = chunk.translate(_THAI_PUA_MAP)
+    pos = 0
+    for m in _SPECIAL_RE.finditer(chunk):
+        if m.start() > pos:
+            _emit_plain(builder, chunk[pos:m.start()], base + pos)
+        token = m.group()
+        if token[0] == '\u0e4d':
+            builder.emit(m.group(1) + '\u0e33', base + m.start(), False)
+        elif not token[0] in _ZERO_WIDTH:
+            builder.space(base + m.start())
+        pos = m.end()
+    if pos < len(chunk):
+        _emit_plain(builder, chunk[pos:], base + pos)
+
+
+def _emit_plain(builder: _Builder, piece: str, src: int):
+    lowered = piece.lower()
+    if len(lowered) == len(piece):
+        builder.emit(lowered, src, True)
+    else:
+        # Rare length-changing case mappings (e.g. U+0130): map per character.
+        for i, ch in enumerate(piece):
+            builder.emit(ch.lower(), src + i, False)
+
+
+def normalize_text(text: str, strip_html: bool = True) -> NormalizedText:
+    """
+    Canonicalizes Thai/English text for matching in a single pass.
+
+    Lowercases Latin text, maps legacy PUA Thai glyphs to standard code
+    points, composes SARA AM, drops zero-width characters and collapses
+    whitespace. With `strip_html`, tags are removed (block tags become a
+    space, link targets are kept as text) and entities are decoded.
+    """
+    builder = _Builder()
+    if not text:
+        return builder.build()
+    if not strip_html:
+        _emit_text(builder, text, 0)
+        return builder.build()
+
+    pos = 0
+    for m in _MARKUP_RE.finditer(text):
+        if m.start() > pos:
+            _emit_text(builder, text[pos:m.start()], pos)
+        token = m.group()
+        if token[0] == '&':
+            _emit_text_collapsed(builder, html.unescape(token), m.start())
+        elif m.group(3):
+            tag = m.group(3).lower()
+            if tag in _BLOCK_TAGS:
+                builder.space(m.start())
+            if tag == 'a' and not m.group(2):
+                href = _HREF_RE.search(m.group(4) or '')
+                if href and href.group(2).strip():
+                    builder.space(m.start())
+                    _emit_text(builder, href.group(2), m.start(4) + href.start(2))
+                    builder.space(m.start())
+        else:
+            builder.space(m.start())  # script/style/comment
+        pos = m.end()
+    if pos < len(text):
+        _emit_text(builder, text[pos:], pos)
+    return builder.build()
+
+
+def _emit_text_collapsed(builder: _Builder, decoded: str, src: int):
+    """Emits decoded entity text anchored at the entity's source offset."""
+    sub = _Builder()
+    sub.trailing_space = builder.trailing_space
+    _emit_text(sub, decoded, 0)
+    piece = ''.join(sub.parts)
+    if piece == ' ':
+        builder.space(src)
+    else:
+        builder.emit(piece, src, False)
+
+
+_ZERO_WIDTH_RE = re.compile('[\u200b\u200c\u200d\u2060\ufeff]+')
+_PUA_RE = re.compile('[\uf700-\uf71a\u00a0]')
+_SARA_AM_RE = re.compile('\u0e4d([\u0e48-\u0e4b]?)\u0e32')
+
+
+def _replace_markup(m) -> str:
+    token = m.group()
+    if token[0] == '&':
+        return html.unescape(token)
+    if not m.group(3):
+        return ' '  # script/style/comment
+    tag = m.group(3).lower()
+    if tag == 'a' and not m.group(2):
+        href = _HREF_RE.search(m.group(4) or '')
+        if href and href.group(2).strip():
+            return f" {href.group(2)} "
+    return ' ' if tag in _BLOCK_TAGS else ''
+
+
+def html_to_text(text: str) -> str:
+    """
+    Returns the normalized, tag-free text of an HTML fragment.
+
+    Same result as `normalize_text(text).text`, computed with whole-string
+    operations since no offset mapping is needed (bulk product imports).
+    """
+    if not text:
+        return ''
+    text = _MARKUP_RE.sub(_replace_markup, text)
+    if _PUA_RE.search(text):
+        # str.translate is per-character; most text has nothing to map
+        text = text.translate(_THAI_PUA_MAP)
+    text = _ZERO_WIDTH_RE.sub('', _SARA_AM_RE.sub('\\1\u0e33', text))
+    return ' '.join(text.lower().split())
+
+
+_LATIN_WORD_RE = re.compile(r'[a-z0-9]+(?:[.\-+][a-z0-9]+)*')
+_THAI_RUN_RE = re.compile('[ก-๎]+')
+_KEYWORD_SPLIT_RE = re.compile(r'[\s|,;:!?()\[\]"“”\'/&+*–-]+')
+
+# Marketplace title noise that says nothing about the product itself
+KEYWORD_STOPWORDS = frozenset([
+    'and', 'the', 'for', 'with', 'plus', 'set', 'promotion', 'skin', 'd',
+    'และ', 'สำหรับ', 'ด้วย', 'จาก', 'กล่อง', 'ชิ้น', 'ซอง', 'ขวด', 'ก้อน', 'กรัม',
+    'โปรวันเกิด', 'พร้อมส่ง', 'จัดส่งเร็วใน', 'ชม.', 'แถม', 'ฟรี', 'สุดพิเศษ',
+])
+
+
+def tokenize(text: str, ngram: int = 3, strip_html: bool = False) -> List[str]:
+    """
+    Splits text into search tokens: Latin words, and character n-grams of
+    each Thai run (Thai has no word spacing, so n-grams stand in for a
+    dictionary segmenter). Runs shorter than `ngram` are kept whole.
+    """
+    norm = normalize_text(text, strip_html=strip_html).text
+    tokens = [w for w in _LATIN_WORD_RE.findall(norm) if len(w) > 1 or w.isdigit()]
+    for run in _THAI_RUN_RE.findall(norm):
+        if len(run) <= ngram:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + ngram] for i in range(len(run) - ngram + 1))
+    return tokens
+
+
+def extract_keywords(text: str, limit: int = 15) -> List[str]:
+    """
+    Extracts keyword phrases from a short text such as a product name:
+    space/punctuation separated segments, minus marketplace noise and numbers.
+    """
+    norm = normalize_text(text, strip_html=False).text
+    keywords = []
+    for segment in _KEYWORD_SPLIT_RE.split(norm):
+        segment = segment.strip('.')
+        if len(segment) < 2 or segment in KEYWORD_STOPWORDS or segment[0].isdigit():
+            continue
+        if segment not in keywords:
+            keywords.append(segment)
+        if len(keywords) >= limit:
+            break
+    return keywords
@@ -0,0 +1,199 @@
+"""
+Local vector index for semantic product and topic matching.
+
+Embeddings are stored as an L2-normalized float32 matrix in `<name>.npy`
+(opened memory-mapped) with a JSON sidecar holding each item's id, content
+hash and metadata. `update()` only embeds items whose hash changed, so the
+index is maintained incrementally across runs.
+
+The embedder is pluggable via EMBEDDING_BACKEND: "hashing" (default, local,
+no network) or "vertex" (Vertex AI text embeddings).
+"""
+
+import hashlib
+import json
+import math
+import os
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from text_utils import tokenize
+
+DEFAULT_INDEX_DIR = "vector_index"
+
+
+class HashingEmbedder:
+    """
+    Feature-hashed bag of tokens (Latin words, Thai character trigrams) with
+    sublinear term frequency. Deterministic and fully local.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token, count in Counter(tokenize(text, strip_html=True)).items():
+                h = zlib.crc32(token.encode('utf-8'))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                matrix[row, h % self.dim] += sign * (1.0 + math.log(count))
+        return matrix
+
+
+class VertexEmbedder:
+    """Vertex AI text embeddings (multilingual model by default)."""
+
+    def __init__(self, model_name: Optional[str] = None, batch_size: int = 16):
+        from vertexai import init as vertexai_init
+        from vertexai.language_models import TextEmbeddingModel
+
+        vertexai_init(
+            project=os.getenv("GOOGLE_CLOUD_PROJECT"),
+            location=os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
+        )
+        model_name = model_name or os.getenv("VERTEX_EMBEDDING_MODEL", "text-multilingual-embedding-002")
+        self.model = TextEmbeddingModel.from_pretrained(model_name)
+        self.batch_size = batch_size
+        self.name = f"vertex-{model_name}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = [t[:8000] for t in texts[i:i + self.batch_size]]
+            vectors.extend(e.values for e in self.model.get_embeddings(batch))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def get_embedder(backend: Optional[str] = None):
+    """Returns the embedder selected by `backend` or EMBEDDING_BACKEND."""
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "hashing")).lower()
+    if backend == "vertex":
+        try:
+            return VertexEmbedder()
+        except Exception as e:
+            print(f"VectorIndex: Vertex embeddings unavailable ({e}), using local hashing embedder.")
+    return HashingEmbedder()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class VectorIndex:
+    def __init__(self, name: str, embedder=None, index_dir: str = DEFAULT_INDEX_DIR):
+        self.embedder = embedder or get_embedder()
+        self.matrix_path = os.path.join(index_dir, f"{name}.npy")
+        self.meta_path = os.path.join(index_dir, f"{name}.json")
+        self.index_dir = index_dir
+        self.items: List[Dict] = []
+        self.matrix = None
+        self._load()
+
+    def _load(self):
+        if not (os.path.exists(self.meta_path) and os.path.exists(self.matrix_path)):
+            return
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('embedder') != self.embedder.name:
+                print(f"VectorIndex: Embedder changed, rebuilding {self.matrix_path}.")
+                return
+            matrix = np.load(self.matrix_path, mmap_mode='r')
+            if matrix.shape[0] != len(meta['items']):
+                return
+            self.items, self.matrix = meta['items'], matrix
+        except Exception as e:
+            print(f"VectorIndex: Ignoring unreadable index {self.meta_path}: {e}")
+
+    def __len__(self):
+        return len(self.items)
+
+    def update(self, documents: Dict[str, Tuple[str, Dict]], prune: bool = False) -> int:
+        """
+        Adds or refreshes documents given as {id: (text, metadata)}, embedding
+        only those whose content hash changed. With `prune`, ids missing from
+        `documents` are removed. Returns the number of embedded documents.
+        """
+        positions = {item['id']: i for i, item in enumerate(self.items)}
+        keep = [i for i, item in enumerate(self.items) if not prune or item['id'] in documents]
+        items = [dict(self.items[i]) for i in keep]
+        rows = list(keep)
+        index_of = {item['id']: n for n, item in enumerate(items)}
+
+        pending = []
+        for doc_id, (text, metadata) in documents.items():
+            digest = content_hash(text)
+            pos = positions.get(doc_id)
+            if pos is not None and self.items[pos]['hash'] == digest:
+                items[index_of[doc_id]]['meta'] = metadata
+                continue
+            pending.append((doc_id, text, digest, metadata))
+
+        if not pending and len(items) == len(self.items):
+            if items != self.items:
+                self._save_meta(items)
+            return 0
+
+        new_vectors = self._normalize(self.embedder.embed([text for _, text, _, _ in pending])) if pending else None
+        dim = new_vectors.shape[1] if new_vectors is not None else self.matrix.shape[1]
+        matrix = np.zeros((len(items) + sum(1 for p in pending if p[0] not in index_of), dim), dtype=np.float32)
+        if rows:
+            matrix[:len(rows)] = self.matrix[rows]
+
+        next_row = len(items)
+        for n, (doc_id, _, digest, metadata) in enumerate(pending):
+            row = index_of.get(doc_id)
+            if row is None:
+                row = next_row
+                next_row += 1
+                items.append({'id': doc_id})
+            items[row].update({'hash': digest, 'meta': metadata})
+            matrix[row] = new_vectors[n]
+
+        self._save(items, matrix)
+        return len(pending)
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+    def _save(self, items: List[Dict], matrix: np.ndarray):
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Release the old memory map before replacing the file (Windows)
+        self.matrix = None
+        tmp_matrix = f"{self.matrix_path}.tmp.npy"
+        np.save(tmp_matrix, matrix)
+        os.replace(tmp_matrix, self.matrix_path)
+        self._save_meta(items)
+        self.matrix = np.load(self.matrix_path, mmap_mode='r')
+
+    def _save_meta(self, items: List[Dict]):
+        tmp_meta = f"{self.meta_path}.tmp"
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({'embedder': self.embedder.name, 'items': items}, f, ensure_ascii=False)
+        os.replace(tmp_meta, self.meta_path)
+        self.items = items
+
+    def search(self, query: str, k: int = 5, ids: Optional[Iterable[str]] = None) -> List[Tuple[Dict, float]]:
+        """
+        Returns up to `k` (item, cosine similarity) pairs with a positive
+        score, best first. `ids` restricts the search to those item ids.
+        """
+        if not self.items or not query:
+            return []
+        vector = self._normalize(self.embedder.embed([query]))[0]
+        scores = np.asarray(self.matrix @ vector)
+        if ids is not None:
+            wanted = set(ids)
+            mask = np.array([item['id'] in wanted for item in self.items], dtype=bool)
+            scores = np.where(mask, scores, 0.0)
+        k = min(k, len(self.items))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.items[i], float(scores[i])) for i in top if scores[i] > 0]
@@ -41,7 +41,7 @@ class VertexRateLimiter:
     Implements token bucket algorithm and usage tracking.
     """
 
-    def __init__(self, requests_per_minute=5, requests_per_day=1500):
+    def __init__(self, requests_per_minute=5, requests_per_day=1500, usage_log_file="vertex_usage.json"):
         """
         Initialize rate limiter with more conservative defaults.
 
@@ -51,6 +51,7 @@ class VertexRateLimiter:
         Args:
             requests_per_minute: Maximum requests per minute (default: 5, conservative)
             requests_per_day: Maximum requests per day (default: 1500, reduced from 2500)
+            usage_log_file: File the daily count is persisted to
         """
         self.requests_per_minute = requests_per_minute
         self.requests_per_day = requests_per_day
@@ -66,7 +67,7 @@ class VertexRateLimiter:
         self.daily_usage_lock = threading.Lock()
 
         # Usage log file
-        self.usage_log_file = "vertex_usage.json"
+        self.usage_log_file = usage_log_file
         self._load_usage_log()
 
     def _load_usage_log(self):
@@ -183,6 +184,23 @@ def get_rate_limiter():
     return _rate_limiter
 
 
+_image_rate_limiter = None
+_image_rate_limiter_lock = threading.Lock()
+
+
+def get_image_rate_limiter():
+    """Rate limiter for Imagen requests, with its own quota and usage log (imagen_usage.json)."""
+    global _image_rate_limiter
+    with _image_rate_limiter_lock:
+        if _image_rate_limiter is None:
+            _image_rate_limiter = VertexRateLimiter(
+                requests_per_minute=int(os.getenv("IMAGEN_REQUESTS_PER_MINUTE", "10")),
+                requests_per_day=int(os.getenv("IMAGEN_REQUESTS_PER_DAY", "200")),
+                usage_log_file="imagen_usage.json"
+            )
+    return _image_rate_limiter
+
+
 def call_vertex_with_retry(model: GenerativeModel, prompt: str, max_retries: int = 3,
                           generation_config: Optional[GenerationConfig] = None) -> Optional[Any]:
     """
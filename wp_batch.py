@@ -0,0 +1,123 @@
+"""
+Batched post writes through the WordPress batch API (`/wp-json/batch/v1`).
+
+`BatchWriter.queue` coalesces every pending write for a post (content,
+title, featured_media, Yoast meta) into one payload; `flush` sends up to
+25 posts per batch request (the WordPress limit) and reports per-item
+results. Fields that already match the post mirror are dropped first and
+posts with nothing left to change are skipped (`skipped`). Sites without
+the batch endpoint (WordPress < 5.6, or a plugin blocking it) fall back to
+individual update calls for the rest of the run; any other failed batch
+request falls back for that chunk only.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional
+
+MAX_BATCH_SIZE = 25  # WordPress rejects larger batches
+ENDPOINT_MISSING = (404, 405, 501)  # No batch route on this site
+
+
+def merge_post_data(pending: Dict, data: Dict) -> Dict:
+    """Merges `data` into a pending post payload; `meta` dicts are merged key by key."""
+    for key, value in data.items():
+        if key == 'meta' and isinstance(value, dict):
+            pending.setdefault('meta', {}).update(value)
+        else:
+            pending[key] = value
+    return pending
+
+
+class BatchWriter:
+    def __init__(self, publisher, chunk_size: int = MAX_BATCH_SIZE,
+                 fallback: Optional[Callable[[Dict[int, Dict]], Dict[int, bool]]] = None):
+        """
+        `fallback` applies {post_id: data} updates when the batch endpoint is
+        unavailable; it defaults to one `publisher.update_post` call per post.
+        """
+        self.publisher = publisher
+        self.batch_url = f"{publisher.wp_url}/wp-json/batch/v1"
+        self.chunk_size = min(chunk_size, MAX_BATCH_SIZE)
+        self.fallback = fallback or self._update_individually
+        self.batch_supported = True
+        self.pending: Dict[int, Dict] = {}
+        self.results: Dict[int, bool] = {}
+        self.skipped = set()
+        # Maintenance workers queue concurrently
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.pending)
+
+    def queue(self, post_id: int, data: Dict):
+        with self.lock:
+            merge_post_data(self.pending.setdefault(post_id, {}), data)
+
+    def _update_individually(self, updates: Dict[int, Dict]) -> Dict[int, bool]:
+        return {pid: self.publisher.update_post(pid, data) for pid, data in updates.items()}
+
+    def _send_batch(self, chunk: Dict[int, Dict]) -> Optional[Dict[int, bool]]:
+        """
+        Sends one batch request; returns None when the request failed, and
+        turns batching off when the site has no batch endpoint at all.
+        """
+        ids = list(chunk)
+        payload = {
+            "validation": "normal",
+            "requests": [{"method": "POST", "path": f"/wp/v2/posts/{pid}", "body": chunk[pid]} for pid in ids],
+        }
+        try:
+            response = self.publisher.session.post(self.batch_url, json=payload)
+        except Exception as e:
+            print(f"Batch: Request failed ({e})")
+            return None
+        if response.status_code in ENDPOINT_MISSING:
+            print(f"Batch: Endpoint unavailable ({response.status_code}), using individual updates.")
+            self.batch_supported = False
+            return None
+        if response.status_code not in (200, 207):
+            print(f"Batch: Request failed ({response.status_code}), updating this chunk individually.")
+            return None
+
+        responses: List[Dict] = response.json().get('responses', [])
+        outcome = {}
+        for index, pid in enumerate(ids):
+            item = responses[index] if index < len(responses) else {}
+            status = item.get('status', 0)
+            ok = 200 <= status < 300
+            if ok:
+                if self.publisher.mirror is not None:
+                    self.publisher.mirror.apply_update(pid, chunk[pid])
+            else:
+                body = item.get('body') or {}
+                message = body.get('message', '') if isinstance(body, dict) else ''
+                print(f"Batch: Update failed for post {pid}: {status} {message}")
+            outcome[pid] = ok
+        return outcome
+
+    def flush(self) -> Dict[int, bool]:
+        """Sends all pending writes; returns {post_id: success} for this flush."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        outcome = {}
+        for pid in list(pending):
+            changed = self.publisher.changed_fields(pid, pending[pid])
+            if changed:
+                pending[pid] = changed
+            else:
+                # Nothing differs from the server; the write is a no-op
+                del pending[pid]
+                self.skipped.add(pid)
+                outcome[pid] = True
+        ids = list(pending)
+        for start in range(0, len(ids), self.chunk_size):
+            chunk = {pid: pending[pid] for pid in ids[start:start + self.chunk_size]}
+            result = self._send_batch(chunk) if self.batch_supported else None
+            if result is None:
+                result = self.fallback(chunk)
+            outcome.update(result)
+        if ids:
+            ok = sum(1 for pid in ids if outcome.get(pid))
+            print(f"Batch: {ok}/{len(ids)} post update(s) applied.")
+        self.results.update(outcome)
+        return outcome
@@ -8,11 +8,12 @@ Handles integration with Yoast SEO plugin for WordPress:
 """
 
 import logging
-import requests
 import os
 import re
 from typing import Dict, List, Optional
 
+from http_client import get_session, basic_auth_header
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,21 +25,18 @@ class YoastSEOIntegrator:
         self.wp_user = wp_user
         self.wp_app_password = wp_app_password
         self.api_base = f"{self.wp_url}/wp-json"
-
-    def get_auth_headers(self) -> Dict[str, str]:
-        """Get authentication headers for WordPress REST API."""
-        import base64
-        credentials = f"{self.wp_user}:{self.wp_app_password}"
-        token = base64.b64encode(credentials.encode()).decode('utf-8')
-        return {
-            "Authorization": f"Basic {token}",
+        self.session = get_session(self.wp_url, wp_user, wp_app_password)
+        self._auth_headers = {
+            "Authorization": basic_auth_header(wp_user, wp_app_password),
             "Content-Type": "application/json"
         }
 
-    def update_yoast_meta_fields(self, post_id: int, seo_data: Dict) -> bool:
-        """
-        Update Yoast SEO meta fields for a post via standard WP Meta API.
-        """
+    def get_auth_headers(self) -> Dict[str, str]:
+        """Get authentication headers for WordPress REST API (computed once)."""
+        return dict(self._auth_headers)
+
+    def build_meta_payload(self, seo_data: Dict) -> Dict[str, str]:
+        """Maps seo_data to the non-empty Yoast meta fields (for update_post or batched writes)."""
         meta_fields = {
             "_yoast_wpseo_focuskw": seo_data.get('focus_keyword', ''),
             "_yoast_wpseo_title": seo_data.get('seo_title', ''),
@@ -51,13 +49,18 @@ class YoastSEOIntegrator:
             "_yoast_wpseo_content_score": str(seo_data.get('readability_score', 0)),
         }
 
-        meta_payload = {k: v for k, v in meta_fields.items() if v}
+        return {k: v for k, v in meta_fields.items() if v}
+
+    def update_yoast_meta_fields(self, post_id: int, seo_data: Dict) -> bool:
+        """
+        Update Yoast SEO meta fields for a post via standard WP Meta API.
+        """
+        meta_payload = self.build_meta_payload(seo_data)
 
         try:
             url = f"{self.api_base}/wp/v2/posts/{post_id}"
-            headers = self.get_auth_headers()
-            
-            response = requests.post(url, headers=headers, json={"meta": meta_payload}, timeout=30)
+            # The shared session already carries the auth header
+            response = self.session.post(url, json={"meta": meta_payload}, timeout=30)
             
             if response.status_code == 200:
                 logger.info(f"✅ Yoast SEO meta fields updated for post {post_id}")